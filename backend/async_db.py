@@ -0,0 +1,125 @@
+"""
+Database access for async handlers.
+
+sqlite3 blocks, so an `async def` route must not touch it on the event loop.
+AsyncDatabase runs that work on threads of its own instead of Starlette's
+shared threadpool: a small pool of reader threads, each holding one
+connection, and a single writer thread whose calls are serialized, so writes
+from async routes never queue on SQLite's lock behind each other.
+
+    result = await database.read(fn, *args)    # fn(cursor, *args)
+    result = await database.write(fn, *args)   # same, inside BEGIN IMMEDIATE ... COMMIT
+
+Calls run in a copy of the caller's context, so per-request context
+variables (the metrics sample) follow the work onto the database thread.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncDatabase:
+    """Reader thread pool plus one writer thread, each thread with its own connection"""
+
+    def __init__(self, connect, readers: int):
+        self.connect = connect
+        self.readers = max(readers, 1)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._connections = []
+        self._reader_executor = None
+        self._writer_executor = None
+        self._pid = None
+        self._reads = 0
+        self._writes = 0
+        self._pending_reads = 0
+        self._pending_writes = 0
+        self._max_pending_reads = 0
+
+    def _executors(self):
+        with self._lock:
+            # Threads and connections do not survive a fork; start fresh in the child
+            if self._reader_executor is None or self._pid != os.getpid():
+                self._reader_executor = ThreadPoolExecutor(self.readers, thread_name_prefix="db-reader")
+                self._writer_executor = ThreadPoolExecutor(1, thread_name_prefix="db-writer")
+                self._connections = []
+                self._local = threading.local()
+                self._pid = os.getpid()
+            return self._reader_executor, self._writer_executor
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self.connect()
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _call(self, fn, args, write: bool):
+        conn = self._connection()
+        try:
+            cursor = conn.cursor()
+            if write:
+                cursor.execute("BEGIN IMMEDIATE")
+            result = fn(cursor, *args)
+            if write:
+                conn.commit()
+            return result
+        finally:
+            # Never carry a read snapshot or a failed write into the next call
+            if conn.in_transaction:
+                conn.rollback()
+
+    async def read(self, fn, *args):
+        """Run fn(cursor, *args) on a reader thread"""
+        readers, _ = self._executors()
+        with self._lock:
+            self._reads += 1
+            self._pending_reads += 1
+            self._max_pending_reads = max(self._max_pending_reads, self._pending_reads)
+        try:
+            return await asyncio.wrap_future(readers.submit(
+                contextvars.copy_context().run, self._call, fn, args, False))
+        finally:
+            with self._lock:
+                self._pending_reads -= 1
+
+    async def write(self, fn, *args):
+        """Run fn(cursor, *args) in a transaction on the writer thread and commit it"""
+        _, writer = self._executors()
+        with self._lock:
+            self._writes += 1
+            self._pending_writes += 1
+        try:
+            return await asyncio.wrap_future(writer.submit(
+                contextvars.copy_context().run, self._call, fn, args, True))
+        finally:
+            with self._lock:
+                self._pending_writes -= 1
+
+    def shutdown(self):
+        with self._lock:
+            executors = (self._reader_executor, self._writer_executor)
+            connections, self._connections = self._connections, []
+            self._reader_executor = self._writer_executor = None
+        for executor in executors:
+            if executor is not None:
+                executor.shutdown(wait=True)
+        for conn in connections:
+            conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "readers": self.readers,
+                "connections": len(self._connections),
+                "reads": self._reads,
+                "writes": self._writes,
+                "pending_reads": self._pending_reads,
+                "pending_writes": self._pending_writes,
+                "max_pending_reads": self._max_pending_reads,
+                "started": self._reader_executor is not None,
+            }
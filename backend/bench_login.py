@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Load test: login throughput while scoring traffic runs in parallel.
+
+Starts the API under uvicorn against a throwaway database, then hammers
+/api/login from one set of threads while another set keeps posting balls to a
+live match. Reports login throughput and busy rejections next to scoring
+latency, first with scoring alone and then during the login burst.
+
+    python bench_login.py [--seconds 10] [--login-threads 32] [--score-threads 4]
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def call(base_url: str, method: str, path: str, body=None, token=None):
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(base_url + path, data=data, method=method)
+    request.add_header("Content-Type", "application/json")
+    if token:
+        request.add_header("Authorization", f"Bearer {token}")
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, json.loads(response.read() or b"null")
+    except urllib.error.HTTPError as error:
+        return error.code, None
+
+
+def start_server(workdir: str, port: int, env_overrides: dict) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, **env_overrides)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(200):
+        try:
+            urllib.request.urlopen(base_url + "/", timeout=1)
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("server did not start")
+
+
+def grant_admin(workdir: str, username: str):
+    """Let a registered user read the operational stats endpoints"""
+    subprocess.run([sys.executable, os.path.join(BACKEND_DIR, "server.py"), "grant-admin", username],
+                   cwd=workdir, env=dict(os.environ, PYTHONPATH=BACKEND_DIR),
+                   check=True, stdout=subprocess.DEVNULL)
+
+
+def percentile(samples, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def scoring_worker(base_url, token, match_id, stop, latencies):
+    ball_number = 0
+    while not stop.is_set():
+        ball_number += 1
+        ball = {
+            "match_id": match_id, "innings": 1, "over_number": ball_number // 6,
+            "ball_number": ball_number % 6 + 1, "batsman": "Batter", "bowler": "Bowler",
+            "runs": ball_number % 4,
+        }
+        started = time.perf_counter()
+        call(base_url, "POST", f"/api/matches/{match_id}/score", ball, token)
+        latencies.append(time.perf_counter() - started)
+
+
+def login_worker(base_url, stop, outcomes):
+    while not stop.is_set():
+        status, _ = call(base_url, "POST", "/api/login", {"username": "bench", "password": "bench-pass"})
+        outcomes.append(status)
+
+
+def run_phase(base_url, token, match_id, seconds, score_threads, login_threads):
+    stop = threading.Event()
+    latencies, outcomes = [], []
+    threads = [
+        threading.Thread(target=scoring_worker, args=(base_url, token, match_id, stop, latencies))
+        for _ in range(score_threads)
+    ] + [
+        threading.Thread(target=login_worker, args=(base_url, stop, outcomes))
+        for _ in range(login_threads)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies, outcomes
+
+
+def report(label, seconds, latencies, outcomes):
+    print(f"{label}")
+    print(f"  scoring: {len(latencies) / seconds:7.1f} req/s  "
+          f"p50 {percentile(latencies, 0.5) * 1000:7.1f} ms  "
+          f"p95 {percentile(latencies, 0.95) * 1000:7.1f} ms")
+    if outcomes:
+        ok = outcomes.count(200)
+        busy = sum(1 for status in outcomes if status in (429, 503))
+        print(f"  login:   {ok / seconds:7.1f} ok/s  {busy / seconds:7.1f} busy/s  "
+              f"({len(outcomes)} attempts)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--login-threads", type=int, default=32)
+    parser.add_argument("--score-threads", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=12, help="BCRYPT_ROUNDS for the server")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        port = free_port()
+        server = start_server(workdir, port, {"BCRYPT_ROUNDS": str(args.rounds)})
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            _, registered = call(base_url, "POST", "/api/register", {
+                "username": "bench", "email": "bench@example.com",
+                "password": "bench-pass", "confirmPassword": "bench-pass",
+            })
+            token = registered["access_token"]
+            grant_admin(workdir, "bench")
+            _, created = call(base_url, "POST", "/api/matches", {
+                "name": "Bench", "date": "2025-01-01", "venue": "Bench",
+                "matchType": "T20", "team1": "India", "team2": "Pakistan",
+            }, token)
+            match_id = created["match_id"]
+            call(base_url, "PATCH", f"/api/matches/{match_id}/start", token=token)
+
+            latencies, _ = run_phase(base_url, token, match_id, args.seconds, args.score_threads, 0)
+            report("scoring alone", args.seconds, latencies, [])
+            latencies, outcomes = run_phase(base_url, token, match_id, args.seconds,
+                                            args.score_threads, args.login_threads)
+            report(f"scoring during a {args.login_threads}-thread login burst",
+                   args.seconds, latencies, outcomes)
+            _, hasher = call(base_url, "GET", "/api/auth/hasher", token=token)
+            print(f"  hasher:  {hasher}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
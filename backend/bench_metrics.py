@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark: what the /metrics instrumentation costs per request.
+
+Measures in process what the instrumented SQLite cursor adds per statement
+and what the middleware's bookkeeping adds per request. Then starts the API
+under uvicorn twice against throwaway databases, with METRICS_ENABLED=1 and
+=0, scores a match and times the same reads against both,
+alternating rounds. It reports median latency per route and the estimated
+instrumentation share, from the statement counts /metrics recorded.
+
+    python bench_metrics.py [--requests 300] [--rounds 5]
+"""
+
+import argparse
+import random
+import re
+import sqlite3
+import statistics
+import tempfile
+import time
+import urllib.request
+
+from bench_login import call, free_port, start_server
+from datagen import simulate_match
+from metrics import (
+    HTTPMetrics,
+    InstrumentedConnection,
+    MetricsRegistry,
+    RequestSample,
+    SQLMetrics,
+    request_sample,
+)
+
+# (route template as labelled in /metrics, path requested)
+ROUTES = (
+    ("/api/matches/{match_id}/statistics", "/api/matches/{match_id}/statistics"),
+    ("/api/matches/{match_id}/partnerships", "/api/matches/{match_id}/partnerships?innings=1"),
+    ("/api/players/{name}/stats", "/api/players/Home%20Player%201/stats"),
+)
+
+
+def per_call(fn, repeat: int) -> float:
+    """Median seconds per call over ten batches"""
+    samples = []
+    for _ in range(10):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        samples.append((time.perf_counter() - started) / repeat)
+    return statistics.median(samples)
+
+
+def statement_overhead(repeat: int = 20000) -> float:
+    """Extra seconds per statement run inside a request; the sample's buffer flushes itself"""
+    sql_metrics = InstrumentedConnection.sql_metrics = SQLMetrics(MetricsRegistry())
+    request_sample.set(RequestSample(sql_metrics))
+    plain = sqlite3.connect(":memory:")
+    instrumented = sqlite3.connect(":memory:", factory=InstrumentedConnection)
+    timings = []
+    for conn in (plain, instrumented):
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+        conn.execute("INSERT INTO t VALUES (1, 'x')")
+        cursor = conn.cursor()
+        timings.append(per_call(lambda: cursor.execute("SELECT v FROM t WHERE id = ?", (1,)).fetchone(),
+                                repeat))
+    return timings[1] - timings[0]
+
+
+def request_overhead(repeat: int = 20000) -> float:
+    metrics = HTTPMetrics(MetricsRegistry())
+
+    def bookkeeping():
+        sample = RequestSample()
+        token = request_sample.set(sample)
+        metrics.in_flight.inc(1, ("GET",))
+        started = time.perf_counter()
+        metrics.in_flight.dec(1, ("GET",))
+        request_sample.reset(token)
+        metrics.record("GET", "/api/matches/{match_id}/statistics", 200,
+                       time.perf_counter() - started, 1024, sample)
+    return per_call(bookkeeping, repeat)
+
+
+def score_match(base_url: str) -> tuple:
+    _, registered = call(base_url, "POST", "/api/register", {
+        "username": "bench", "email": "bench@example.com",
+        "password": "bench-pass", "confirmPassword": "bench-pass",
+    })
+    token = registered["access_token"]
+    _, created = call(base_url, "POST", "/api/matches", {
+        "name": "Bench", "date": "2025-01-01", "venue": "Bench",
+        "matchType": "T20", "team1": "India", "team2": "Pakistan",
+    }, token)
+    match_id = created["match_id"]
+    call(base_url, "PATCH", f"/api/matches/{match_id}/start", token=token)
+    call(base_url, "POST", f"/api/matches/{match_id}/score/batch", {"balls": [
+        dict(ball, match_id=match_id) for ball in simulate_match(random.Random(3), "T20")
+    ]}, token)
+    return match_id, token
+
+
+def timed_request(base_url: str, path: str) -> float:
+    started = time.perf_counter()
+    status, _ = call(base_url, "GET", path)
+    assert status == 200, path
+    return time.perf_counter() - started
+
+
+def fetch_text(url: str) -> str:
+    with urllib.request.urlopen(url, timeout=30) as response:
+        return response.read().decode()
+
+
+def sample_value(exposition: str, name: str, route: str) -> float:
+    pattern = re.escape(name) + r'\{method="GET",route="' + re.escape(route) + r'"\} (\S+)'
+    return float(re.search(pattern, exposition).group(1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300, help="requests per route per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    per_statement = statement_overhead()
+    per_request = request_overhead()
+    print(f"instrumented cursor: +{per_statement * 1e6:.2f} us per statement (execute + fetchone)")
+    print(f"middleware bookkeeping: {per_request * 1e6:.2f} us per request")
+
+    with tempfile.TemporaryDirectory() as on_dir, tempfile.TemporaryDirectory() as off_dir:
+        servers = {}
+        try:
+            for enabled, workdir in (("1", on_dir), ("0", off_dir)):
+                port = free_port()
+                process = start_server(workdir, port, {"BCRYPT_ROUNDS": "4", "METRICS_ENABLED": enabled})
+                base_url = f"http://127.0.0.1:{port}"
+                servers[enabled] = (process, base_url, score_match(base_url)[0])
+
+            latencies = {(enabled, route): [] for enabled in servers for route, _ in ROUTES}
+            for _ in range(args.rounds):
+                for enabled, (_, base_url, match_id) in servers.items():
+                    for route, path in ROUTES:
+                        path = path.format(match_id=match_id)
+                        latencies[enabled, route].extend(
+                            timed_request(base_url, path) for _ in range(args.requests))
+
+            with_metrics = servers["1"][1]
+            exposition = fetch_text(with_metrics + "/metrics")
+            print(f"\nmedian latency over HTTP, {args.rounds} x {args.requests} requests per route")
+            for route, _ in ROUTES:
+                statements = sample_value(exposition, "cricklytics_http_request_sql_statements_total", route)
+                count = sample_value(exposition, "cricklytics_http_request_duration_seconds_count", route)
+                on = statistics.median(latencies["1", route])
+                off = statistics.median(latencies["0", route])
+                estimate = (per_request + per_statement * statements / count) / on
+                print(f"  {route:<38} on {on * 1000:6.2f} ms  off {off * 1000:6.2f} ms  "
+                      f"{statements / count:4.1f} statements  instrumentation ~{estimate:.2%}")
+        finally:
+            for process, _, _ in servers.values():
+                process.terminate()
+                process.wait()
+
+
+if __name__ == "__main__":
+    main()
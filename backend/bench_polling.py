@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Load test: hundreds of clients polling a live match.
+
+Starts the API under uvicorn against a throwaway database holding --history
+generated matches (see datagen), scores the first innings of a new match and
+then runs N concurrent pollers, each on its own keep-alive connection, cycling
+through /score, /statistics, /balls and /matches while a scorer bowls the
+second innings so cached responses keep going stale. The same load runs twice: with
+the read routes on Starlette's threadpool and the shared connection pool
+(DB_READ_WORKERS=0, the default) and on the async reader pool.
+
+    python bench_polling.py [--pollers 500] [--seconds 15] [--interval 1.0] [--history 200]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import threading
+import time
+
+from bench_login import call, free_port, percentile, start_server
+from datagen import generate_database, simulate_match
+
+HOST = "127.0.0.1"
+
+
+async def poller(port, paths, interval, stop, latencies, failures):
+    try:
+        reader, writer = await asyncio.open_connection(HOST, port)
+    except OSError:
+        failures.append("connect")
+        return
+    index = random.randrange(len(paths))
+    # Spread the first requests over one interval instead of a thundering herd
+    await asyncio.sleep(random.random() * interval)
+    try:
+        while not stop.is_set():
+            path = paths[index % len(paths)]
+            index += 1
+            started = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {HOST}\r\n\r\n".encode())
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            elapsed = time.perf_counter() - started
+            if status == 200:
+                latencies.append(elapsed)
+            else:
+                failures.append(status)
+            await asyncio.sleep(max(interval - elapsed, 0))
+    except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+        failures.append("connection")
+    finally:
+        writer.close()
+
+
+def scorer(base_url, token, match_id, deliveries, stop):
+    for ball in deliveries:
+        if stop.wait(0.2):
+            return
+        call(base_url, "POST", f"/api/matches/{match_id}/score", dict(ball, match_id=match_id), token)
+
+
+async def run_load(port, paths, pollers, seconds, interval):
+    stop = asyncio.Event()
+    latencies, failures = [], []
+    tasks = [asyncio.create_task(poller(port, paths, interval, stop, latencies, failures))
+             for _ in range(pollers)]
+    # Let every poller connect and settle before measuring
+    await asyncio.sleep(interval * 2)
+    latencies.clear()
+    failures.clear()
+    await asyncio.sleep(seconds)
+    measured = list(latencies), list(failures)
+    stop.set()
+    await asyncio.gather(*tasks)
+    return measured
+
+
+def run_mode(label, env, args):
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.history:
+            generate_database(os.path.join(workdir, "cricklytics.db"), matches=args.history)
+        port = free_port()
+        server = start_server(workdir, port, dict(env, BCRYPT_ROUNDS="4"))
+        base_url = f"http://{HOST}:{port}"
+        try:
+            _, registered = call(base_url, "POST", "/api/register", {
+                "username": "bench", "email": "bench@example.com",
+                "password": "bench-pass", "confirmPassword": "bench-pass",
+            })
+            token = registered["access_token"]
+            _, created = call(base_url, "POST", "/api/matches", {
+                "name": "Bench", "date": "2025-01-01", "venue": "Bench",
+                "matchType": "T20", "team1": "India", "team2": "Pakistan",
+            }, token)
+            match_id = created["match_id"]
+            call(base_url, "PATCH", f"/api/matches/{match_id}/start", token=token)
+            # Played out in full, so the scorer does not run out of balls
+            deliveries = simulate_match(random.Random(5), "T20", chase=False)
+            call(base_url, "POST", f"/api/matches/{match_id}/score/batch", {"balls": [
+                dict(ball, match_id=match_id) for ball in deliveries if ball["innings"] == 1
+            ]}, token)
+
+            paths = [f"/api/matches/{match_id}/{endpoint}"
+                     for endpoint in ("score", "statistics", "balls")] + ["/api/matches?limit=20"]
+            stop = threading.Event()
+            second_innings = [ball for ball in deliveries if ball["innings"] == 2]
+            scoring = threading.Thread(target=scorer,
+                                       args=(base_url, token, match_id, second_innings, stop))
+            scoring.start()
+            try:
+                latencies, failures = asyncio.run(
+                    run_load(port, paths, args.pollers, args.seconds, args.interval))
+            finally:
+                stop.set()
+                scoring.join()
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(label)
+    print(f"  {len(latencies) / args.seconds:7.1f} req/s  "
+          f"p50 {percentile(latencies, 0.5) * 1000:7.1f} ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:7.1f} ms  "
+          f"failures {len(failures)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pollers", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between polls per client")
+    parser.add_argument("--readers", type=int, default=4, help="DB_READ_WORKERS for the async run")
+    parser.add_argument("--history", type=int, default=200,
+                        help="completed matches generated into the database beforehand")
+    args = parser.parse_args()
+
+    print(f"{args.pollers} pollers, one request each every {args.interval}s")
+    run_mode("threadpool (DB_READ_WORKERS=0)", {"DB_READ_WORKERS": "0"}, args)
+    run_mode(f"async reader pool (DB_READ_WORKERS={args.readers})",
+             {"DB_READ_WORKERS": str(args.readers)}, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serialization time and bytes on the wire for a 100-over match.
+
+Starts the API under uvicorn against a throwaway database and scores a
+simulated 100-over match (two innings of 50 overs, played out in full, from
+datagen) through the batch endpoint. Then:
+
+  * times rendering the /score payload with the standard-library encoder and
+    with orjson (when installed), and compressing it with gzip and brotli
+    (when installed), in process;
+  * fetches /score, /statistics and /balls over HTTP with each
+    Accept-Encoding and reports body bytes and request latency.
+
+    python bench_serialization.py [--overs 100] [--repeat 50]
+"""
+
+import argparse
+import gzip
+import json
+import random
+import statistics
+import tempfile
+import time
+import urllib.request
+
+from bench_login import call, free_port, grant_admin, start_server
+from compression import brotli
+from datagen import simulate_match
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def match_balls(match_id: str, overs: int, seed: int = 7) -> list:
+    """Every over of both innings bowled, however many wickets fall"""
+    deliveries = simulate_match(random.Random(seed), "ODI", overs=overs // 2,
+                                wickets=overs * 6, chase=False)
+    return [dict(ball, match_id=match_id) for ball in deliveries]
+
+
+def timed(fn, repeat: int) -> float:
+    """Median seconds per call"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def fetch(base_url: str, path: str, encoding: str):
+    request = urllib.request.Request(base_url + path, headers={"Accept-Encoding": encoding})
+    started = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=30) as response:
+        body = response.read()
+        return time.perf_counter() - started, len(body), response.headers.get("Content-Encoding")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--overs", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        port = free_port()
+        server = start_server(workdir, port, {"BCRYPT_ROUNDS": "4"})
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            _, registered = call(base_url, "POST", "/api/register", {
+                "username": "bench", "email": "bench@example.com",
+                "password": "bench-pass", "confirmPassword": "bench-pass",
+            })
+            token = registered["access_token"]
+            grant_admin(workdir, "bench")
+            _, created = call(base_url, "POST", "/api/matches", {
+                "name": "Bench", "date": "2025-01-01", "venue": "Bench",
+                "matchType": "ODI", "team1": "India", "team2": "Pakistan",
+            }, token)
+            match_id = created["match_id"]
+            call(base_url, "PATCH", f"/api/matches/{match_id}/start", token=token)
+            balls = match_balls(match_id, args.overs)
+            for start in range(0, len(balls), 500):
+                call(base_url, "POST", f"/api/matches/{match_id}/score/batch",
+                     {"balls": balls[start:start + 500]}, token)
+            _, score = call(base_url, "GET", f"/api/matches/{match_id}/score")
+            print(f"{args.overs}-over match, {len(balls)} deliveries")
+
+            print("\nIn process, /score payload (median per call)")
+            rendered = json.dumps(score, ensure_ascii=False, allow_nan=False,
+                                  separators=(",", ":")).encode("utf-8")
+            encoders = [("json", lambda: json.dumps(score, ensure_ascii=False, allow_nan=False,
+                                                   separators=(",", ":")).encode("utf-8"))]
+            if orjson is not None:
+                encoders.append(("orjson", lambda: orjson.dumps(score, option=orjson.OPT_NON_STR_KEYS)))
+            for name, encode in encoders:
+                print(f"  {name:<14} {timed(encode, args.repeat) * 1000:8.2f} ms  {len(encode()):>9} bytes")
+            compressors = [("gzip -6", lambda: gzip.compress(rendered, compresslevel=6, mtime=0))]
+            if brotli is not None:
+                compressors.append(("brotli q4", lambda: brotli.compress(rendered, quality=4)))
+            for name, compress in compressors:
+                print(f"  {name:<14} {timed(compress, args.repeat) * 1000:8.2f} ms  {len(compress()):>9} bytes")
+
+            print("\nOver HTTP (median request latency, body bytes)")
+            encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+            for endpoint in ("score", "statistics", "balls"):
+                path = f"/api/matches/{match_id}/{endpoint}"
+                for encoding in encodings:
+                    fetch(base_url, path, encoding)
+                    results = [fetch(base_url, path, encoding) for _ in range(args.repeat)]
+                    latency = statistics.median(result[0] for result in results)
+                    size, applied = results[0][1], results[0][2] or "identity"
+                    print(f"  /{endpoint:<11} {encoding:<9} {latency * 1000:7.2f} ms  "
+                          f"{size:>9} bytes  ({applied})")
+            _, compression = call(base_url, "GET", "/api/compression/stats", token=token)
+            print(f"\nServer: json encoder {compression['json_encoder']}, "
+                  f"compressed cache {compression['cache']}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold start with a large user base.
+
+Builds a throwaway database with N users from datagen, each owning the
+default teams the way registration leaves them, then starts fresh interpreters that
+`import server`, as a worker boot does, and reports:
+
+  * boot against the up-to-date database (one schema_version query);
+  * boot after the seed version is reset, which re-seeds every user in batches;
+  * the previous per-user seeding loop over the same users, for comparison.
+
+    python bench_startup.py [--users 100000] [--boots 5]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Third-party imports are timed apart so the server module's own start-up shows
+BOOT = """
+import time
+started = time.perf_counter()
+import fastapi, jwt, pydantic
+imported = time.perf_counter()
+import server
+print(imported - started, time.perf_counter() - imported)
+"""
+
+
+def boot(env) -> tuple:
+    """(seconds importing dependencies, seconds importing server) in a fresh interpreter"""
+    output = subprocess.run([sys.executable, "-c", BOOT], env=env, cwd=BACKEND_DIR,
+                            check=True, capture_output=True, text=True).stdout
+    dependencies, module = output.strip().splitlines()[-1].split()
+    return float(dependencies), float(module)
+
+
+def median_boot(env, boots: int, before_each=None) -> tuple:
+    samples = []
+    for _ in range(boots):
+        if before_each:
+            before_each()
+        samples.append(boot(env))
+    return tuple(statistics.median(sample[i] for sample in samples) for i in range(2))
+
+
+def legacy_seed(cursor, default_teams):
+    """The previous startup seeding: two lookups per default team for every user"""
+    cursor.execute("SELECT id FROM users")
+    for user in cursor.fetchall():
+        for team in default_teams:
+            cursor.execute("""
+                SELECT id FROM standalone_teams
+                WHERE lower(name) = lower(?) AND created_by = ?
+            """, (team["name"], user["id"]))
+            existing_team = cursor.fetchone()
+            if existing_team:
+                cursor.execute("""
+                    SELECT 1 FROM team_players tp
+                    JOIN players p ON p.id = tp.player_id
+                    WHERE tp.team_id = ? AND p.name LIKE ?
+                    LIMIT 1
+                """, (existing_team["id"], f"{team['name']} Player %"))
+                cursor.fetchone()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--boots", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ, DATABASE_FILE=os.path.join(workdir, "cricklytics.db"),
+                   ARCHIVE_INTERVAL_SECONDS="0", GLOBAL_STATS_RECONCILE_SECONDS="0",
+                   BCRYPT_ROUNDS="4")
+        os.environ.update(env)
+        sys.path.insert(0, BACKEND_DIR)
+        import datagen
+        import server
+
+        with server.get_db() as conn:
+            cursor = conn.cursor()
+            started = time.perf_counter()
+            datagen.populate(cursor, users=args.users, teams=0, matches=0)
+            conn.commit()
+            print(f"{args.users} users seeded with {len(server.DEFAULT_TEAMS)} default teams each "
+                  f"in {time.perf_counter() - started:.1f} s")
+
+            started = time.perf_counter()
+            legacy_seed(cursor, server.DEFAULT_TEAMS)
+            conn.rollback()
+            legacy = time.perf_counter() - started
+
+        def reset_seed_version():
+            with server.get_db() as conn:
+                conn.execute("UPDATE schema_version SET version = 0 WHERE name = 'seed'")
+                conn.commit()
+
+        dependencies, up_to_date = median_boot(env, args.boots)
+        _, reseed = median_boot(env, args.boots, reset_seed_version)
+
+    print(f"median of {args.boots} boots; importing fastapi/jwt/pydantic first took "
+          f"{dependencies * 1000:.1f} ms and is not included")
+    print(f"import server, up-to-date database   {up_to_date * 1000:9.1f} ms")
+    print(f"import server, seed version changed  {reseed * 1000:9.1f} ms  (batched re-seed of every user)")
+    print(f"previous per-user seeding loop       {legacy * 1000:9.1f} ms  (its lookups alone, paid on every boot)")
+
+
+if __name__ == "__main__":
+    main()
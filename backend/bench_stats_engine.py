@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-endpoint ball loops vs the single-pass statistics engine.
+
+Builds a 300-over match simulated by datagen in an in-memory database and
+times what a viewer refresh costs: /score + /statistics + /visualization.
+
+    python bench_stats_engine.py [--overs 300] [--repeat 20]
+"""
+
+import argparse
+import random
+import sqlite3
+import time
+
+from datagen import simulate_match
+from stats_engine import (
+    MATCH_BALLS_SQL,
+    compute_match_stats,
+    load_ball_log,
+    statistics_view,
+    visualization_view,
+)
+
+MATCH_ID = "bench-match"
+
+
+def build_match(overs: int, seed: int = 42) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("""
+        CREATE TABLE balls (
+            id TEXT PRIMARY KEY, match_id TEXT NOT NULL, innings INTEGER NOT NULL,
+            over_number INTEGER NOT NULL, ball_number INTEGER NOT NULL,
+            legal_ball_number INTEGER NOT NULL DEFAULT 1, batsman TEXT NOT NULL,
+            bowler TEXT NOT NULL, runs INTEGER DEFAULT 0, extras INTEGER DEFAULT 0,
+            extras_type TEXT, wicket BOOLEAN DEFAULT FALSE, wicket_type TEXT,
+            wicket_player TEXT, commentary TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE INDEX idx_balls_match_order ON balls(match_id, innings, over_number, ball_number)")
+
+    # Every over bowled, however many wickets fall: batters come round again
+    deliveries = simulate_match(random.Random(seed), "ODI", overs=overs // 2,
+                                wickets=overs * 6, chase=False)
+    rows = [(f"{ball['innings']}-{ball['over_number']}-{ball['ball_number']}", MATCH_ID,
+             ball['innings'], ball['over_number'], ball['ball_number'], ball['legal_ball_number'],
+             ball['batsman'], ball['bowler'], ball['runs'], ball['extras'], ball['extras_type'],
+             ball['wicket'], ball['wicket_type'], ball['wicket_player'], "Synthetic delivery")
+            for ball in deliveries]
+    conn.executemany("""
+        INSERT INTO balls (id, match_id, innings, over_number, ball_number, legal_ball_number,
+                           batsman, bowler, runs, extras, extras_type, wicket, wicket_type,
+                           wicket_player, commentary)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    return conn
+
+
+def legacy_refresh(conn):
+    """The three pre-engine handlers: one query, dict conversion and loop each"""
+    cursor = conn.cursor()
+
+    # /score
+    cursor.execute(MATCH_BALLS_SQL, (MATCH_ID,))
+    balls = [dict(row) for row in cursor.fetchall()]
+    innings_scores = {}
+    for ball in balls:
+        scores = innings_scores.setdefault(ball['innings'], {"runs": 0, "wickets": 0, "balls": 0, "extras": 0})
+        scores["runs"] += ball['runs'] + ball['extras']
+        scores["extras"] += ball['extras']
+        if ball['wicket']:
+            scores["wickets"] += 1
+        if ball['extras_type'] is None or ball['extras_type'] not in ['wide', 'no-ball']:
+            scores["balls"] += 1
+
+    # /statistics
+    cursor.execute(MATCH_BALLS_SQL, (MATCH_ID,))
+    balls = [dict(row) for row in cursor.fetchall()]
+    batting_stats = {}
+    bowling_stats = {}
+    for ball in balls:
+        batting = batting_stats.setdefault(ball['batsman'], {"runs": 0, "balls": 0, "fours": 0, "sixes": 0})
+        bowling = bowling_stats.setdefault(ball['bowler'], {"runs_conceded": 0, "balls_bowled": 0, "wickets": 0})
+        batting["runs"] += ball['runs']
+        if ball['extras_type'] is None or ball['extras_type'] not in ['wide', 'no-ball']:
+            batting["balls"] += 1
+            bowling["balls_bowled"] += 1
+        if ball['runs'] == 4:
+            batting["fours"] += 1
+        elif ball['runs'] == 6:
+            batting["sixes"] += 1
+        bowling["runs_conceded"] += ball['runs'] + ball['extras']
+        if ball['wicket']:
+            bowling["wickets"] += 1
+
+    # /visualization
+    cursor.execute(MATCH_BALLS_SQL, (MATCH_ID,))
+    balls = [dict(row) for row in cursor.fetchall()]
+    run_progression = []
+    cumulative_runs = 0
+    current_over = -1
+    over_runs = 0
+    for ball in balls:
+        if ball['over_number'] != current_over:
+            if current_over >= 0:
+                run_progression.append((current_over + 1, over_runs, cumulative_runs))
+            current_over = ball['over_number']
+            over_runs = 0
+        over_runs += ball['runs'] + ball['extras']
+        cumulative_runs += ball['runs'] + ball['extras']
+    wicket_timeline = []
+    cumulative_runs = 0
+    for ball in balls:
+        cumulative_runs += ball['runs'] + ball['extras']
+        if ball['wicket']:
+            wicket_timeline.append((ball['over_number'], ball['ball_number'], cumulative_runs))
+
+
+def engine_refresh(conn):
+    """Load once, compute once, render all three views"""
+    log = load_ball_log(conn.cursor(), MATCH_ID)
+    stats = compute_match_stats(log)
+    log.as_dicts()
+    statistics_view(stats)
+    visualization_view(stats, log)
+
+
+def best_of(fn, conn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(conn)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--overs", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    conn = build_match(args.overs)
+    deliveries = conn.execute("SELECT COUNT(*) FROM balls").fetchone()[0]
+
+    legacy = best_of(legacy_refresh, conn, args.repeat)
+    engine = best_of(engine_refresh, conn, args.repeat)
+
+    print(f"{args.overs}-over match, {deliveries} deliveries (best of {args.repeat})")
+    print(f"  legacy per-endpoint loops: {legacy * 1000:8.2f} ms")
+    print(f"  single-pass engine:        {engine * 1000:8.2f} ms")
+    print(f"  speedup:                   {legacy / engine:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
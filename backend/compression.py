@@ -0,0 +1,187 @@
+"""
+Negotiated response compression.
+
+CompressionMiddleware compresses a response body of at least minimum_size
+bytes with brotli when the client accepts it and the brotli package is
+installed, and with gzip otherwise. Streams (server-sent events) and bodies
+that already carry a Content-Encoding pass through untouched.
+
+Responses with an ETag are versioned, so their compressed bodies are kept in
+a small LRU keyed by path, query, ETag and encoding: a hundred clients
+polling the same score compress it once per version, not once per poll.
+"""
+
+import gzip
+from collections import OrderedDict
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Compressing these again costs CPU for nothing
+SKIPPED_MEDIA_TYPES = ("text/event-stream", "application/vnd.cricklytics.match-archive",
+                       "application/zip", "image/")
+
+
+def available_encodings() -> tuple:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """The encoding to use for an Accept-Encoding header, or None for identity"""
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for coding in available_encodings():
+        weight = weights.get(coding, weights.get("*", 0.0))
+        # Ties go to the first available encoding, brotli
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress(body: bytes, encoding: str, gzip_level: int, brotli_quality: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    # mtime=0 keeps the output byte-identical for identical input
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressedBodyCache:
+    """LRU of compressed bodies of versioned (ETag-carrying) responses, bounded by bytes.
+
+    Also counts what the middleware compressed, so one object serves its stats.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.compressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def get(self, key) -> Optional[bytes]:
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        self._entries[key] = body
+        self._bytes += len(body)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def record(self, bytes_in: int, bytes_out: int):
+        self.compressed += 1
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+
+    def stats(self) -> dict:
+        return {
+            "encodings": list(available_encodings()),
+            "compressed": self.compressed,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "cache": {"entries": len(self._entries), "bytes": self._bytes,
+                      "hits": self.hits, "misses": self.misses},
+        }
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware, so streaming responses are never buffered"""
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6,
+                 brotli_quality: int = 4, cache: Optional[CompressedBodyCache] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache = cache if cache is not None else CompressedBodyCache(16 * 1024 * 1024)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                return
+
+            headers = MutableHeaders(raw=list(start.get("headers", [])))
+            start = dict(start, headers=headers.raw)
+            body = message.get("body", b"")
+            # Streams and small or already-encoded bodies go out as they are
+            compressible = not (message.get("more_body", False) or len(body) < self.minimum_size
+                                or "content-encoding" in headers
+                                or headers.get("content-type", "").startswith(SKIPPED_MEDIA_TYPES))
+            if start["status"] == 304:
+                # Keep the validator the client holds: compressed 200s carry a weak ETag
+                self._weaken_etag(headers)
+                headers.add_vary_header("Accept-Encoding")
+            elif compressible:
+                message = dict(message, body=self._compress(scope, headers, body, encoding))
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(message["body"]))
+                headers.add_vary_header("Accept-Encoding")
+                self._weaken_etag(headers)
+            passthrough = True
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _weaken_etag(headers: MutableHeaders):
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+
+    def _compress(self, scope, headers: MutableHeaders, body: bytes, encoding: str) -> bytes:
+        etag = headers.get("etag")
+        key = (scope["path"], scope.get("query_string", b""), etag, encoding) if etag else None
+        compressed = self.cache.get(key) if key else None
+        if compressed is None:
+            compressed = compress(body, encoding, self.gzip_level, self.brotli_quality)
+            if key:
+                self.cache.put(key, compressed)
+        self.cache.record(len(body), len(compressed))
+        return compressed
@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""
+Synthetic tournament data for benchmarks and load tests.
+
+Fills a database with users (each with the default teams registration gives
+them), tournament teams with 15-player squads, and completed matches scored
+ball by ball: T20 and ODI lengths, wides, no-balls, byes, leg-byes, wickets,
+the innings break and a chase that stops once the target is passed. The
+same seed always produces the same data.
+
+Rows go in with executemany in chunked transactions, and the aggregates
+(innings totals, player rollups, global counters) are then rebuilt from
+the ball log by the functions behind `server.py rebuild-aggregates`, so the
+server sees what scoring through the API would have left behind, without
+the API in the way. Secondary ball indexes are built once at the end when
+the load starts from an empty balls table.
+
+    python datagen.py cricklytics.db --balls 10000000
+    python datagen.py bench.db --users 1000 --matches 200 --live 2 --seed 3
+
+Every generated user can log in as user<N> with the password "password".
+Library use: simulate_match() for deliveries alone, populate() against an
+imported server, generate_database() to build a file from another process.
+"""
+
+import argparse
+import bisect
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+USER_PASSWORD = "password"
+
+MATCH_FORMATS = {"T20": 20, "ODI": 50}
+
+# Per-delivery outcome weights (per 1000 deliveries): runs off the bat on a legal
+# ball, wickets, and each kind of extra
+OUTCOME_WEIGHTS = {
+    "T20": {"runs": {0: 330, 1: 370, 2: 80, 3: 4, 4: 130, 6: 60}, "wicket": 52,
+            "wide": 35, "no-ball": 6, "bye": 4, "leg-bye": 10},
+    "ODI": {"runs": {0: 480, 1: 330, 2: 70, 3: 7, 4: 90, 6: 20}, "wicket": 28,
+            "wide": 30, "no-ball": 4, "bye": 4, "leg-bye": 12},
+}
+WICKET_TYPES = (("caught", 58), ("bowled", 20), ("lbw", 12), ("run out", 6), ("stumped", 4))
+
+# Roles of a generated squad in batting order; the first eleven are the playing XI
+SQUAD_ROLES = (["Batter"] * 4 + ["Wicketkeeper-Batter", "Batting Allrounder", "Bowling Allrounder"]
+               + ["Bowler"] * 4 + ["Batter", "Wicketkeeper-Batter", "Bowling Allrounder", "Bowler"])
+BOWLERS_USED = 5
+
+FIRST_NAMES = ("Aarav", "Ben", "Chris", "Dinesh", "Ethan", "Faisal", "George", "Harry", "Imran",
+               "Jack", "Kane", "Liam", "Mitchell", "Nathan", "Omar", "Pat", "Quinton", "Rahul",
+               "Sam", "Tom", "Usman", "Virat", "Will", "Yash", "Zak", "Arjun", "Dale", "Jos",
+               "Kagiso", "Marnus", "Rashid", "Shakib", "Tim", "Trent", "Wanindu", "Babar")
+LAST_NAMES = ("Patel", "Smith", "Khan", "Sharma", "Taylor", "Williams", "Ahmed", "Brown", "Singh",
+              "Jones", "Wilson", "Hussain", "Martin", "Rao", "Clarke", "Iqbal", "Walker", "Perera",
+              "Fernando", "Reddy", "Hall", "Young", "King", "Wright", "Scott", "Green", "Baker",
+              "Nair", "Hughes", "Morgan", "Das", "Roy", "Kumar", "Shah", "Evans", "Mendis")
+CITIES = ("Mumbai", "Chennai", "Kolkata", "Delhi", "Lahore", "Karachi", "Sydney", "Melbourne",
+          "Perth", "Durban", "Cape Town", "London", "Leeds", "Auckland", "Colombo", "Dhaka",
+          "Kingston", "Bridgetown", "Hyderabad", "Bengaluru", "Multan", "Hobart", "Pune", "Galle")
+MASCOTS = ("Kings", "Titans", "Strikers", "Royals", "Warriors", "Thunder", "Hurricanes",
+           "Knights", "Giants", "Chargers", "Stallions", "Falcons")
+
+# Scoring pace for created_at: seconds per delivery and the break between innings
+DELIVERY_SECONDS = 40
+INNINGS_BREAK_SECONDS = 20 * 60
+
+
+def outcome_table(weights: dict) -> tuple:
+    """(cumulative weights, outcomes) for picking a delivery with one random number.
+
+    Outcomes are (runs, extras, extras_type, wicket); no-balls may also be hit.
+    """
+    outcomes = [(runs, 0, None, False) for runs in weights["runs"]]
+    shares = list(weights["runs"].values())
+    outcomes.append((0, 0, None, True))
+    shares.append(weights["wicket"])
+    outcomes.append((0, 1, "wide", False))
+    shares.append(weights["wide"])
+    for runs in (0, 1, 4):
+        outcomes.append((runs, 1, "no-ball", False))
+        shares.append(weights["no-ball"] / 3)
+    for extras_type in ("bye", "leg-bye"):
+        outcomes.append((0, 1, extras_type, False))
+        shares.append(weights[extras_type])
+    total = sum(shares)
+    return [share / total for share in itertools.accumulate(shares)], outcomes
+
+
+OUTCOMES = {match_type: outcome_table(weights) for match_type, weights in OUTCOME_WEIGHTS.items()}
+_WICKET_CUMULATIVE = list(itertools.accumulate(weight for _, weight in WICKET_TYPES))
+
+
+class Delivery(dict):
+    """A ball as a dict, with attribute reads for generate_ball_commentary"""
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def simulate_innings(rnd: random.Random, match_type: str, innings: int, batters: list,
+                     bowlers: list, overs: int, wickets: int, target: Optional[int]) -> list:
+    """One innings as a list of Delivery; stops at the overs, the wickets or the target"""
+    cumulative, outcomes = OUTCOMES[match_type]
+    wicket_total = _WICKET_CUMULATIVE[-1]
+    deliveries = []
+    total = fallen = 0
+    striker, non_striker, next_batter = 0, 1, 2
+    for over_number in range(overs):
+        bowler = bowlers[over_number % len(bowlers)]
+        legal = ball_number = 0
+        while legal < 6:
+            ball_number += 1
+            runs, extras, extras_type, wicket = outcomes[bisect.bisect(cumulative, rnd.random())]
+            wicket_type = wicket_player = None
+            if extras_type not in ("wide", "no-ball"):
+                legal += 1
+            if wicket:
+                wicket_type = WICKET_TYPES[bisect.bisect(_WICKET_CUMULATIVE,
+                                                         rnd.random() * wicket_total)][0]
+                wicket_player = batters[striker % len(batters)]
+            deliveries.append(Delivery(
+                innings=innings, over_number=over_number, ball_number=ball_number,
+                legal_ball_number=legal or 1, batsman=batters[striker % len(batters)],
+                bowler=bowler, runs=runs, extras=extras, extras_type=extras_type, wicket=wicket,
+                wicket_type=wicket_type, wicket_player=wicket_player,
+            ))
+            total += runs + extras
+            if wicket:
+                fallen += 1
+                if fallen >= wickets:
+                    return deliveries
+                striker, next_batter = next_batter, next_batter + 1
+            elif (runs + (extras if extras_type in ("bye", "leg-bye") else 0)) % 2:
+                striker, non_striker = non_striker, striker
+            if target is not None and total > target:
+                return deliveries
+        striker, non_striker = non_striker, striker
+    return deliveries
+
+
+def simulate_match(rnd: random.Random, match_type: str = "T20", batting_first: Optional[list] = None,
+                   fielding_first: Optional[list] = None, overs: Optional[int] = None,
+                   wickets: int = 10, chase: bool = True) -> list:
+    """Both innings of a match as Delivery dicts carrying the BallScore fields.
+
+    Teams are playing XIs in batting order (generic names when omitted); the
+    last BOWLERS_USED of each XI bowl in rotation. For stress runs longer
+    than a real match, overs overrides the format's innings length, wickets
+    how many fall before an innings ends (batters come round again) and
+    chase=False plays the second innings out past the target.
+    """
+    overs = overs or MATCH_FORMATS[match_type]
+    batting_first = batting_first or [f"Home Player {n}" for n in range(1, 12)]
+    fielding_first = fielding_first or [f"Away Player {n}" for n in range(1, 12)]
+    first = simulate_innings(rnd, match_type, 1, batting_first, fielding_first[-BOWLERS_USED:],
+                             overs, wickets, None)
+    target = sum(ball["runs"] + ball["extras"] for ball in first)
+    second = simulate_innings(rnd, match_type, 2, fielding_first, batting_first[-BOWLERS_USED:],
+                              overs, wickets, target if chase else None)
+    return first + second
+
+
+def player_names(rnd: random.Random, count: int) -> list:
+    """count distinct, deterministic player names"""
+    names = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+    rnd.shuffle(names)
+    for generation in itertools.count(2):
+        if len(names) >= count:
+            return names[:count]
+        names += [f"{name} {generation}" for name in names[:len(FIRST_NAMES) * len(LAST_NAMES)]]
+
+
+def team_names(count: int) -> list:
+    names = [f"{city} {mascot}" for mascot in MASCOTS for city in CITIES]
+    return [name if index < len(names) else f"{name} {index // len(names) + 1}"
+            for index, name in enumerate(itertools.islice(itertools.cycle(names), count))]
+
+
+def deterministic_uuid(rnd: random.Random) -> str:
+    return str(uuid.UUID(int=rnd.getrandbits(128), version=4))
+
+
+_dates = {}
+_clocks = {}
+
+
+def timestamp(epoch: int) -> str:
+    """The format of SQLite's CURRENT_TIMESTAMP, from cached date and time-of-day strings"""
+    day, seconds = divmod(epoch, 86400)
+    date_part = _dates.get(day)
+    if date_part is None:
+        date_part = _dates[day] = time.strftime("%Y-%m-%d", time.gmtime(day * 86400))
+    clock = _clocks.get(seconds)
+    if clock is None:
+        clock = _clocks[seconds] = time.strftime("%H:%M:%S", time.gmtime(seconds))
+    return f"{date_part} {clock}"
+
+
+def insert_users(cursor, server, rnd: random.Random, users: int) -> list:
+    import bcrypt
+
+    # One hash shared by every user: hashing is deliberately slow
+    password_hash = bcrypt.hashpw(USER_PASSWORD.encode("utf-8"),
+                                  bcrypt.gensalt(server.BCRYPT_ROUNDS)).decode("utf-8")
+    rows = [(deterministic_uuid(rnd), f"user{n}", f"user{n}@example.com", password_hash)
+            for n in range(users)]
+    # Users left by an earlier run into the same database are kept as they are
+    cursor.executemany("""
+        INSERT INTO users (id, username, email, password_hash, role) VALUES (?, ?, ?, ?, 'scorer')
+        ON CONFLICT DO NOTHING
+    """, rows)
+    server.seed_default_teams(cursor)
+    cursor.execute("""
+        SELECT u.id FROM json_each(?) AS generated JOIN users u ON u.username = generated.value
+        ORDER BY generated.key
+    """, (json.dumps([row[1] for row in rows]),))
+    return [row["id"] for row in cursor.fetchall()]
+
+
+def insert_tournament_teams(cursor, server, rnd: random.Random, teams: int, owners: list) -> list:
+    """Standalone teams with full squads; returns [(team_id, name, squad)]"""
+    names = player_names(rnd, teams * len(SQUAD_ROLES))
+    player_ids = server.get_player_ids(cursor, names)
+    created = []
+    for index, name in enumerate(team_names(teams)):
+        squad = names[index * len(SQUAD_ROLES):(index + 1) * len(SQUAD_ROLES)]
+        created.append((deterministic_uuid(rnd), name, squad))
+    cursor.executemany("""
+        INSERT INTO standalone_teams (id, name, captain, vice_captain, total_matches, created_by)
+        VALUES (?, ?, ?, ?, 0, ?)
+    """, [(team_id, name, squad[0], squad[1], owners[index % len(owners)])
+          for index, (team_id, name, squad) in enumerate(created)])
+    cursor.executemany("""
+        INSERT INTO team_players (team_id, position, player_id, role) VALUES (?, ?, ?, ?)
+    """, [(team_id, position, player_ids[player], role)
+          for team_id, _, squad in created
+          for position, (player, role) in enumerate(zip(squad, SQUAD_ROLES))])
+    return created
+
+
+class MatchRows:
+    """Rows for a chunk of generated matches, written with one executemany per table"""
+
+    INSERTS = {
+        "matches": """
+            INSERT INTO matches (id, name, date, venue, match_type, team1, team2, toss_winner,
+                                 toss_decision, batting_first, status, created_by, created_at, version)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        "teams": "INSERT INTO teams (id, match_id, name) VALUES (?, ?, ?)",
+        "team_players": "INSERT INTO team_players (team_id, position, player_id, role) VALUES (?, ?, ?, ?)",
+        "team_match_usage": """
+            INSERT INTO team_match_usage (id, team_name, match_id, match_name)
+            VALUES (lower(hex(randomblob(16))), ?, ?, ?)
+        """,
+        "match_state": """
+            INSERT INTO match_state (match_id, current_striker, current_non_striker,
+                                     current_bowler, current_innings)
+            VALUES (?, ?, ?, ?, ?)
+        """,
+        "balls": """
+            INSERT INTO balls (id, match_id, innings, over_number, ball_number, legal_ball_number,
+                               batsman, bowler, runs, extras, extras_type, wicket, wicket_type,
+                               wicket_player, commentary, created_at, seq, batsman_id, bowler_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+    }
+
+    def __init__(self):
+        self.rows = {table: [] for table in self.INSERTS}
+
+    def flush(self, cursor):
+        for table, rows in self.rows.items():
+            cursor.executemany(self.INSERTS[table], rows)
+            rows.clear()
+
+
+def add_match(rows: MatchRows, server, rnd: random.Random, number: int, scheduled: datetime,
+              match_type: str, home: tuple, away: tuple, owner: str, live: bool,
+              player_ids: dict, squad_roles: dict, commentary: dict) -> int:
+    """Rows for one match created, scored ball by ball and finished (unless live) as through
+    the API; returns its ball count. commentary caches generated lines between matches.
+    """
+    match_id = deterministic_uuid(rnd)
+    (_, home_name, home_squad), (_, away_name, away_squad) = home, away
+    toss_winner = rnd.choice((home_name, away_name))
+    toss_decision = rnd.choice(("bat", "field"))
+    if (toss_winner == home_name) == (toss_decision == "bat"):
+        batting, fielding = (home_name, home_squad), (away_name, away_squad)
+    else:
+        batting, fielding = (away_name, away_squad), (home_name, home_squad)
+    deliveries = simulate_match(rnd, match_type, batting[1][:11], fielding[1][:11])
+    if live:
+        # Stopped part way through the chase
+        deliveries = deliveries[:rnd.randrange(len(deliveries) // 2, len(deliveries))]
+
+    name = f"Match {number}: {home_name} vs {away_name}"
+    started = int(scheduled.replace(tzinfo=timezone.utc).timestamp())
+    rows.rows["matches"].append((
+        match_id, name, scheduled.date().isoformat(), f"{home_name.rsplit(' ', 1)[0]} Oval",
+        match_type, home_name, away_name, toss_winner, toss_decision, batting[0],
+        "live" if live else "completed", owner, timestamp(started),
+        # Starting bumps the version once, every delivery once more, finishing once more
+        len(deliveries) + (1 if live else 2),
+    ))
+    for team_name, squad in ((home_name, home_squad), (away_name, away_squad)):
+        team_id = deterministic_uuid(rnd)
+        rows.rows["teams"].append((team_id, match_id, team_name))
+        rows.rows["team_players"] += [(team_id, position, player_ids[player], squad_roles[player])
+                                      for position, player in enumerate(squad[:11])]
+        rows.rows["team_match_usage"].append((team_name, match_id, name))
+
+    if len(commentary) > 100_000:
+        commentary.clear()
+    balls = rows.rows["balls"]
+    first_ball = started + 30 * 60
+    for seq, ball in enumerate(deliveries, start=2):
+        key = (ball["batsman"], ball["bowler"], ball["runs"], ball["extras_type"], ball["wicket_type"])
+        line = commentary.get(key)
+        if line is None:
+            line = commentary[key] = server.generate_ball_commentary(ball)
+        elapsed = seq * DELIVERY_SECONDS + (INNINGS_BREAK_SECONDS if ball["innings"] == 2 else 0)
+        balls.append((
+            f"{match_id}-{seq}", match_id, ball["innings"], ball["over_number"], ball["ball_number"],
+            ball["legal_ball_number"], ball["batsman"], ball["bowler"], ball["runs"], ball["extras"],
+            ball["extras_type"], ball["wicket"], ball["wicket_type"], ball["wicket_player"], line,
+            timestamp(first_ball + elapsed), seq,
+            player_ids[ball["batsman"]], player_ids[ball["bowler"]],
+        ))
+
+    if deliveries:
+        last = deliveries[-1]
+        partner = next((ball["batsman"] for ball in reversed(deliveries)
+                        if ball["innings"] == last["innings"] and ball["batsman"] != last["batsman"]), None)
+        rows.rows["match_state"].append((match_id, last["batsman"], partner, last["bowler"],
+                                         last["innings"]))
+    return len(deliveries)
+
+
+@contextmanager
+def ball_indexes_deferred(cursor):
+    """Drop the secondary indexes on an empty balls table for the load, then build them once.
+
+    Building an index over the finished table is a sort, far cheaper than
+    keeping five indexes up to date row by row. A table that already holds
+    balls keeps its indexes, since rebuilding them would cost more than it saves.
+    """
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM balls) AS populated")
+    if cursor.fetchone()["populated"]:
+        yield
+        return
+    cursor.execute("""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND tbl_name = 'balls' AND sql IS NOT NULL
+    """)
+    indexes = [(row["name"], row["sql"]) for row in cursor.fetchall()]
+    for name, _ in indexes:
+        cursor.execute(f"DROP INDEX {name}")
+    try:
+        yield
+    finally:
+        for _, sql in indexes:
+            cursor.execute(sql)
+
+
+def populate(cursor, users: int = 100, teams: int = 16, matches: int = 100,
+             balls: Optional[int] = None, t20_share: float = 0.7, live: int = 0,
+             start_date: date = date(2015, 1, 1), matches_per_day: int = 8, seed: int = 1,
+             chunk: int = 500, commit=None) -> dict:
+    """Generate a tournament into the database the imported server module uses.
+
+    Completes `matches` matches, or as many as it takes to score `balls`
+    deliveries when that is given, then adds `live` matches left in progress.
+    Rows are written every `chunk` matches, and commit, when given, is called
+    then to end the running transaction. Innings totals, player rollups and
+    the global counters are rebuilt from the ball log at the end, as
+    `server.py rebuild-aggregates` does. Returns the counts generated.
+    """
+    import server
+
+    rnd = random.Random(seed)
+    owners = insert_users(cursor, server, rnd, users) if users else []
+    if not owners:
+        cursor.execute("SELECT id FROM users ORDER BY created_at LIMIT 1000")
+        owners = [row["id"] for row in cursor.fetchall()]
+    if (matches or balls) and (not owners or teams < 2):
+        raise ValueError("matches need a user to own them and at least two teams")
+    tournament = insert_tournament_teams(cursor, server, rnd, teams, owners) if teams else []
+    squad_roles = {player: role for _, _, squad in tournament for player, role in zip(squad, SQUAD_ROLES)}
+    player_ids = server.get_player_ids(cursor, list(squad_roles))
+
+    rows = MatchRows()
+    commentary = {}
+    usage = dict.fromkeys((team_id for team_id, _, _ in tournament), 0)
+    generated = scored = 0
+
+    def next_match(in_progress: bool):
+        nonlocal generated, scored
+        home, away = rnd.sample(tournament, 2)
+        scheduled = datetime.combine(start_date, datetime.min.time()) + timedelta(
+            days=generated // matches_per_day, hours=10 + generated % matches_per_day)
+        match_type = "T20" if rnd.random() < t20_share else "ODI"
+        scored += add_match(rows, server, rnd, generated + 1, scheduled, match_type, home, away,
+                            owners[rnd.randrange(len(owners))], in_progress, player_ids,
+                            squad_roles, commentary)
+        usage[home[0]] += 1
+        usage[away[0]] += 1
+        generated += 1
+        if generated % chunk == 0:
+            rows.flush(cursor)
+            if commit is not None:
+                commit()
+
+    with ball_indexes_deferred(cursor):
+        completed = max(matches - live, 0)
+        while tournament and (scored < balls if balls is not None else generated < completed):
+            next_match(False)
+        for _ in range(live if tournament else 0):
+            next_match(True)
+        rows.flush(cursor)
+
+    cursor.executemany("UPDATE standalone_teams SET total_matches = total_matches + ? WHERE id = ?",
+                       [(count, team_id) for team_id, count in usage.items()])
+    server.rebuild_innings_totals(cursor)
+    server.rebuild_player_stats(cursor)
+    server.reconcile_global_stats(cursor)
+    return {"users": users, "teams": len(tournament),
+            "matches": generated, "balls": scored}
+
+
+def generate_database(database: str, **options) -> str:
+    """Build `database` in a child interpreter, so the caller's own server import is untouched.
+
+    options are this script's flags, e.g. generate_database(path, matches=50, live=1).
+    Returns the generator's summary line.
+    """
+    command = [sys.executable, os.path.join(BACKEND_DIR, "datagen.py"), database]
+    for option, value in options.items():
+        command += [f"--{option.replace('_', '-')}", str(value)]
+    env = dict(os.environ, ARCHIVE_INTERVAL_SECONDS="0", GLOBAL_STATS_RECONCILE_SECONDS="0")
+    output = subprocess.run(command, env=env, cwd=BACKEND_DIR, check=True,
+                            capture_output=True, text=True).stdout
+    return output.strip().splitlines()[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("database", help="database file to create or add to")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--teams", type=int, default=16, help="tournament teams, on top of the defaults")
+    parser.add_argument("--matches", type=int, default=100)
+    parser.add_argument("--balls", type=int, help="keep adding matches until this many deliveries exist")
+    parser.add_argument("--t20-share", type=float, default=0.7, help="fraction of matches that are T20")
+    parser.add_argument("--live", type=int, default=0, help="matches (the last ones) left in progress")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=date(2015, 1, 1))
+    parser.add_argument("--matches-per-day", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_FILE"] = os.path.abspath(args.database)
+    # Per-statement timing would cost more than the inserts it times
+    os.environ.setdefault("METRICS_ENABLED", "0")
+    sys.path.insert(0, BACKEND_DIR)
+    import server
+
+    started = time.perf_counter()
+    with server.get_db() as conn:
+        # A throwaway dataset can be rebuilt, so trade durability for load speed
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA cache_size=-262144")
+        cursor = conn.cursor()
+        counts = populate(cursor, users=args.users, teams=args.teams, matches=args.matches,
+                          balls=args.balls, t20_share=args.t20_share, live=args.live,
+                          start_date=args.start_date, matches_per_day=args.matches_per_day,
+                          seed=args.seed, commit=conn.commit)
+        conn.commit()
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{server.SQLITE_CACHE_SIZE_KB}")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    elapsed = time.perf_counter() - started
+    print(f"{counts['users']} users, {counts['teams']} tournament teams, {counts['matches']} matches, "
+          f"{counts['balls']} balls in {elapsed:.1f} s ({counts['balls'] / max(elapsed, 1e-9):,.0f} balls/s)"
+          f" -> {args.database}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Compact binary archive of a completed match.
+
+Layout (all integers little-endian):
+
+    b"CKAR"  u8 version  u8 flags        flags bit 0: body is zlib-compressed
+    body:
+        u32 length + JSON      match row, teams with rosters, match state
+        u32 ball count
+        string table           u32 count, then per string: u32 length + UTF-8
+        columns, in BALL_COLUMNS order
+
+Every ball column is stored whole, one after another. Integer columns are
+packed into the narrowest array type that holds their values; text columns
+are indexes into the shared string table (0 meaning NULL), so a player name
+is stored once however many balls reference it. Ball ids that are all
+canonical UUIDs are kept as 16 raw bytes each, and SQLite timestamps as
+second offsets from the first one. Either falls back to string references
+when a value does not fit.
+
+Several archives can travel in one body as a bundle (see pack_archive_bundle).
+"""
+
+import json
+import struct
+import sys
+import uuid
+import zlib
+from array import array
+from datetime import datetime, timezone
+
+MAGIC = b"CKAR"
+FORMAT_VERSION = 1
+FLAG_COMPRESSED = 0x01
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# (column, kind) in storage order; match_id and player ids are not archived
+BALL_COLUMNS = (
+    ("id", "id"),
+    ("innings", "int"),
+    ("over_number", "int"),
+    ("ball_number", "int"),
+    ("legal_ball_number", "int"),
+    ("batsman", "str"),
+    ("bowler", "str"),
+    ("runs", "int"),
+    ("extras", "int"),
+    ("extras_type", "str"),
+    ("wicket", "int"),
+    ("wicket_type", "str"),
+    ("wicket_player", "str"),
+    ("commentary", "str"),
+    ("created_at", "time"),
+    ("seq", "int"),
+)
+
+# Column encodings
+ENCODING_INTS = 0
+ENCODING_STRINGS = 1
+ENCODING_UUIDS = 2
+ENCODING_TIMESTAMPS = 3
+
+INT_TYPECODES = (("B", 0, 0xFF), ("H", 0, 0xFFFF), ("I", 0, 0xFFFFFFFF), ("q", -(2 ** 63), 2 ** 63 - 1))
+
+
+class ArchiveError(ValueError):
+    """Raised for data that is not a readable match archive"""
+
+
+def _pack_array(values, typecode: str) -> bytes:
+    packed = array(typecode, values)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack_array(data: bytes, typecode: str) -> list:
+    unpacked = array(typecode)
+    unpacked.frombytes(data)
+    if sys.byteorder != "little":
+        unpacked.byteswap()
+    return unpacked.tolist()
+
+
+def _int_column(values) -> bytes:
+    low, high = min(values, default=0), max(values, default=0)
+    typecode = next(code for code, lowest, highest in INT_TYPECODES if lowest <= low and high <= highest)
+    body = _pack_array(values, typecode)
+    return struct.pack("<BcI", ENCODING_INTS, typecode.encode(), len(body)) + body
+
+
+class _StringTable:
+    def __init__(self):
+        self.strings = []
+        self.index = {}
+
+    def ref(self, value) -> int:
+        if value is None:
+            return 0
+        value = str(value)
+        ref = self.index.get(value)
+        if ref is None:
+            self.strings.append(value)
+            ref = self.index[value] = len(self.strings)
+        return ref
+
+    def encode(self) -> bytes:
+        parts = [struct.pack("<I", len(self.strings))]
+        for value in self.strings:
+            raw = value.encode("utf-8")
+            parts.append(struct.pack("<I", len(raw)))
+            parts.append(raw)
+        return b"".join(parts)
+
+
+def _string_column(values, strings: _StringTable) -> bytes:
+    column = _int_column([strings.ref(value) for value in values])
+    return bytes([ENCODING_STRINGS]) + column[1:]
+
+
+def _id_column(values, strings: _StringTable) -> bytes:
+    try:
+        raw = [uuid.UUID(value) for value in values]
+    except (TypeError, ValueError, AttributeError):
+        raw = None
+    # Only canonical ids survive the round trip through 16 bytes unchanged
+    if raw is not None and all(str(parsed) == value for parsed, value in zip(raw, values)):
+        body = b"".join(parsed.bytes for parsed in raw)
+        return struct.pack("<BcI", ENCODING_UUIDS, b"x", len(body)) + body
+    return _string_column(values, strings)
+
+
+def _time_column(values, strings: _StringTable) -> bytes:
+    try:
+        seconds = [
+            int(datetime.strptime(value, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc).timestamp())
+            for value in values
+        ]
+    except (TypeError, ValueError):
+        return _string_column(values, strings)
+    base = min(seconds, default=0)
+    column = _int_column([value - base for value in seconds])
+    return struct.pack("<Bq", ENCODING_TIMESTAMPS, base) + column[1:]
+
+
+def encode_match_archive(match: dict, teams: list, state, balls: list, compress: bool = True) -> bytes:
+    """Serialize a match and its balls (dicts with BALL_COLUMNS keys, in scoring order)"""
+    header = json.dumps({"match": match, "teams": teams, "state": state},
+                        separators=(",", ":")).encode("utf-8")
+    strings = _StringTable()
+    columns = []
+    for name, kind in BALL_COLUMNS:
+        values = [ball[name] for ball in balls]
+        if kind == "int":
+            columns.append(_int_column([int(value or 0) for value in values]))
+        elif kind == "id":
+            columns.append(_id_column(values, strings))
+        elif kind == "time":
+            columns.append(_time_column(values, strings))
+        else:
+            columns.append(_string_column(values, strings))
+
+    body = b"".join([
+        struct.pack("<I", len(header)), header,
+        struct.pack("<I", len(balls)),
+        strings.encode(),
+        *columns,
+    ])
+    flags = 0
+    if compress:
+        body = zlib.compress(body, 6)
+        flags |= FLAG_COMPRESSED
+    return MAGIC + struct.pack("<BB", FORMAT_VERSION, flags) + body
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offset = 0
+
+    def take(self, size: int) -> bytes:
+        if self.offset + size > len(self.data):
+            raise ArchiveError("Archive is truncated")
+        chunk = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return chunk
+
+    def unpack(self, fmt: str):
+        return struct.unpack(fmt, self.take(struct.calcsize(fmt)))
+
+
+def _read_column(reader: _Reader, count: int, strings: list) -> list:
+    (encoding,) = reader.unpack("<B")
+    base = None
+    if encoding == ENCODING_TIMESTAMPS:
+        (base,) = reader.unpack("<q")
+    typecode, length = reader.unpack("<cI")
+    body = reader.take(length)
+
+    if encoding == ENCODING_UUIDS:
+        if length != 16 * count:
+            raise ArchiveError("Corrupt id column")
+        return [str(uuid.UUID(bytes=body[i:i + 16])) for i in range(0, length, 16)]
+
+    try:
+        values = _unpack_array(body, typecode.decode())
+    except ValueError:
+        raise ArchiveError("Corrupt column")
+    if len(values) != count:
+        raise ArchiveError("Column length does not match the ball count")
+    if encoding == ENCODING_INTS:
+        return values
+    if encoding == ENCODING_TIMESTAMPS:
+        return [datetime.fromtimestamp(base + value, timezone.utc).strftime(TIMESTAMP_FORMAT)
+                for value in values]
+    if encoding == ENCODING_STRINGS:
+        try:
+            return [strings[ref - 1] if ref else None for ref in values]
+        except IndexError:
+            raise ArchiveError("String reference out of range")
+    raise ArchiveError(f"Unknown column encoding {encoding}")
+
+
+def decode_match_archive(data: bytes) -> dict:
+    """Inverse of encode_match_archive: {"match", "teams", "state", "balls"}"""
+    if data[:4] != MAGIC or len(data) < 6:
+        raise ArchiveError("Not a match archive")
+    version, flags = struct.unpack("<BB", data[4:6])
+    if version != FORMAT_VERSION:
+        raise ArchiveError(f"Unsupported archive version {version}")
+    body = data[6:]
+    if flags & FLAG_COMPRESSED:
+        try:
+            body = zlib.decompress(body)
+        except zlib.error:
+            raise ArchiveError("Archive body is not valid zlib data")
+
+    reader = _Reader(body)
+    (header_length,) = reader.unpack("<I")
+    try:
+        header = json.loads(reader.take(header_length))
+    except ValueError:
+        raise ArchiveError("Archive header is not valid JSON")
+    (count,) = reader.unpack("<I")
+    (string_count,) = reader.unpack("<I")
+    strings = []
+    for _ in range(string_count):
+        (length,) = reader.unpack("<I")
+        strings.append(reader.take(length).decode("utf-8"))
+
+    columns = {name: _read_column(reader, count, strings) for name, _ in BALL_COLUMNS}
+    names = [name for name, _ in BALL_COLUMNS]
+    balls = [dict(zip(names, row)) for row in zip(*(columns[name] for name in names))]
+    return {"match": header["match"], "teams": header["teams"], "state": header["state"],
+            "balls": balls}
+
+
+BUNDLE_MAGIC = b"CKAB"
+
+
+def pack_archive_bundle(archives) -> bytes:
+    """Several archives in one body: b"CKAB", u32 count, then u32 length + archive each"""
+    archives = list(archives)
+    parts = [BUNDLE_MAGIC, struct.pack("<I", len(archives))]
+    for archive in archives:
+        parts.append(struct.pack("<I", len(archive)))
+        parts.append(archive)
+    return b"".join(parts)
+
+
+def split_archives(data: bytes) -> list:
+    """The archives in a bundle, or [data] for a single archive"""
+    if data[:4] != BUNDLE_MAGIC:
+        return [data]
+    reader = _Reader(data)
+    reader.take(4)
+    (count,) = reader.unpack("<I")
+    archives = []
+    for _ in range(count):
+        (length,) = reader.unpack("<I")
+        archives.append(reader.take(length))
+    return archives
@@ -0,0 +1,469 @@
+"""
+Request and SQL metrics in the Prometheus text exposition format.
+
+No client library: counters, gauges and histograms are small locked dicts
+keyed by label values, rendered on scrape by MetricsRegistry.render().
+
+MetricsMiddleware records, per method and route template, request latency,
+response size, status codes and requests in flight. SQL is timed by
+InstrumentedConnection, whose cursors time every statement and fetch and
+count the rows fetched. Each request carries a RequestSample
+in a context variable, so SQL, connection checkout and JSON encoding time
+are attributed to the route that spent it:
+
+    sql_metrics = InstrumentedConnection.sql_metrics = SQLMetrics(registry)
+    conn = sqlite3.connect(path, factory=InstrumentedConnection)
+    app.add_middleware(MetricsMiddleware, metrics=HTTPMetrics(registry),
+                       sql_metrics=sql_metrics, routes=lambda: app.routes)
+"""
+
+import bisect
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152)
+
+# Statements are labelled by their leading keyword; anything else is "other"
+STATEMENT_KINDS = frozenset(("select", "insert", "update", "delete", "with", "begin",
+                             "pragma", "create", "alter", "drop", "attach", "detach"))
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Series keyed by label values. Metrics updated together may share a
+    lock, so one acquisition covers them all (see HTTPMetrics.record)."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (),
+                 lock: Optional[threading.Lock] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = lock if lock is not None else threading.Lock()
+        self._values = {}
+
+    def samples(self) -> list:
+        """(suffix, label values, extra label, value) for every series"""
+        with self._lock:
+            return [("", labels, "", value) for labels, value in self._values.items()]
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{format_labels(self.labelnames, labels, extra)} "
+                         f"{format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, labels: tuple = ()):
+        with self._lock:
+            self._add(amount, labels)
+
+    def inc_many(self, increments):
+        """(amount, labels) pairs under one lock"""
+        if increments:
+            with self._lock:
+                for amount, labels in increments:
+                    self._add(amount, labels)
+
+    def _add(self, amount, labels: tuple):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount=1, labels: tuple = ()):
+        self.inc(-amount, labels)
+
+    def set(self, value, labels: tuple = ()):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (),
+                 buckets: tuple = LATENCY_BUCKETS, lock: Optional[threading.Lock] = None):
+        super().__init__(name, documentation, labelnames, lock)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels: tuple = ()):
+        with self._lock:
+            self._observe(value, labels)
+
+    def observe_many(self, observations):
+        """(value, labels) pairs under one lock"""
+        if observations:
+            with self._lock:
+                for value, labels in observations:
+                    self._observe(value, labels)
+
+    def _observe(self, value, labels: tuple):
+        series = self._values.get(labels)
+        if series is None:
+            # Per-bucket (not cumulative) counts, then sum; cumulated on render
+            series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self) -> list:
+        with self._lock:
+            snapshot = [(labels, list(series)) for labels, series in self._values.items()]
+        samples = []
+        for labels, series in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                le = bound if bound == "+Inf" else format_value(float(bound))
+                samples.append(("_bucket", labels, f'le="{le}"', cumulative))
+            samples.append(("_sum", labels, "", series[-1]))
+            samples.append(("_count", labels, "", cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """Named metrics plus callbacks that refresh gauges just before a scrape"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = (),
+                lock: Optional[threading.Lock] = None) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, lock))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = (),
+              lock: Optional[threading.Lock] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, lock))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (),
+                  buckets: tuple = LATENCY_BUCKETS, lock: Optional[threading.Lock] = None) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets, lock))
+
+    def on_scrape(self, collect):
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        for collect in self._collectors:
+            collect()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class RequestSample:
+    """Time one request spent in each phase, filled in by whoever does the work.
+
+    SQL timings are buffered here without locking and handed to SQLMetrics
+    in one go when the request ends, or when the buffer fills on a stream.
+    """
+
+    __slots__ = ("db_acquire", "sql", "json_encode", "statements", "sql_metrics", "pending")
+
+    FLUSH_AT = 256
+
+    def __init__(self, sql_metrics: Optional["SQLMetrics"] = None):
+        self.db_acquire = 0.0
+        self.sql = 0.0
+        self.json_encode = 0.0
+        self.statements = 0
+        self.sql_metrics = sql_metrics
+        self.pending = []
+
+    def add_sql(self, kind: str, seconds: float, rows: Optional[int]):
+        """A statement (rows is None) or a fetch of `rows` rows"""
+        self.sql += seconds
+        if rows is None:
+            self.statements += 1
+        self.pending.append((kind, seconds, rows))
+        if len(self.pending) >= self.FLUSH_AT:
+            self.flush()
+
+    def flush(self):
+        pending, self.pending = self.pending, []
+        if pending and self.sql_metrics is not None:
+            self.sql_metrics.record_many(pending)
+
+
+request_sample: ContextVar[Optional[RequestSample]] = ContextVar("request_sample", default=None)
+
+# SQL text of every statement the request runs, when a debug middleware asks for it
+statement_log: ContextVar[Optional[list]] = ContextVar("statement_log", default=None)
+
+
+def add_db_acquire_time(seconds: float):
+    sample = request_sample.get()
+    if sample is not None:
+        sample.db_acquire += seconds
+
+
+def add_json_encode_time(seconds: float):
+    sample = request_sample.get()
+    if sample is not None:
+        sample.json_encode += seconds
+
+
+# Statement text -> kind; SQL in this app is a bounded set of literals
+_statement_kinds = {}
+
+
+def statement_kind(sql: str) -> str:
+    kind = _statement_kinds.get(sql)
+    if kind is None:
+        words = sql.split(None, 1)
+        kind = words[0].lower() if words and words[0].lower() in STATEMENT_KINDS else "other"
+        if len(_statement_kinds) < 4096:
+            _statement_kinds[sql] = kind
+    return kind
+
+
+class SQLMetrics:
+    """Statement latency histogram, fetch time and rows fetched, all by statement kind"""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.duration = registry.histogram(
+            "cricklytics_sql_statement_duration_seconds",
+            "SQLite execute/executemany time, commits included", ("statement",), SQL_BUCKETS)
+        self.fetch = registry.counter(
+            "cricklytics_sql_fetch_seconds_total", "Time fetching rows from SQLite", ("statement",))
+        self.rows = registry.counter(
+            "cricklytics_sql_rows_fetched_total", "Rows fetched from SQLite", ("statement",))
+
+    def record(self, kind: str, seconds: float, rows: Optional[int] = None):
+        """Record one statement or fetch straight away, as work outside a request does"""
+        self.record_many(((kind, seconds, rows),))
+
+    def record_many(self, timings):
+        """(kind, seconds, rows) per statement (rows None) or fetch"""
+        statements, fetches, fetched = [], [], []
+        for kind, seconds, rows in timings:
+            if rows is None:
+                statements.append((seconds, (kind,)))
+            else:
+                fetches.append((seconds, (kind,)))
+                if rows:
+                    fetched.append((rows, (kind,)))
+        self.duration.observe_many(statements)
+        self.fetch.inc_many(fetches)
+        self.rows.inc_many(fetched)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor timing each statement and fetch into the request's sample.
+
+    SQLite steps most SELECTs while rows are fetched, so fetch time is kept
+    apart, under the kind of the statement that produced the rows; both count
+    toward the request's SQL time. Rows read by iterating the cursor are not
+    counted.
+    """
+
+    _kind = "other"
+
+    def execute(self, sql, parameters=()):
+        self._kind = statement_kind(sql)
+        log = statement_log.get()
+        if log is not None:
+            log.append(sql)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._record(time.perf_counter() - started, None)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._kind = statement_kind(sql)
+        log = statement_log.get()
+        if log is not None:
+            log.append(sql)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._record(time.perf_counter() - started, None)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._record(time.perf_counter() - started, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._record(time.perf_counter() - started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._record(time.perf_counter() - started, len(rows))
+        return rows
+
+    def _record(self, seconds: float, rows: Optional[int]):
+        sample = request_sample.get()
+        if sample is not None:
+            sample.add_sql(self._kind, seconds, rows)
+        elif self.connection.sql_metrics is not None:
+            self.connection.sql_metrics.record(self._kind, seconds, rows)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors (and execute shortcuts) are InstrumentedCursors.
+
+    sql_metrics, set once on the class, receives timings from outside requests.
+    """
+
+    sql_metrics: Optional[SQLMetrics] = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # The C shortcuts open a plain cursor, bypassing cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        started = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            seconds = time.perf_counter() - started
+            sample = request_sample.get()
+            if sample is not None:
+                sample.add_sql("commit", seconds, None)
+            elif self.sql_metrics is not None:
+                self.sql_metrics.record("commit", seconds)
+
+
+class HTTPMetrics:
+    """Per-route request metrics; routes are labelled by template, never by raw path"""
+
+    def __init__(self, registry: MetricsRegistry):
+        lock = threading.Lock()
+        self.requests = registry.counter(
+            "cricklytics_http_requests_total", "Requests by status code",
+            ("method", "route", "status"), lock)
+        self.duration = registry.histogram(
+            "cricklytics_http_request_duration_seconds", "Request latency, response sent",
+            ("method", "route"), LATENCY_BUCKETS, lock)
+        self.size = registry.histogram(
+            "cricklytics_http_response_size_bytes", "Response body bytes on the wire",
+            ("method", "route"), SIZE_BUCKETS, lock)
+        self.in_flight = registry.gauge(
+            "cricklytics_http_requests_in_flight", "Requests being served", ("method",))
+        self.phases = registry.counter(
+            "cricklytics_http_request_phase_seconds_total",
+            "Request time by phase; 'other' is the rest (Python work, framework, I/O)",
+            ("method", "route", "phase"), lock)
+        self.statements = registry.counter(
+            "cricklytics_http_request_sql_statements_total", "SQL statements run for requests",
+            ("method", "route"), lock)
+        self._lock = lock
+
+    def record(self, method: str, route: str, status: int, seconds: float, size: int,
+               sample: RequestSample):
+        labels = (method, route)
+        other = seconds - sample.db_acquire - sample.sql - sample.json_encode
+        with self._lock:
+            self.requests._add(1, (method, route, str(status)))
+            self.duration._observe(seconds, labels)
+            self.size._observe(size, labels)
+            self.phases._add(max(other, 0.0), (method, route, "other"))
+            if sample.db_acquire:
+                self.phases._add(sample.db_acquire, (method, route, "db_acquire"))
+            if sample.sql:
+                self.phases._add(sample.sql, (method, route, "sql"))
+                self.statements._add(sample.statements, labels)
+            if sample.json_encode:
+                self.phases._add(sample.json_encode, (method, route, "json_encode"))
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware; outermost, so sizes and latency are what clients see.
+
+    routes() returns the app's routes; the route template is looked up from
+    the endpoint the router matched, and unmatched paths share one label.
+    SQL timed during a request reaches sql_metrics when the request ends.
+    """
+
+    def __init__(self, app, metrics: HTTPMetrics, sql_metrics: SQLMetrics, routes):
+        self.app = app
+        self.metrics = metrics
+        self.sql_metrics = sql_metrics
+        self.routes = routes
+        self._templates = {}
+
+    def route_of(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        template = self._templates.get(endpoint)
+        if template is None:
+            templates = {getattr(route, "endpoint", None): route.path
+                         for route in self.routes() if hasattr(route, "path")}
+            template = templates.setdefault(endpoint, "unmatched")
+            self._templates = templates
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        size = 0
+
+        async def send_measured(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        sample = RequestSample(self.sql_metrics)
+        token = request_sample.set(sample)
+        self.metrics.in_flight.inc(1, (method,))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_measured)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.metrics.in_flight.dec(1, (method,))
+            request_sample.reset(token)
+            sample.flush()
+            self.metrics.record(method, self.route_of(scope), status_code, elapsed, size, sample)
@@ -0,0 +1,130 @@
+"""
+Password hashing off the request path.
+
+bcrypt is deliberately slow, so hashing and verification run on a small
+dedicated process pool instead of the threadpool that serves every sync
+endpoint. The pool has a bounded backlog: once it is full, new work is refused
+straight away with PasswordHasherBusy rather than queued behind a burst.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+
+def _hash_password(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _check_password(password: bytes, password_hash: bytes) -> bool:
+    return bcrypt.checkpw(password, password_hash)
+
+
+def _exit_with_parent(parent_pid: int):
+    """Worker initializer: leave on our own once the server process is gone.
+
+    The server shuts the pool down on a clean stop, but SIGKILL or the OOM
+    killer skip that, and a worker would then wait forever on the call
+    queue: it holds the queue's write end itself, so it never sees EOF.
+    """
+    def watch():
+        while os.getppid() == parent_pid:
+            time.sleep(1)
+        os._exit(0)
+
+    threading.Thread(target=watch, name="parent-watch", daemon=True).start()
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing backlog is full"""
+
+
+class PasswordHasher:
+    """Bounded, lazily started process pool for bcrypt work"""
+
+    def __init__(self, workers: int, max_pending: int, rounds: int):
+        self.workers = max(workers, 1)
+        self.max_pending = max(max_pending, 1)
+        self.rounds = rounds
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._pending = 0
+        self._rejected = 0
+        self._completed = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # A forked server worker must not reuse its parent's pool
+        if self._executor is None or self._pid != os.getpid():
+            # spawn: the server process already runs threads, which fork does not survive
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_exit_with_parent,
+                initargs=(os.getpid(),),
+            )
+            self._pid = os.getpid()
+        return self._executor
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise PasswordHasherBusy()
+            self._pending += 1
+            executor = self._get_executor()
+
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        # A cancelled caller does not free the worker it started, so the slot
+        # is only given back when the work itself is done (or never started)
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next request
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+            if future is not None and not future.cancelled():
+                self._completed += 1
+
+    async def hash(self, password: str) -> str:
+        password_hash = await self._run(_hash_password, password.encode('utf-8'), self.rounds)
+        return password_hash.decode('utf-8')
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self._run(_check_password, password.encode('utf-8'),
+                               password_hash.encode('utf-8'))
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "rounds": self.rounds,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "started": self._executor is not None,
+            }
@@ -0,0 +1,127 @@
+"""
+Per-request SQL query budgets and repeated-statement (N+1) detection.
+
+A development and CI aid, off in production. Routes declare how many
+statements they may run:
+
+    @app.get("/api/teams")
+    @query_budget(3)
+    def get_user_teams(...):
+
+QueryBudgetMiddleware collects the SQL of every statement a request runs
+(through metrics.statement_log, filled by the instrumented cursor) and,
+when the response starts:
+
+  * adds X-Query-Count, and X-Query-Repeats counting the statement shapes
+    run repeat_threshold or more times, the usual sign of a query in a loop;
+  * logs a warning for repeats and for a route over its budget;
+  * in "raise" mode, replaces an over-budget response with a 500 that
+    lists the budget and the statements run, so tests fail.
+
+PRAGMAs are not counted: they are connection setup, run when the pool
+opens a connection, not work the route asked for. Statements a streaming
+response runs after it has started are not seen.
+"""
+
+import logging
+import re
+from collections import Counter
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+
+from metrics import statement_kind, statement_log
+
+logger = logging.getLogger("cricklytics.queries")
+
+MODES = ("off", "warn", "raise")
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def query_budget(limit: int):
+    """Declare the most SQL statements one request to the decorated route may run"""
+    def declare(endpoint):
+        endpoint.query_budget = limit
+        return endpoint
+    return declare
+
+
+def statement_shape(sql: str) -> str:
+    """SQL with literals and placeholder lists folded, so repeats of a query match"""
+    shape = _LITERALS.sub("?", sql)
+    shape = _PLACEHOLDER_LISTS.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def shape_counts(statements: list) -> Counter:
+    return Counter(statement_shape(sql) for sql in statements)
+
+
+class QueryBudgetMiddleware:
+    """Pure ASGI middleware; see the module docstring for what it reports"""
+
+    def __init__(self, app, mode: str = "warn", repeat_threshold: int = 5):
+        if mode not in MODES:
+            raise ValueError(f"query budget mode must be one of {MODES}, not {mode!r}")
+        self.app = app
+        self.mode = mode
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.mode == "off":
+            await self.app(scope, receive, send)
+            return
+
+        statements = []
+        replaced = False
+
+        async def send_checked(message):
+            nonlocal replaced
+            if replaced:
+                return
+            if message["type"] == "http.response.start":
+                counted = [sql for sql in statements if statement_kind(sql) != "pragma"]
+                violation = self.check(scope, counted, message)
+                if violation is not None and self.mode == "raise":
+                    replaced = True
+                    body = violation.encode("utf-8")
+                    await send({"type": "http.response.start", "status": 500, "headers": [
+                        (b"content-type", b"text/plain; charset=utf-8"),
+                        (b"content-length", str(len(body)).encode()),
+                        (b"x-query-count", str(len(counted)).encode()),
+                    ]})
+                    await send({"type": "http.response.body", "body": body})
+                    return
+            await send(message)
+
+        token = statement_log.set(statements)
+        try:
+            await self.app(scope, receive, send_checked)
+        finally:
+            statement_log.reset(token)
+
+    def check(self, scope, statements: list, start) -> Optional[str]:
+        """Annotate the response start; returns the budget violation, if any"""
+        endpoint = scope.get("endpoint")
+        route = f"{scope['method']} {scope['path']}"
+        budget = getattr(endpoint, "query_budget", None)
+        counts = shape_counts(statements)
+        repeated = {shape: count for shape, count in counts.most_common()
+                    if count >= self.repeat_threshold}
+
+        headers = MutableHeaders(scope=start)
+        headers["X-Query-Count"] = str(len(statements))
+        if repeated:
+            headers["X-Query-Repeats"] = str(len(repeated))
+            for shape, count in repeated.items():
+                logger.warning("Statement ran %d times in %s: %s", count, route, shape)
+
+        if budget is None or len(statements) <= budget:
+            return None
+        violation = (f"{route} ran {len(statements)} SQL statements, over its budget of {budget}"
+                     + "".join(f"\n  {count} x {shape}" for shape, count in counts.most_common()))
+        logger.warning(violation)
+        return violation
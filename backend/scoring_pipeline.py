@@ -0,0 +1,316 @@
+"""
+Write-ahead scoring pipeline with group commit.
+
+Accepted deliveries are appended to a journal file and queued in memory; a
+single writer thread drains the queue every few milliseconds and hands each
+group to a flush callback that commits it to SQLite in one transaction. On
+start the journal is replayed, so anything acknowledged but not yet committed
+when the process died is written on the next boot. Entries carry their ball
+id, which makes replaying an already committed entry a no-op.
+
+Durability modes:
+    flush    the caller waits for the group commit holding its ball
+    enqueue  the caller is answered once the ball is journaled and queued
+
+Balls are validated against the database before they are queued. The
+on_replay and on_done hooks tell the owner which entries are queued and
+which have settled, so it can serve queued balls to readers before their
+group commits.
+A ball that was acknowledged before its commit and then fails to commit (a
+replayed entry, or any ball in enqueue mode) has nobody left to tell, so it
+is appended to a dead-letter file next to the journal and counted.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger("cricklytics")
+
+DURABILITY_FLUSH = "flush"
+DURABILITY_ENQUEUE = "enqueue"
+DURABILITY_MODES = (DURABILITY_FLUSH, DURABILITY_ENQUEUE)
+
+
+class PipelineEntry:
+    __slots__ = ("match_id", "ball", "future", "number")
+
+    def __init__(self, match_id: str, ball: dict, future=None):
+        self.match_id = match_id
+        self.ball = ball
+        self.future = future
+        self.number = 0
+
+
+class ScoringPipeline:
+    """Journal, in-memory queue and the single writer thread that drains it.
+
+    flush_group(entries) runs on the writer thread and must commit the group
+    atomically, returning one outcome per entry: a result, or an exception to
+    hand to that entry's waiter. A result whose "status" is "rejected" was not
+    written either. If flush_group raises, nothing is assumed committed:
+    one of retry_errors (by default sqlite3.OperationalError, a busy or
+    locked database) retries the group,
+    and any other error has the group committed again one entry at a time,
+    so only the entry that fails is failed.
+
+    on_replay(entries) is called from start() with the journal entries queued
+    for replay, before the writer runs. on_done(entries) is called on the
+    writer thread once a group is settled, committed or failed for good, but
+    not when it is put back for a retry.
+    """
+
+    def __init__(self, journal_path: str, flush_group, durability: str = DURABILITY_FLUSH,
+                 interval: float = 0.005, max_group: int = 500, fsync: bool = False,
+                 dead_letter_path: Optional[str] = None, on_replay=None, on_done=None,
+                 retry_errors: tuple = (sqlite3.OperationalError,)):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown scoring durability {durability!r}")
+        self.journal_path = journal_path
+        self.dead_letter_path = dead_letter_path or journal_path + ".dead"
+        self.flush_group = flush_group
+        self.durability = durability
+        self.interval = interval
+        self.max_group = max_group
+        self.fsync = fsync
+        self.on_replay = on_replay
+        self.on_done = on_done
+        self.retry_errors = retry_errors
+
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._journal = None
+        self._thread = None
+        self._stopping = False
+        # Entries are numbered on submit; `_done` is the highest number the
+        # writer has finished, so waiters can tell when earlier work is in
+        self._submitted = 0
+        self._done = 0
+        self._groups = 0
+        self._flushed = 0
+        self._failed_groups = 0
+        self._replayed = 0
+        self._dead_lettered = 0
+        # Entries still to be committed on their own after a group failed
+        self._isolating = 0
+
+    # Lifecycle
+
+    def start(self):
+        journal = open(self.journal_path, "a+b")
+        if fcntl is not None:
+            try:
+                fcntl.flock(journal.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                journal.close()
+                raise RuntimeError(
+                    f"Scoring journal {self.journal_path} is held by another process; "
+                    "pipeline scoring needs a single server process"
+                )
+        self._journal = journal
+
+        replayed = list(self._read_journal())
+        with self._cond:
+            for entry in replayed:
+                self._enqueue(entry)
+            self._replayed += len(replayed)
+        if replayed:
+            logger.info("Replaying %s journaled deliveries", len(replayed))
+            self._notify(self.on_replay, replayed)
+
+        self._thread = threading.Thread(target=self._run, name="scoring-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Flush what is queued, then stop the writer and release the journal"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def _read_journal(self):
+        self._journal.seek(0)
+        for line in self._journal:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A torn final line from a crash mid-append was never acknowledged
+                logger.warning("Skipping unreadable scoring journal line")
+                continue
+            yield PipelineEntry(record["match_id"], record["ball"])
+
+    # Producers
+
+    def submit(self, match_id: str, balls) -> list:
+        """Journal and queue deliveries for one match, returning a Future per ball"""
+        entries = [PipelineEntry(match_id, ball, Future()) for ball in balls]
+        payload = b"".join(
+            json.dumps({"match_id": match_id, "ball": entry.ball}).encode() + b"\n"
+            for entry in entries
+        )
+        with self._cond:
+            if self._stopping or self._journal is None:
+                raise RuntimeError("Scoring pipeline is not running")
+            self._journal.write(payload)
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+            for entry in entries:
+                self._enqueue(entry)
+            self._cond.notify_all()
+        return [entry.future for entry in entries]
+
+    def _enqueue(self, entry: PipelineEntry):
+        self._submitted += 1
+        entry.number = self._submitted
+        self._queue.append(entry)
+
+    def wait_flushed(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything submitted so far has been written"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            target = self._submitted
+            while self._done < target:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def pending(self, match_id: Optional[str] = None) -> int:
+        with self._cond:
+            if match_id is None:
+                return len(self._queue)
+            return sum(1 for entry in self._queue if entry.match_id == match_id)
+
+    # Writer
+
+    def _run(self):
+        backoff = self.interval
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopping:
+                    self._cond.wait()
+                if not self._queue and self._stopping:
+                    return
+            # Let concurrent submitters join this group
+            if not self._stopping:
+                time.sleep(self.interval)
+
+            with self._cond:
+                size = 1 if self._isolating else self.max_group
+                group = [self._queue.popleft() for _ in range(min(size, len(self._queue)))]
+
+            try:
+                outcomes = self.flush_group(group)
+            except self.retry_errors:
+                logger.exception("Scoring group commit failed; retrying %s deliveries", len(group))
+                with self._cond:
+                    self._failed_groups += 1
+                    self._queue.extendleft(reversed(group))
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 1.0)
+                continue
+            except Exception as error:
+                with self._cond:
+                    self._failed_groups += 1
+                    if len(group) > 1:
+                        logger.exception("Scoring group commit failed; committing its %s deliveries "
+                                         "one at a time", len(group))
+                        self._queue.extendleft(reversed(group))
+                        self._isolating = len(group)
+                        continue
+                logger.exception("Scoring delivery for match %s cannot be committed", group[0].match_id)
+                outcomes = [error]
+            backoff = self.interval
+
+            dead = []
+            for entry, outcome in zip(group, outcomes):
+                if isinstance(outcome, BaseException):
+                    failure = str(outcome.detail if hasattr(outcome, "detail") else outcome)
+                elif isinstance(outcome, dict) and outcome.get("status") == "rejected":
+                    failure = str(outcome.get("detail"))
+                else:
+                    failure = None
+                if failure is not None and (entry.future is None or self.durability == DURABILITY_ENQUEUE):
+                    dead.append((entry, failure))
+                if entry.future is None:
+                    continue
+                if isinstance(outcome, BaseException):
+                    entry.future.set_exception(outcome)
+                else:
+                    entry.future.set_result(outcome)
+            if dead:
+                self._dead_letter(dead)
+            self._notify(self.on_done, group)
+
+            with self._cond:
+                if self._isolating:
+                    self._isolating -= len(group)
+                self._groups += 1
+                self._flushed += len(group)
+                self._done = group[-1].number
+                # Everything journaled is now in SQLite, so the journal can restart
+                if not self._queue and self._done == self._submitted:
+                    self._journal.truncate(0)
+                self._cond.notify_all()
+
+    def _notify(self, hook, entries):
+        # A failing hook must not stop the writer or lose the journal
+        if hook is None:
+            return
+        try:
+            hook(entries)
+        except Exception:
+            logger.exception("Scoring pipeline hook %s failed", getattr(hook, "__name__", hook))
+
+    def _dead_letter(self, dead):
+        """Keep acknowledged deliveries that failed to commit, before the journal can drop them"""
+        failed_at = datetime.now(timezone.utc).isoformat()
+        payload = b"".join(
+            json.dumps({"match_id": entry.match_id, "ball": entry.ball, "error": failure,
+                        "failed_at": failed_at}).encode() + b"\n"
+            for entry, failure in dead
+        )
+        with open(self.dead_letter_path, "ab") as dead_letters:
+            dead_letters.write(payload)
+            dead_letters.flush()
+            if self.fsync:
+                os.fsync(dead_letters.fileno())
+        for entry, failure in dead:
+            logger.error("Acknowledged delivery %s for match %s failed to commit (%s); kept in %s",
+                         entry.ball.get("id"), entry.match_id, failure, self.dead_letter_path)
+        with self._cond:
+            self._dead_lettered += len(dead)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "durability": self.durability,
+                "interval_ms": self.interval * 1000,
+                "max_group": self.max_group,
+                "queued": len(self._queue),
+                "submitted": self._submitted,
+                "flushed": self._flushed,
+                "groups": self._groups,
+                "failed_groups": self._failed_groups,
+                "replayed": self._replayed,
+                "dead_lettered": self._dead_lettered,
+                "running": self._thread is not None and self._thread.is_alive(),
+            }
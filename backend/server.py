@@ -1,16 +1,56 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Query, status, Request, BackgroundTasks
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, NamedTuple
 import sqlite3
-import bcrypt
 import jwt
 from datetime import datetime, timedelta
+import asyncio
+import base64
 import json
 import uuid
 import os
-from contextlib import contextmanager
+import logging
+import math
+import re
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+
+from async_db import AsyncDatabase
+from compression import CompressedBodyCache, CompressionMiddleware
+from match_archive import ArchiveError, decode_match_archive, encode_match_archive, split_archives
+from metrics import (
+    HTTPMetrics,
+    InstrumentedConnection,
+    MetricsMiddleware,
+    MetricsRegistry,
+    SQLMetrics,
+    add_db_acquire_time,
+    add_json_encode_time,
+)
+from query_budget import QueryBudgetMiddleware, query_budget
+from passwords import PasswordHasher, PasswordHasherBusy
+from scoring_pipeline import DURABILITY_ENQUEUE, DURABILITY_FLUSH, ScoringPipeline
+from stats_engine import (
+    MATCH_BALLS_SQL,
+    compute_match_stats,
+    load_ball_log,
+    statistics_view,
+    visualization_view,
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger("cricklytics")
 
 # Configuration
 SECRET_KEY = os.environ.get("SECRET_KEY", "osho")
@@ -46,11 +86,83 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Response compression: gzip, or brotli when the package is installed and the
+# client accepts it, for bodies of at least COMPRESSION_MIN_SIZE bytes (negative disables)
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_CACHE_BYTES = int(os.environ.get("COMPRESSION_CACHE_BYTES", str(16 * 1024 * 1024)))
+
+compression_cache = CompressedBodyCache(COMPRESSION_CACHE_BYTES)
+if COMPRESSION_MIN_SIZE >= 0:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=COMPRESSION_MIN_SIZE,
+        gzip_level=COMPRESSION_GZIP_LEVEL,
+        brotli_quality=COMPRESSION_BROTLI_QUALITY,
+        cache=compression_cache,
+    )
+
+# Development and CI: count the SQL each request runs, flag statements repeated
+# QUERY_REPEAT_THRESHOLD times and hold routes to their @query_budget. "warn" logs,
+# "raise" turns an over-budget response into a 500 so tests fail, "off" adds nothing.
+QUERY_BUDGET_MODE = os.environ.get("QUERY_BUDGET_MODE", "off")
+QUERY_REPEAT_THRESHOLD = int(os.environ.get("QUERY_REPEAT_THRESHOLD", "5"))
+if QUERY_BUDGET_MODE != "off":
+    app.add_middleware(QueryBudgetMiddleware, mode=QUERY_BUDGET_MODE,
+                       repeat_threshold=QUERY_REPEAT_THRESHOLD)
+
+# Prometheus metrics at /metrics: per-route latency, sizes and phase times, SQL timings.
+# Added last, so it wraps compression and measures what goes on the wire.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+
+metrics_registry = MetricsRegistry()
+sql_metrics = SQLMetrics(metrics_registry)
+# Every connection times its statements into sql_metrics; plain connections when
+# neither metrics nor query budgets need them
+InstrumentedConnection.sql_metrics = sql_metrics
+SQLITE_CONNECTION_CLASS = (InstrumentedConnection if METRICS_ENABLED or QUERY_BUDGET_MODE != "off"
+                           else sqlite3.Connection)
+db_acquire_duration = metrics_registry.histogram(
+    "cricklytics_db_acquire_duration_seconds", "Time checking a connection out of the pool")
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, metrics=HTTPMetrics(metrics_registry),
+                       sql_metrics=sql_metrics, routes=lambda: app.routes)
+
+# Match payloads are rendered with orjson when it is installed; JSON_ENCODER=json forces the standard library
+JSON_ENCODER = "orjson" if orjson is not None and os.environ.get("JSON_ENCODER", "orjson") == "orjson" else "json"
+
 # Security
 security = HTTPBearer()
 
+# Password hashing runs on its own process pool so login bursts cannot starve
+# the threadpool that serves scoring
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+BCRYPT_WORKERS = int(os.environ.get("BCRYPT_WORKERS", str(max((os.cpu_count() or 2) // 2, 1))))
+BCRYPT_MAX_PENDING = int(os.environ.get("BCRYPT_MAX_PENDING", "32"))
+BCRYPT_RETRY_AFTER = os.environ.get("BCRYPT_RETRY_AFTER", "1")
+
+password_hasher = PasswordHasher(BCRYPT_WORKERS, BCRYPT_MAX_PENDING, BCRYPT_ROUNDS)
+
+# Batch scoring
+BALL_BATCH_MAX = int(os.environ.get("BALL_BATCH_MAX", "500"))
+
+# Pagination
+MATCHES_PAGE_SIZE = int(os.environ.get("MATCHES_PAGE_SIZE", "50"))
+MATCHES_PAGE_SIZE_MAX = 200
+
+# Scoring pipeline: "direct" commits every ball in its request; "pipeline"
+# journals it and leaves the commit to a background group-commit writer
+SCORING_MODE = os.environ.get("SCORING_MODE", "direct")
+SCORING_DURABILITY = os.environ.get("SCORING_DURABILITY", DURABILITY_FLUSH)
+SCORING_FLUSH_INTERVAL_MS = float(os.environ.get("SCORING_FLUSH_INTERVAL_MS", "5"))
+SCORING_MAX_GROUP = int(os.environ.get("SCORING_MAX_GROUP", "500"))
+SCORING_ACK_TIMEOUT = float(os.environ.get("SCORING_ACK_TIMEOUT", "5"))
+SCORING_JOURNAL_FSYNC = os.environ.get("SCORING_JOURNAL_FSYNC", "0") == "1"
+
 # Database setup
-DATABASE_FILE = "cricklytics.db"
+DATABASE_FILE = os.environ.get("DATABASE_FILE", "cricklytics.db")
+SCORING_JOURNAL = os.environ.get("SCORING_JOURNAL", DATABASE_FILE + ".journal")
 
 DEFAULT_TEAMS = [
     {
@@ -127,69 +239,1174 @@ DEFAULT_TEAMS = [
     },
 ]
 
+# Connection pool configuration
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "16"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "5"))
+SQLITE_BUSY_TIMEOUT = float(os.environ.get("SQLITE_BUSY_TIMEOUT", "5"))
+SQLITE_CACHE_SIZE_KB = int(os.environ.get("SQLITE_CACHE_SIZE_KB", "16384"))
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Reader threads (plus one writer thread) behind the async routes. The default, 0, runs
+# their reads and writes on Starlette's threadpool with pooled connections instead: on
+# the hardware measured so far (see bench_polling.py) the async layer was not faster
+DB_READ_WORKERS = int(os.environ.get("DB_READ_WORKERS", "0"))
+# Completed matches dated and created more than ARCHIVE_AFTER_DAYS ago move to per-season
+# archive databases under ARCHIVE_DIR; ARCHIVE_INTERVAL_SECONDS=0 leaves that to the CLI
+ARCHIVE_AFTER_DAYS = float(os.environ.get("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_INTERVAL_SECONDS = float(os.environ.get("ARCHIVE_INTERVAL_SECONDS", "3600"))
+ARCHIVE_DIR = os.environ.get("ARCHIVE_DIR", "")
+ARCHIVE_CACHE_SIZE_KB = int(os.environ.get("ARCHIVE_CACHE_SIZE_KB", "2048"))
+
+def connect_database(database: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(database, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False,
+                           factory=SQLITE_CONNECTION_CLASS)
+    conn.row_factory = sqlite3.Row
+    # WAL lets readers proceed while a ball is being written
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    return conn
+
+class PoolTimeout(Exception):
+    """No pooled connection came free in time; the HTTP layer answers 503"""
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections that are configured once and reused.
+
+    A connection is checked out by exactly one thread at a time. Idle
+    connections are handed out LIFO so the most recently used (and best
+    cached) connection is picked first.
+    """
+
+    def __init__(self, database: str, max_size: int, timeout: float):
+        self.database = database
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pid = os.getpid()
+        self._cond = threading.Condition()
+        self._idle = []
+        self._size = 0
+        self._checked_out = 0
+        self._acquisitions = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    def _connect(self):
+        return connect_database(self.database)
+
+    def acquire(self):
+        started = time.perf_counter()
+        waited = False
+        with self._cond:
+            while not self._idle and self._size >= self.max_size:
+                waited = True
+                remaining = self.timeout - (time.perf_counter() - started)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(f"No database connection free after {self.timeout:g}s")
+                self._cond.wait(remaining)
+
+            wait_time = time.perf_counter() - started
+            self._acquisitions += 1
+            if waited:
+                self._waits += 1
+                self._wait_time_total += wait_time
+                self._wait_time_max = max(self._wait_time_max, wait_time)
+            self._checked_out += 1
+
+            if self._idle:
+                return self._idle.pop()
+            self._size += 1
+
+        try:
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._checked_out -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn):
+        try:
+            # Never hand out a connection with a half-finished transaction
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            conn = None
+
+        with self._cond:
+            self._checked_out -= 1
+            if conn is None:
+                self._size -= 1
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            for conn in self._idle:
+                conn.close()
+            self._size -= len(self._idle)
+            self._idle = []
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "open": self._size,
+                "checked_out": self._checked_out,
+                "idle": len(self._idle),
+                "acquisitions": self._acquisitions,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "wait_time_total_ms": round(self._wait_time_total * 1000, 3),
+                "wait_time_max_ms": round(self._wait_time_max * 1000, 3),
+            }
+
+db_pool: Optional[ConnectionPool] = None
+db_pool_lock = threading.Lock()
+
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request: Request, error: PoolTimeout):
+    # Background threads see the exception itself and decide whether to retry
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        content={"detail": "Database is busy, please retry"},
+                        headers={"Retry-After": "1"})
+
+def get_pool() -> ConnectionPool:
+    global db_pool
+    pool = db_pool
+    if pool is not None and pool.database == DATABASE_FILE and pool.pid == os.getpid():
+        return pool
+
+    with db_pool_lock:
+        pool = db_pool
+        if pool is None or pool.database != DATABASE_FILE or pool.pid != os.getpid():
+            # Connections must not be shared across a fork, only closed in the owning process
+            if pool is not None and pool.pid == os.getpid():
+                pool.close()
+            pool = ConnectionPool(DATABASE_FILE, DB_POOL_SIZE, DB_POOL_TIMEOUT)
+            db_pool = pool
+        return pool
+
 @contextmanager
 def get_db():
-    conn = sqlite3.connect(DATABASE_FILE)
-    conn.row_factory = sqlite3.Row
+    pool = get_pool()
+    started = time.perf_counter()
+    conn = pool.acquire()
+    if METRICS_ENABLED:
+        acquired = time.perf_counter() - started
+        db_acquire_duration.observe(acquired)
+        add_db_acquire_time(acquired)
     try:
         yield conn
     finally:
-        conn.close()
+        pool.release(conn)
 
-def seed_default_teams_for_user(cursor, user_id: str):
-    for team in DEFAULT_TEAMS:
-        cursor.execute("""
-            SELECT id, players FROM standalone_teams
-            WHERE lower(name) = lower(?) AND created_by = ?
-        """, (team["name"], user_id))
+database = AsyncDatabase(lambda: connect_database(DATABASE_FILE), DB_READ_WORKERS)
+
+def read_with_pool(fn, *args):
+    with get_db() as conn:
+        return fn(conn.cursor(), *args)
+
+def write_with_pool(fn, *args):
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(cursor, *args)
+            conn.commit()
+            return result
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+
+async def db_read(fn, *args):
+    """Run fn(cursor, *args) for an async route without blocking the event loop"""
+    if DB_READ_WORKERS <= 0:
+        return await run_in_threadpool(read_with_pool, fn, *args)
+    return await database.read(fn, *args)
+
+async def db_write(fn, *args):
+    """Run fn(cursor, *args) in a committed write transaction for an async route"""
+    if DB_READ_WORKERS <= 0:
+        return await run_in_threadpool(write_with_pool, fn, *args)
+    return await database.write(fn, *args)
 
-        existing_team = cursor.fetchone()
-        if existing_team:
+def archive_database_path(season: str) -> str:
+    directory = ARCHIVE_DIR or os.path.join(os.path.dirname(os.path.abspath(DATABASE_FILE)), "archive")
+    return os.path.join(directory, f"cricklytics-{season}.db")
+
+class ArchiveReaders:
+    """Read-only connections to the season archive databases.
+
+    Each thread opens an archive the first time it reads an archived match
+    from that season and keeps the connection, the same way the async reader
+    threads keep theirs. Archived rows never change, so the connections run
+    in autocommit and with a small page cache; the cache budget stays with
+    the live database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._connections = []
+        self._pid = os.getpid()
+        self._opened = 0
+        self._reads = 0
+
+    def cursor(self, season: str):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._local = threading.local()
+                self._connections = []
+                self._pid = os.getpid()
+            self._reads += 1
+            local = self._local
+        connections = getattr(local, "connections", None)
+        if connections is None:
+            connections = local.connections = {}
+
+        path = archive_database_path(season)
+        conn = connections.get(path)
+        if conn is None:
+            uri = "file:" + urllib.request.pathname2url(os.path.abspath(path)) + "?mode=ro"
             try:
-                existing_players = json.loads(existing_team["players"])
-            except (TypeError, json.JSONDecodeError):
-                existing_players = []
+                conn = sqlite3.connect(uri, uri=True, timeout=SQLITE_BUSY_TIMEOUT,
+                                       check_same_thread=False, factory=SQLITE_CONNECTION_CLASS)
+            except sqlite3.OperationalError:
+                logger.error("Archive database %s cannot be opened", path)
+                raise HTTPException(status_code=503, detail="Match archive is unavailable")
+            conn.row_factory = sqlite3.Row
+            conn.execute(f"PRAGMA cache_size=-{ARCHIVE_CACHE_SIZE_KB}")
+            connections[path] = conn
+            with self._lock:
+                self._connections.append(conn)
+                self._opened += 1
+        return conn.cursor()
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._local = threading.local()
+        for conn in connections:
+            conn.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"open": len(self._connections), "opened": self._opened, "reads": self._reads}
+
+archive_readers = ArchiveReaders()
+
+def match_data_cursor(cursor, archived_season: Optional[str]):
+    """Cursor holding a match's balls, teams and state: the live one, or its season archive's"""
+    if archived_season is None:
+        return cursor
+    return archive_readers.cursor(archived_season)
+
+def get_player_ids(cursor, names) -> dict:
+    """Map player names to ids, registering names seen for the first time"""
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+    cursor.executemany("INSERT OR IGNORE INTO players (name) VALUES (?)",
+                       [(name,) for name in names])
+    player_ids = {}
+    for start in range(0, len(names), 500):
+        chunk = names[start:start + 500]
+        cursor.execute(f"""
+            SELECT id, name FROM players WHERE name IN ({", ".join("?" * len(chunk))})
+        """, chunk)
+        player_ids.update((row['name'], row['id']) for row in cursor.fetchall())
+    return player_ids
+
+def normalize_roster(players) -> list:
+    """Keep the {"name", "role"} entries of a roster, dropping anything without a name"""
+    if not isinstance(players, list):
+        return []
+    roster = []
+    for player in players:
+        if isinstance(player, str):
+            player = {"name": player}
+        if isinstance(player, dict) and isinstance(player.get("name"), str) and player["name"].strip():
+            roster.append({"name": player["name"], "role": player.get("role")})
+    return roster
+
+def set_team_roster(cursor, team_id: str, players):
+    """Replace a team's roster with an ordered list of {"name", "role"} entries"""
+    players = normalize_roster(players)
+    player_ids = get_player_ids(cursor, [player["name"] for player in players])
+    cursor.execute("DELETE FROM team_players WHERE team_id = ?", (team_id,))
+    cursor.executemany("""
+        INSERT INTO team_players (team_id, position, player_id, role) VALUES (?, ?, ?, ?)
+    """, [
+        (team_id, position, player_ids[player["name"]], player.get("role"))
+        for position, player in enumerate(players)
+    ])
+
+def copy_team_rosters(cursor, copies):
+    """Copy rosters for (source_team_id, team_id) pairs"""
+    cursor.executemany("""
+        INSERT INTO team_players (team_id, position, player_id, role)
+        SELECT ?, position, player_id, role FROM team_players WHERE team_id = ?
+    """, [(team_id, source_team_id) for source_team_id, team_id in copies])
+
+def group_rosters(rows) -> dict:
+    """team_id -> roster from rows of (team_id, name, role) in position order"""
+    rosters = {}
+    for row in rows:
+        rosters.setdefault(row['team_id'], []).append({"name": row['name'], "role": row['role']})
+    return rosters
+
+# Bump when DEFAULT_TEAMS changes so existing users are re-seeded once, at the next boot
+SEED_VERSION = 1
 
-            has_placeholder_players = any(
-                player.get("name", "").startswith(f"{team['name']} Player ")
-                for player in existing_players
+def seed_default_teams(cursor, user_id: Optional[str] = None):
+    """Give users (all, or one) the default teams they lack, and replace placeholder rosters.
+
+    A constant number of statements whatever the user and team counts: the
+    default team names go in as one JSON list, and the missing teams and
+    their rosters go in with executemany.
+    """
+    user_filter = "AND u.id = ?" if user_id else ""
+    owner_filter = "AND t.created_by = ?" if user_id else ""
+    params = (user_id,) if user_id else ()
+    team_names = json.dumps([team["name"] for team in DEFAULT_TEAMS])
+    rosters = [normalize_roster(team["players"]) for team in DEFAULT_TEAMS]
+    player_ids = get_player_ids(cursor, [player["name"] for roster in rosters for player in roster])
+
+    # Copies still holding the generated "<Team> Player N" placeholders get the real squad
+    cursor.execute(f"""
+        SELECT t.id, defaults.key AS team_index
+        FROM json_each(?) AS defaults
+        CROSS JOIN standalone_teams t ON lower(t.name) = lower(defaults.value)
+        WHERE EXISTS (
+            SELECT 1 FROM team_players tp JOIN players p ON p.id = tp.player_id
+            WHERE tp.team_id = t.id AND p.name LIKE defaults.value || ' Player %'
+        ) {owner_filter}
+    """, (team_names, *params))
+    placeholder_teams = [(row['id'], row['team_index']) for row in cursor.fetchall()]
+    cursor.executemany("""
+        UPDATE standalone_teams SET captain = ?, vice_captain = ? WHERE id = ?
+    """, [(DEFAULT_TEAMS[index]["captain"], DEFAULT_TEAMS[index]["vice_captain"], team_id)
+          for team_id, index in placeholder_teams])
+    cursor.executemany("DELETE FROM team_players WHERE team_id = ?",
+                       [(team_id,) for team_id, _ in placeholder_teams])
+
+    cursor.execute(f"""
+        SELECT u.id, defaults.key AS team_index
+        FROM users u CROSS JOIN json_each(?) AS defaults
+        WHERE NOT EXISTS (
+            SELECT 1 FROM standalone_teams t
+            WHERE t.created_by = u.id AND lower(t.name) = lower(defaults.value)
+        ) {user_filter}
+    """, (team_names, *params))
+    new_teams = [(str(uuid.uuid4()), row['id'], row['team_index']) for row in cursor.fetchall()]
+    cursor.executemany("""
+        INSERT INTO standalone_teams (id, name, captain, vice_captain, total_matches, created_by)
+        VALUES (?, ?, ?, ?, 0, ?)
+    """, [(team_id, DEFAULT_TEAMS[index]["name"], DEFAULT_TEAMS[index]["captain"],
+           DEFAULT_TEAMS[index]["vice_captain"], owner_id)
+          for team_id, owner_id, index in new_teams])
+
+    cursor.executemany("""
+        INSERT INTO team_players (team_id, position, player_id, role) VALUES (?, ?, ?, ?)
+    """, [
+        (team_id, position, player_ids[player["name"]], player["role"])
+        for team_id, index in placeholder_teams + [(team_id, index) for team_id, _, index in new_teams]
+        for position, player in enumerate(rosters[index])
+    ])
+
+def is_legal_delivery(extras_type: Optional[str]) -> bool:
+    """Wides and no-balls do not count towards the over"""
+    return extras_type not in ('wide', 'no-ball')
+
+def apply_ball_to_innings_totals(cursor, match_id: str, ball, sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) a delivery from the innings aggregate.
+
+    Must run inside the same transaction as the INSERT/DELETE on balls so the
+    aggregate never drifts from the ball log.
+    """
+    if sign > 0:
+        add_balls_to_innings_totals(cursor, match_id, [ball])
+        return
+
+    runs = -(ball['runs'] + ball['extras'])
+    extras = -ball['extras']
+    wickets = -1 if ball['wicket'] else 0
+    legal_balls = -1 if is_legal_delivery(ball['extras_type']) else 0
+
+    cursor.execute("""
+        UPDATE innings_totals
+        SET runs = runs + ?, wickets = wickets + ?, extras = extras + ?,
+            legal_balls = legal_balls + ?, deliveries = deliveries - 1
+        WHERE match_id = ? AND innings = ?
+    """, (runs, wickets, extras, legal_balls, match_id, ball['innings']))
+
+    # The removed delivery may have been the latest one, so re-read the new tail
+    cursor.execute(INNINGS_LAST_BALL_SQL, (match_id, ball['innings']))
+    last_ball = cursor.fetchone()
+    if last_ball is None:
+        cursor.execute("DELETE FROM innings_totals WHERE match_id = ? AND innings = ?",
+                       (match_id, ball['innings']))
+    else:
+        cursor.execute("""
+            UPDATE innings_totals SET current_over = ?, current_ball = ?
+            WHERE match_id = ? AND innings = ?
+        """, (last_ball['over_number'], last_ball['ball_number'], match_id, ball['innings']))
+
+def add_balls_to_innings_totals(cursor, match_id: str, balls):
+    """Fold new deliveries into the innings aggregate with one upsert per innings"""
+    deltas = {}
+    for ball in balls:
+        delta = deltas.get(ball['innings'])
+        if delta is None:
+            delta = deltas[ball['innings']] = {
+                "runs": 0, "wickets": 0, "extras": 0, "legal_balls": 0, "deliveries": 0,
+                "last": (ball['over_number'], ball['ball_number']),
+            }
+        delta["runs"] += ball['runs'] + ball['extras']
+        delta["extras"] += ball['extras']
+        delta["wickets"] += 1 if ball['wicket'] else 0
+        delta["legal_balls"] += 1 if is_legal_delivery(ball['extras_type']) else 0
+        delta["deliveries"] += 1
+        delta["last"] = max(delta["last"], (ball['over_number'], ball['ball_number']))
+
+    for innings, delta in deltas.items():
+        cursor.execute("""
+            INSERT INTO innings_totals (match_id, innings, runs, wickets, extras, legal_balls,
+                                        deliveries, current_over, current_ball)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(match_id, innings) DO UPDATE SET
+                runs = runs + excluded.runs,
+                wickets = wickets + excluded.wickets,
+                extras = extras + excluded.extras,
+                legal_balls = legal_balls + excluded.legal_balls,
+                deliveries = deliveries + excluded.deliveries,
+                current_over = CASE
+                    WHEN (excluded.current_over, excluded.current_ball) >= (current_over, current_ball)
+                    THEN excluded.current_over ELSE current_over END,
+                current_ball = CASE
+                    WHEN (excluded.current_over, excluded.current_ball) >= (current_over, current_ball)
+                    THEN excluded.current_ball ELSE current_ball END
+        """, (match_id, innings, delta["runs"], delta["wickets"], delta["extras"],
+              delta["legal_balls"], delta["deliveries"], *delta["last"]))
+
+def get_innings_scores(cursor, match_id: str):
+    """Innings scores and the latest delivery position, read from innings_totals"""
+    cursor.execute("""
+        SELECT * FROM innings_totals WHERE match_id = ?
+        ORDER BY innings
+    """, (match_id,))
+    innings_scores = {}
+    current_over = {"innings": 1, "over": 0, "ball": 0}
+
+    for totals in cursor.fetchall():
+        legal_balls = totals['legal_balls']
+        innings_scores[totals['innings']] = {
+            "runs": totals['runs'],
+            "wickets": totals['wickets'],
+            "overs": legal_balls // 6,
+            "balls": legal_balls,
+            "extras": totals['extras'],
+            "balls_in_current_over": legal_balls % 6
+        }
+        current_over = {
+            "innings": totals['innings'],
+            "over": totals['current_over'],
+            "ball": totals['current_ball']
+        }
+
+    return innings_scores, current_over
+
+# Archived matches keep their aggregates in the live database after their balls
+# have moved out, so a rebuild over all matches must leave them alone
+LIVE_MATCHES_FILTER = "match_id NOT IN (SELECT id FROM matches WHERE archived_season IS NOT NULL)"
+
+def rebuild_innings_totals(cursor, match_id: Optional[str] = None):
+    """Recompute innings aggregates from the ball log (all live matches or a single one)"""
+    match_filter = "WHERE match_id = ?" if match_id else f"WHERE {LIVE_MATCHES_FILTER}"
+    params = (match_id,) if match_id else ()
+
+    cursor.execute(f"DELETE FROM innings_totals {match_filter}", params)
+    cursor.execute(f"""
+        INSERT INTO innings_totals (match_id, innings, runs, wickets, extras, legal_balls,
+                                    deliveries, current_over, current_ball)
+        SELECT match_id, innings,
+               SUM(runs + extras),
+               SUM(CASE WHEN wicket THEN 1 ELSE 0 END),
+               SUM(extras),
+               SUM(CASE WHEN extras_type IS NULL OR extras_type NOT IN ('wide', 'no-ball')
+                        THEN 1 ELSE 0 END),
+               COUNT(*), 0, 0
+        FROM balls
+        {match_filter}
+        GROUP BY match_id, innings
+    """, params)
+    cursor.execute(f"""
+        UPDATE innings_totals SET
+            current_over = (
+                SELECT b.over_number FROM balls b
+                WHERE b.match_id = innings_totals.match_id AND b.innings = innings_totals.innings
+                ORDER BY b.over_number DESC, b.ball_number DESC LIMIT 1
+            ),
+            current_ball = (
+                SELECT b.ball_number FROM balls b
+                WHERE b.match_id = innings_totals.match_id AND b.innings = innings_totals.innings
+                ORDER BY b.over_number DESC, b.ball_number DESC LIMIT 1
             )
+        {match_filter}
+    """, params)
 
-            if has_placeholder_players:
-                cursor.execute("""
-                    UPDATE standalone_teams
-                    SET players = ?, captain = ?, vice_captain = ?
-                    WHERE id = ?
-                """, (
-                    json.dumps(team["players"]),
-                    team["captain"],
-                    team["vice_captain"],
-                    existing_team["id"],
-                ))
-            continue
+# Per-player, per-match rollup columns, in the order add_balls_to_player_stats fills them.
+# `deliveries` is a reference count, not a ball count: one per role a ball credits the
+# player in (batter, bowler, dismissed player), so a batter out on their own ball holds
+# two. Adding and removing a ball move it by the same amount and the row is dropped when
+# it reaches zero. It is never served; balls_faced and balls_bowled are the ball counts.
+PLAYER_STAT_COLUMNS = ("runs", "balls_faced", "fours", "sixes", "dismissals",
+                       "runs_conceded", "balls_bowled", "wickets", "deliveries")
+
+def ball_player_names(ball) -> list:
+    """Names a delivery credits in the player rollup: batter, bowler and the dismissed player"""
+    names = [ball['batsman'], ball['bowler']]
+    if ball['wicket'] and ball['wicket_player']:
+        names.append(ball['wicket_player'])
+    return names
+
+def add_balls_to_player_stats(cursor, match_id: str, balls, player_ids: dict, sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) deliveries from player_match_stats.
+
+    Runs in the transaction that writes the balls, with one upsert per player
+    touched, so career figures never need a pass over the ball log.
+    """
+    deltas = {}
+
+    def player_delta(name):
+        player_id = player_ids[name]
+        delta = deltas.get(player_id)
+        if delta is None:
+            delta = deltas[player_id] = [0] * len(PLAYER_STAT_COLUMNS)
+        return delta
+
+    for ball in balls:
+        legal = 1 if is_legal_delivery(ball['extras_type']) else 0
+        batting = player_delta(ball['batsman'])
+        batting[0] += ball['runs']
+        batting[1] += legal
+        batting[2] += 1 if ball['runs'] == 4 else 0
+        batting[3] += 1 if ball['runs'] == 6 else 0
+        batting[8] += 1
+
+        bowling = player_delta(ball['bowler'])
+        bowling[5] += ball['runs'] + ball['extras']
+        bowling[6] += legal
+        bowling[7] += 1 if ball['wicket'] else 0
+        bowling[8] += 1
 
+        if ball['wicket'] and ball['wicket_player']:
+            dismissed = player_delta(ball['wicket_player'])
+            dismissed[4] += 1
+            dismissed[8] += 1
+
+    columns = ", ".join(PLAYER_STAT_COLUMNS)
+    cursor.executemany(f"""
+        INSERT INTO player_match_stats (player_id, match_id, {columns})
+        VALUES (?, ?, {", ".join("?" * len(PLAYER_STAT_COLUMNS))})
+        ON CONFLICT(player_id, match_id) DO UPDATE SET
+            {", ".join(f"{column} = {column} + excluded.{column}" for column in PLAYER_STAT_COLUMNS)}
+    """, [(player_id, match_id, *(sign * value for value in delta))
+          for player_id, delta in deltas.items()])
+    if sign < 0:
         cursor.execute("""
-            INSERT INTO standalone_teams (id, name, players, captain, vice_captain,
-                                        total_matches, created_by)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            str(uuid.uuid4()),
-            team["name"],
-            json.dumps(team["players"]),
-            team["captain"],
-            team["vice_captain"],
-            0,
-            user_id,
+            DELETE FROM player_match_stats WHERE match_id = ? AND deliveries <= 0
+        """, (match_id,))
+
+def rebuild_player_stats(cursor, match_id: Optional[str] = None):
+    """Recompute the player rollup from the ball log (all live matches or a single one).
+
+    This is the only place career statistics scan the balls table.
+    """
+    match_filter = "AND match_id = ?" if match_id else ""
+    dismissal_filter = "AND b.match_id = ?" if match_id else ""
+    params = (match_id,) if match_id else ()
+
+    cursor.execute(f"""
+        DELETE FROM player_match_stats WHERE {"match_id = ?" if match_id else LIVE_MATCHES_FILTER}
+    """, params)
+    cursor.execute(f"""
+        INSERT OR IGNORE INTO players (name)
+        SELECT DISTINCT wicket_player FROM balls
+        WHERE wicket AND wicket_player IS NOT NULL {match_filter}
+    """, params)
+    legal = "CASE WHEN extras_type IS NULL OR extras_type NOT IN ('wide', 'no-ball') THEN 1 ELSE 0 END"
+    cursor.execute(f"""
+        INSERT INTO player_match_stats (player_id, match_id, {", ".join(PLAYER_STAT_COLUMNS)})
+        SELECT player_id, match_id, {", ".join(f"SUM({column})" for column in PLAYER_STAT_COLUMNS)}
+        FROM (
+            SELECT batsman_id AS player_id, match_id, runs, {legal} AS balls_faced,
+                   runs = 4 AS fours, runs = 6 AS sixes, 0 AS dismissals,
+                   0 AS runs_conceded, 0 AS balls_bowled, 0 AS wickets, 1 AS deliveries
+            FROM balls WHERE 1 = 1 {match_filter}
+            UNION ALL
+            SELECT bowler_id, match_id, 0, 0, 0, 0, 0,
+                   runs + extras, {legal}, CASE WHEN wicket THEN 1 ELSE 0 END, 1
+            FROM balls WHERE 1 = 1 {match_filter}
+            UNION ALL
+            SELECT p.id, b.match_id, 0, 0, 0, 0, 1, 0, 0, 0, 1
+            FROM balls b JOIN players p ON p.name = b.wicket_player
+            WHERE b.wicket {dismissal_filter}
+        )
+        GROUP BY player_id, match_id
+    """, params * 3)
+
+# Platform-wide counters behind /api/stats/global, kept in one row
+GLOBAL_STAT_COLUMNS = ("total_matches", "total_balls", "total_runs", "active_users")
+
+def add_to_global_stats(cursor, matches: int = 0, balls: int = 0, runs: int = 0,
+                        active_users: int = 0):
+    """Apply a delta to the global counters in the caller's transaction"""
+    cursor.execute("""
+        UPDATE global_stats SET
+            total_matches = total_matches + ?, total_balls = total_balls + ?,
+            total_runs = total_runs + ?, active_users = active_users + ?
+        WHERE id = 1
+    """, (matches, balls, runs, active_users))
+
+def count_match_for_creator(cursor, user_id: str, sign: int = 1):
+    """Track matches per creator so active_users moves only when a user's count hits or leaves zero"""
+    cursor.execute("""
+        INSERT INTO user_match_counts (user_id, matches) VALUES (?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET matches = matches + excluded.matches
+        RETURNING matches
+    """, (user_id, sign))
+    matches = cursor.fetchone()['matches']
+    if sign > 0 and matches == 1:
+        add_to_global_stats(cursor, active_users=1)
+    elif sign < 0 and matches <= 0:
+        cursor.execute("DELETE FROM user_match_counts WHERE user_id = ?", (user_id,))
+        add_to_global_stats(cursor, active_users=-1)
+
+def reconcile_global_stats(cursor) -> dict:
+    """Recompute the global counters with full scans; returns {counter: drift} for any that moved"""
+    # Archived matches no longer have balls here; their innings totals stand in for them
+    cursor.execute(f"""
+        SELECT
+            (SELECT COUNT(*) FROM matches) AS total_matches,
+            (SELECT COUNT(*) FROM balls
+             WHERE extras_type IS NULL OR extras_type NOT IN ('wide', 'no-ball'))
+            + (SELECT COALESCE(SUM(legal_balls), 0) FROM innings_totals
+               WHERE NOT {LIVE_MATCHES_FILTER}) AS total_balls,
+            (SELECT COALESCE(SUM(runs + extras), 0) FROM balls)
+            + (SELECT COALESCE(SUM(runs), 0) FROM innings_totals
+               WHERE NOT {LIVE_MATCHES_FILTER}) AS total_runs,
+            (SELECT COUNT(DISTINCT created_by) FROM matches) AS active_users
+    """)
+    actual = dict(cursor.fetchone())
+    cursor.execute("SELECT * FROM global_stats WHERE id = 1")
+    stored = cursor.fetchone()
+    drift = {column: actual[column] - (stored[column] if stored else 0)
+             for column in GLOBAL_STAT_COLUMNS
+             if stored is None or stored[column] != actual[column]}
+
+    cursor.execute("DELETE FROM user_match_counts")
+    cursor.execute("""
+        INSERT INTO user_match_counts (user_id, matches)
+        SELECT created_by, COUNT(*) FROM matches WHERE created_by IS NOT NULL GROUP BY created_by
+    """)
+    cursor.execute(f"""
+        INSERT INTO global_stats (id, {", ".join(GLOBAL_STAT_COLUMNS)}, reconciled_at)
+        VALUES (1, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(id) DO UPDATE SET
+            {", ".join(f"{column} = excluded.{column}" for column in GLOBAL_STAT_COLUMNS)},
+            reconciled_at = excluded.reconciled_at
+    """, [actual[column] for column in GLOBAL_STAT_COLUMNS])
+    return drift
+
+# Hot queries: executed on every poll or scored ball, so they must stay index-backed
+# Legal balls so far in each over of a batch; the overs come in as a JSON list of [innings, over]
+OVERS_LEGAL_BALLS_SQL = """
+    SELECT b.innings, b.over_number, COUNT(*) AS legal_balls, MAX(b.legal_ball_number) AS last_legal
+    FROM json_each(?) AS overs
+    CROSS JOIN balls b
+        ON b.match_id = ? AND b.innings = json_extract(overs.value, '$[0]')
+        AND b.over_number = json_extract(overs.value, '$[1]')
+    WHERE b.extras_type IS NULL OR b.extras_type NOT IN ('wide', 'no-ball')
+    GROUP BY b.innings, b.over_number
+"""
+
+MATCH_TEAMS_SQL = "SELECT * FROM teams WHERE match_id = ?"
+
+INNINGS_LAST_BALL_SQL = """
+    SELECT over_number, ball_number FROM balls
+    WHERE match_id = ? AND innings = ?
+    ORDER BY over_number DESC, ball_number DESC
+    LIMIT 1
+"""
+
+BALLS_SINCE_SQL = """
+    SELECT * FROM balls WHERE match_id = ? AND seq > ?
+    ORDER BY seq
+"""
+
+BALLS_AT_SEQ_SQL = """
+    SELECT * FROM balls WHERE match_id = ? AND seq = ?
+    ORDER BY innings, over_number, ball_number
+"""
+
+TOMBSTONES_SINCE_SQL = """
+    SELECT ball_id FROM ball_tombstones WHERE match_id = ? AND seq > ?
+    ORDER BY seq
+"""
+
+USER_TEAMS_SQL = """
+    SELECT st.*,
+           COALESCE(
+               (SELECT json_group_array(
+                   json_object('match_id', tmu.match_id, 'match_name', tmu.match_name)
+               ) FROM team_match_usage tmu WHERE tmu.team_name = st.name),
+               '[]'
+           ) as matches_used_json
+    FROM standalone_teams st
+    WHERE st.created_by = ?
+    ORDER BY st.created_at DESC
+"""
+
+USER_TEAM_ROSTERS_SQL = """
+    SELECT tp.team_id, p.name, tp.role
+    FROM standalone_teams st
+    JOIN team_players tp ON tp.team_id = st.id
+    JOIN players p ON p.id = tp.player_id
+    WHERE st.created_by = ?
+    ORDER BY tp.team_id, tp.position
+"""
+
+MATCH_TEAM_ROSTERS_SQL = """
+    SELECT tp.team_id, p.name, tp.role
+    FROM teams t
+    JOIN team_players tp ON tp.team_id = t.id
+    JOIN players p ON p.id = tp.player_id
+    WHERE t.match_id = ?
+    ORDER BY tp.team_id, tp.position
+"""
+
+PLAYER_MATCH_STATS_SQL = """
+    SELECT s.*, m.match_type, substr(m.date, 1, 4) AS season
+    FROM player_match_stats s JOIN matches m ON m.id = s.match_id
+    WHERE s.player_id = ?
+"""
+
+# The match list; GET /api/matches and /api/v2/matches fill in the WHERE clause
+MATCHES_PAGE_SQL = """
+    SELECT m.*, u.username as created_by_name
+    FROM matches m
+    LEFT JOIN users u ON m.created_by = u.id
+    {where_clause}
+    ORDER BY m.created_at DESC, m.id DESC
+    LIMIT ?
+"""
+# Row-value comparison lets SQLite seek straight into the (created_at, id) indexes
+MATCHES_KEYSET_CONDITION = "(m.created_at, m.id) < (?, ?)"
+
+def matches_page_sql(conditions: list) -> str:
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return MATCHES_PAGE_SQL.format(where_clause=where_clause)
+
+HOT_QUERIES = {
+    "match_balls": MATCH_BALLS_SQL,
+    "overs_legal_balls": OVERS_LEGAL_BALLS_SQL,
+    "match_teams": MATCH_TEAMS_SQL,
+    "user_teams": USER_TEAMS_SQL,
+    "user_team_rosters": USER_TEAM_ROSTERS_SQL,
+    "match_team_rosters": MATCH_TEAM_ROSTERS_SQL,
+    "player_match_stats": PLAYER_MATCH_STATS_SQL,
+    "player_match_stats_by_match": "SELECT * FROM player_match_stats WHERE match_id = ?",
+    "innings_totals": "SELECT * FROM innings_totals WHERE match_id = ? ORDER BY innings",
+    "innings_last_ball": INNINGS_LAST_BALL_SQL,
+    "balls_since": BALLS_SINCE_SQL,
+    "balls_at_seq": BALLS_AT_SEQ_SQL,
+    "tombstones_since": TOMBSTONES_SINCE_SQL,
+    "match_state": "SELECT * FROM match_state WHERE match_id = ?",
+    "standalone_team_by_name": "SELECT * FROM standalone_teams WHERE name = ?",
+    "team_usage_by_team": "SELECT * FROM team_match_usage WHERE team_name = ?",
+    "matches_page": matches_page_sql([MATCHES_KEYSET_CONDITION]),
+    "matches_by_status_page": matches_page_sql(["m.status = ?", MATCHES_KEYSET_CONDITION]),
+    "matches_by_creator_page": matches_page_sql(["m.created_by = ?", MATCHES_KEYSET_CONDITION]),
+}
+
+def migrate_hot_query_indexes(cursor):
+    # Ball log lookups: per-match ordered reads and per-over legal ball counting
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_balls_match_order
+        ON balls(match_id, innings, over_number, ball_number)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_balls_over_legal
+        ON balls(match_id, innings, over_number, extras_type, legal_ball_number)
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_teams_match ON teams(match_id)")
+    # Covers the json_group_array subquery in get_user_teams without touching the table
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_team_match_usage_team
+        ON team_match_usage(team_name, match_id, match_name)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_standalone_teams_owner
+        ON standalone_teams(created_by, created_at)
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_standalone_teams_name ON standalone_teams(name)")
+
+def migrate_match_list_indexes(cursor):
+    # Keyset pagination on (created_at, id), optionally narrowed by status or creator
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_matches_created
+        ON matches(created_at, id)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_matches_status_created
+        ON matches(status, created_at, id)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_matches_creator_created
+        ON matches(created_by, created_at, id)
+    """)
+
+def migrate_match_version(cursor):
+    # Bumped by every write to a match; keys the read cache
+    cursor.execute("PRAGMA table_info(matches)")
+    if 'version' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE matches ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+def migrate_ball_seq(cursor):
+    # Each ball carries the match version its insert produced, so "seq > N"
+    # selects exactly the deliveries a client holding version N has not seen
+    cursor.execute("PRAGMA table_info(balls)")
+    if 'seq' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE balls ADD COLUMN seq INTEGER NOT NULL DEFAULT 0")
+    cursor.execute("""
+        UPDATE balls SET seq = ordered.seq
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY match_id
+                ORDER BY innings, over_number, ball_number, created_at
+            ) AS seq
+            FROM balls
+        ) AS ordered
+        WHERE ordered.id = balls.id
+    """)
+    # Future writes must be numbered after every backfilled ball
+    cursor.execute("""
+        UPDATE matches SET version = MAX(version, (
+            SELECT COUNT(*) FROM balls WHERE balls.match_id = matches.id
         ))
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_balls_match_seq ON balls(match_id, seq)")
+
+    # Deleted balls leave a tombstone so delta readers can drop them too
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ball_tombstones (
+            match_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            ball_id TEXT NOT NULL,
+            PRIMARY KEY (match_id, seq)
+        )
+    """)
 
-def seed_default_teams(cursor):
-    cursor.execute("SELECT id FROM users")
-    for user_row in cursor.fetchall():
-        seed_default_teams_for_user(cursor, user_row["id"])
+def parse_legacy_roster(players_json) -> list:
+    try:
+        return normalize_roster(json.loads(players_json))
+    except (TypeError, json.JSONDecodeError):
+        return []
+
+def migrate_player_rosters(cursor):
+    # Players get integer ids; rosters become rows instead of JSON strings. A
+    # player is identified by name, as balls and /api/players/{name}/stats
+    # always have: the same name in any team or match is the same player, and
+    # the id only interns the name.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS players (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # team_id is a standalone_teams.id or a per-match teams.id
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS team_players (
+            team_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            player_id INTEGER NOT NULL,
+            role TEXT,
+            PRIMARY KEY (team_id, position),
+            FOREIGN KEY (player_id) REFERENCES players(id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_team_players_player ON team_players(player_id)")
+
+    # The legacy column is NOT NULL without a default, so it has to go for
+    # inserts to work. The JSON it held is kept verbatim, since rows that
+    # do not parse (or entries without a name) have no team_players form.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS legacy_team_rosters (
+            team_table TEXT NOT NULL,
+            team_id TEXT NOT NULL,
+            players TEXT,
+            PRIMARY KEY (team_table, team_id)
+        )
+    """)
+    for table in ("standalone_teams", "teams"):
+        cursor.execute(f"PRAGMA table_info({table})")
+        if 'players' not in [column[1] for column in cursor.fetchall()]:
+            continue
+        cursor.execute(f"SELECT id, players FROM {table}")
+        for row in cursor.fetchall():
+            set_team_roster(cursor, row['id'], parse_legacy_roster(row['players']))
+        cursor.execute(f"""
+            INSERT OR REPLACE INTO legacy_team_rosters (team_table, team_id, players)
+            SELECT ?, id, players FROM {table}
+        """, (table,))
+        cursor.execute(f"ALTER TABLE {table} DROP COLUMN players")
+
+    # Balls reference batter and bowler by id for cross-match lookups
+    cursor.execute("PRAGMA table_info(balls)")
+    ball_columns = [column[1] for column in cursor.fetchall()]
+    for column in ("batsman_id", "bowler_id"):
+        if column not in ball_columns:
+            cursor.execute(f"ALTER TABLE balls ADD COLUMN {column} INTEGER REFERENCES players(id)")
+    cursor.execute("""
+        INSERT OR IGNORE INTO players (name)
+        SELECT batsman FROM balls UNION SELECT bowler FROM balls
+    """)
+    cursor.execute("""
+        UPDATE balls SET
+            batsman_id = (SELECT id FROM players WHERE name = balls.batsman),
+            bowler_id = (SELECT id FROM players WHERE name = balls.bowler)
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_balls_batsman ON balls(batsman_id, match_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_balls_bowler ON balls(bowler_id, match_id)")
+
+def migrate_player_stats(cursor):
+    # Career and leaderboard figures are read from this rollup, never from balls
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS player_match_stats (
+            player_id INTEGER NOT NULL,
+            match_id TEXT NOT NULL,
+            {", ".join(f"{column} INTEGER NOT NULL DEFAULT 0" for column in PLAYER_STAT_COLUMNS)},
+            PRIMARY KEY (player_id, match_id),
+            FOREIGN KEY (player_id) REFERENCES players(id),
+            FOREIGN KEY (match_id) REFERENCES matches(id)
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_player_match_stats_match ON player_match_stats(match_id)
+    """)
+    rebuild_player_stats(cursor)
+
+def migrate_global_stats(cursor):
+    # /api/stats/global reads one row instead of aggregating matches and balls
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS global_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            {", ".join(f"{column} INTEGER NOT NULL DEFAULT 0" for column in GLOBAL_STAT_COLUMNS)},
+            reconciled_at TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_match_counts (
+            user_id TEXT PRIMARY KEY,
+            matches INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """)
+    reconcile_global_stats(cursor)
+
+def migrate_archived_season(cursor):
+    # init_database adds the column before any migration can rebuild aggregates
+    cursor.execute("PRAGMA table_info(matches)")
+    if 'archived_season' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE matches ADD COLUMN archived_season TEXT")
+
+def migrate_schema_backfills(cursor):
+    # Progress of the chunked data backfills, so a restart resumes where the last run stopped
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_backfills (
+            name TEXT PRIMARY KEY,
+            position TEXT NOT NULL DEFAULT '',
+            done INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+    """)
+
+def migrate_archived_rosters(cursor):
+    # Archives written before match rosters stayed live took teams and team_players
+    # with them; bring those back so the team filter of career stats sees them again
+    cursor.execute("SELECT id, archived_season FROM matches WHERE archived_season IS NOT NULL")
+    seasons = {}
+    for row in cursor.fetchall():
+        seasons.setdefault(row['archived_season'], set()).add(row['id'])
+    for season, match_ids in seasons.items():
+        path = archive_database_path(season)
+        if not os.path.exists(path):
+            continue
+        archive = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            teams = [team for team in archive.execute("SELECT id, match_id, name FROM teams")
+                     if team[1] in match_ids]
+            team_ids = {team[0] for team in teams}
+            team_players = [row for row in archive.execute(
+                "SELECT team_id, player_id, position, role FROM team_players") if row[0] in team_ids]
+        finally:
+            archive.close()
+        cursor.executemany("INSERT OR IGNORE INTO teams (id, match_id, name) VALUES (?, ?, ?)", teams)
+        cursor.executemany("""
+            INSERT OR IGNORE INTO team_players (team_id, player_id, position, role) VALUES (?, ?, ?, ?)
+        """, team_players)
+
+# Ordered list of (version, name, migration); append only, never renumber
+SCHEMA_MIGRATIONS = [
+    (1, "hot_query_indexes", migrate_hot_query_indexes),
+    (2, "match_list_indexes", migrate_match_list_indexes),
+    (3, "match_version", migrate_match_version),
+    (4, "ball_seq", migrate_ball_seq),
+    (5, "player_rosters", migrate_player_rosters),
+    (6, "player_stats", migrate_player_stats),
+    (7, "global_stats", migrate_global_stats),
+    (8, "archived_season", migrate_archived_season),
+    (9, "schema_backfills", migrate_schema_backfills),
+    (10, "archived_rosters", migrate_archived_rosters),
+]
+
+# Data backfills too slow to run inside the startup transaction. Each step
+# takes (cursor, position, limit), updates up to `limit` matches after the
+# match id `position` and returns the match ids it covered ([] when done).
+# Steps run on a background thread, one short transaction per chunk, so the
+# app keeps serving while they progress.
+BACKFILL_CHUNK_MATCHES = int(os.environ.get("BACKFILL_CHUNK_MATCHES", "100"))
+BACKFILL_PAUSE_SECONDS = float(os.environ.get("BACKFILL_PAUSE_SECONDS", "0.05"))
+
+def backfill_legal_ball_numbers(cursor, position: str, limit: int) -> list:
+    """Number the deliveries of the next matches in one ordered window pass per over.
+
+    A legal ball is the count of legal balls in its over up to and including
+    it; a wide or no-ball shares the number of the legal ball before it (1 at
+    the start of an over), which is how ingest_balls numbers new balls.
+
+    Like any other write, renumbering a match bumps its version, and the
+    renumbered balls take the new version as their seq, so cached bodies,
+    ETags and delta readers all pick the change up.
+    """
+    cursor.execute("""
+        SELECT DISTINCT match_id FROM balls WHERE match_id > ? ORDER BY match_id LIMIT ?
+    """, (position, limit))
+    match_ids = [row['match_id'] for row in cursor.fetchall()]
+    if match_ids:
+        cursor.execute("""
+            UPDATE balls SET legal_ball_number = numbered.legal_ball_number, seq = numbered.seq
+            FROM (
+                SELECT b.id, MAX(1, SUM(
+                    CASE WHEN b.extras_type IS NULL OR b.extras_type NOT IN ('wide', 'no-ball')
+                         THEN 1 ELSE 0 END
+                ) OVER (
+                    PARTITION BY b.match_id, b.innings, b.over_number
+                    ORDER BY b.ball_number, b.created_at
+                    ROWS UNBOUNDED PRECEDING
+                )) AS legal_ball_number, m.version + 1 AS seq
+                FROM balls b JOIN matches m ON m.id = b.match_id
+                WHERE b.match_id IN (SELECT value FROM json_each(?))
+            ) AS numbered
+            WHERE numbered.id = balls.id
+              AND balls.legal_ball_number != numbered.legal_ball_number
+            RETURNING balls.match_id
+        """, (json.dumps(match_ids),))
+        renumbered = sorted({row['match_id'] for row in cursor.fetchall()})
+        cursor.execute("""
+            UPDATE matches SET version = version + 1 WHERE id IN (SELECT value FROM json_each(?))
+        """, (json.dumps(renumbered),))
+    return match_ids
+
+BACKFILLS = {
+    "legal_ball_number": backfill_legal_ball_numbers,
+}
+
+def register_backfill(cursor, name: str):
+    """Queue a backfill from the start; it runs after boot (see run_backfills)"""
+    cursor.execute("""
+        INSERT INTO schema_backfills (name, total)
+        VALUES (?, (SELECT COUNT(DISTINCT match_id) FROM balls))
+        ON CONFLICT(name) DO UPDATE SET position = '', done = 0, total = excluded.total,
+                                        started_at = CURRENT_TIMESTAMP, finished_at = NULL
+    """, (name,))
+
+def run_schema_migrations(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT version FROM schema_version WHERE name = 'schema'")
+    row = cursor.fetchone()
+    current_version = row['version'] if row else 0
+
+    for version, name, migrate in SCHEMA_MIGRATIONS:
+        if version <= current_version:
+            continue
+        logger.info("Applying schema migration %s (%s)", version, name)
+        migrate(cursor)
+        cursor.execute("""
+            INSERT INTO schema_version (name, version) VALUES ('schema', ?)
+            ON CONFLICT(name) DO UPDATE SET version = excluded.version,
+                                            updated_at = CURRENT_TIMESTAMP
+        """, (version,))
+
+def check_hot_query_plans(cursor):
+    """Fail fast if any registered hot query would scan a whole table"""
+    regressions = []
+    for name, sql in HOT_QUERIES.items():
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", [None] * sql.count("?"))
+        for plan_row in cursor.fetchall():
+            detail = plan_row[3]
+            # json_each over a parameter is a scan of the bound value, not of a table
+            if (detail.startswith("SCAN ") and not detail.startswith("SCAN CONSTANT ROW")
+                    and "VIRTUAL TABLE" not in detail):
+                regressions.append(f"{name}: {detail}")
+
+    if regressions:
+        raise RuntimeError("Hot queries fell back to full scans: " + "; ".join(regressions))
+
+def database_is_current(cursor) -> bool:
+    """One query: are the schema and the seed data at (or past) this build's versions?"""
+    try:
+        cursor.execute("SELECT name, version FROM schema_version WHERE name IN ('schema', 'seed')")
+    except sqlite3.OperationalError:
+        # No schema_version table: a new database
+        return False
+    versions = {row['name']: row['version'] for row in cursor.fetchall()}
+    return (versions.get('schema', 0) >= SCHEMA_MIGRATIONS[-1][0]
+            and versions.get('seed', 0) >= SEED_VERSION)
 
 def init_database():
+    """Create or upgrade the database; an up-to-date one costs a single query.
+
+    Every worker runs this at import. Workers that find work to do serialize
+    on BEGIN IMMEDIATE and check again, so only the first one upgrades. The
+    hot query plans are checked on this slow path only, which every new
+    database (and so every test run) goes through.
+    """
     with get_db() as conn:
         cursor = conn.cursor()
+        if database_is_current(cursor):
+            return
+        cursor.execute("BEGIN IMMEDIATE")
+        if database_is_current(cursor):
+            conn.rollback()
+            return
         
         # Users table
         cursor.execute("""
@@ -231,7 +1448,6 @@ def init_database():
                 id TEXT PRIMARY KEY,
                 match_id TEXT NOT NULL,
                 name TEXT NOT NULL,
-                players TEXT NOT NULL,
                 FOREIGN KEY (match_id) REFERENCES matches(id)
             )
         """)
@@ -264,7 +1480,6 @@ def init_database():
             CREATE TABLE IF NOT EXISTS standalone_teams (
                 id TEXT PRIMARY KEY,
                 name TEXT NOT NULL,
-                players TEXT NOT NULL,
                 captain TEXT,
                 vice_captain TEXT,
                 total_matches INTEGER DEFAULT 0,
@@ -299,36 +1514,35 @@ def init_database():
                 FOREIGN KEY (match_id) REFERENCES matches(id)
             )
         """)
-        
-        # Migration: Add legal_ball_number column if it doesn't exist
+
+        # Innings aggregates, maintained incrementally alongside the balls table
+        cursor.execute("""
+            SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'innings_totals'
+        """)
+        innings_totals_exists = cursor.fetchone() is not None
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS innings_totals (
+                match_id TEXT NOT NULL,
+                innings INTEGER NOT NULL,
+                runs INTEGER NOT NULL DEFAULT 0,
+                wickets INTEGER NOT NULL DEFAULT 0,
+                extras INTEGER NOT NULL DEFAULT 0,
+                legal_balls INTEGER NOT NULL DEFAULT 0,
+                deliveries INTEGER NOT NULL DEFAULT 0,
+                current_over INTEGER NOT NULL DEFAULT 0,
+                current_ball INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (match_id, innings),
+                FOREIGN KEY (match_id) REFERENCES matches(id)
+            )
+        """)
+
+        # Migration: Add legal_ball_number column if it doesn't exist. Numbering the
+        # existing balls is left to a chunked backfill (see BACKFILLS) that runs after boot.
         cursor.execute("PRAGMA table_info(balls)")
         columns = [column[1] for column in cursor.fetchall()]
-        if 'legal_ball_number' not in columns:
+        legal_ball_numbers_missing = 'legal_ball_number' not in columns
+        if legal_ball_numbers_missing:
             cursor.execute("ALTER TABLE balls ADD COLUMN legal_ball_number INTEGER NOT NULL DEFAULT 1")
-            # Update existing records to calculate legal ball numbers
-            cursor.execute("""
-                UPDATE balls SET legal_ball_number = (
-                    SELECT COUNT(*) + 1 FROM balls b2 
-                    WHERE b2.match_id = balls.match_id 
-                    AND b2.innings = balls.innings 
-                    AND b2.over_number = balls.over_number 
-                    AND b2.id < balls.id
-                    AND (b2.extras_type IS NULL OR b2.extras_type NOT IN ('wide', 'no-ball'))
-                )
-                WHERE extras_type IS NULL OR extras_type NOT IN ('wide', 'no-ball')
-            """)
-            # For wides and no-balls, keep the same legal ball number as the previous legal ball
-            cursor.execute("""
-                UPDATE balls SET legal_ball_number = (
-                    SELECT COALESCE(MAX(b2.legal_ball_number), 1) FROM balls b2 
-                    WHERE b2.match_id = balls.match_id 
-                    AND b2.innings = balls.innings 
-                    AND b2.over_number = balls.over_number 
-                    AND b2.id < balls.id
-                    AND (b2.extras_type IS NULL OR b2.extras_type NOT IN ('wide', 'no-ball'))
-                )
-                WHERE extras_type IN ('wide', 'no-ball')
-            """)
 
         # Migration: Add legacy score columns expected by older stats views.
         cursor.execute("PRAGMA table_info(matches)")
@@ -337,8 +1551,30 @@ def init_database():
             cursor.execute("ALTER TABLE matches ADD COLUMN team1_score TEXT DEFAULT '0/0'")
         if 'team2_score' not in match_columns:
             cursor.execute("ALTER TABLE matches ADD COLUMN team2_score TEXT DEFAULT 'Yet to bat'")
+        # Ahead of the numbered migrations: every aggregate rebuild skips archived matches.
+        # Migration 8 records it, so databases from before it take this path once.
+        if 'archived_season' not in match_columns:
+            cursor.execute("ALTER TABLE matches ADD COLUMN archived_season TEXT")
+
+        # Migration: Backfill innings aggregates for databases that predate them
+        if not innings_totals_exists:
+            rebuild_innings_totals(cursor)
 
-        seed_default_teams(cursor)
+        run_schema_migrations(cursor)
+        if legal_ball_numbers_missing:
+            register_backfill(cursor, "legal_ball_number")
+        check_hot_query_plans(cursor)
+
+        cursor.execute("SELECT version FROM schema_version WHERE name = 'seed'")
+        row = cursor.fetchone()
+        if (row['version'] if row else 0) < SEED_VERSION:
+            logger.info("Seeding default teams (seed version %s)", SEED_VERSION)
+            seed_default_teams(cursor)
+            cursor.execute("""
+                INSERT INTO schema_version (name, version) VALUES ('seed', ?)
+                ON CONFLICT(name) DO UPDATE SET version = excluded.version,
+                                                updated_at = CURRENT_TIMESTAMP
+            """, (SEED_VERSION,))
         
         conn.commit()
 
@@ -377,6 +1613,7 @@ class MatchCreate(BaseModel):
     batting_first: Optional[str] = Field(default=None, alias="battingFirst")
 
 class BallScore(BaseModel):
+    id: Optional[str] = Field(None, min_length=1, max_length=64)
     match_id: str
     innings: int
     over_number: int
@@ -391,6 +1628,9 @@ class BallScore(BaseModel):
     wicket_player: Optional[str] = None
     commentary: Optional[str] = None
 
+class BallBatch(BaseModel):
+    balls: List[BallScore] = Field(..., min_length=1, max_length=BALL_BATCH_MAX)
+
 class MatchStatus(BaseModel):
     status: str
 
@@ -419,163 +1659,689 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def credentials_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def verify_token(token: str) -> dict:
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        return username
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except jwt.PyJWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise credentials_error()
+    if payload.get("sub") is None:
+        raise credentials_error()
+    return payload
 
-# API Routes
-@app.get("/")
-def root():
-    return {"message": "Cricklytics API is running!"}
+class AuthenticatedUser(NamedTuple):
+    id: str
+    username: str
+    role: str
 
-@app.post("/api/register", response_model=Token)
-def register(user: UserRegister):
-    if user.password != user.confirm_password:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Passwords do not match"
-        )
+# Authenticated user cache: skips the JWT decode and user lookup on every request
+AUTH_CACHE_TTL = float(os.environ.get("AUTH_CACHE_TTL", "60"))
+AUTH_CACHE_MAX_ENTRIES = int(os.environ.get("AUTH_CACHE_MAX_ENTRIES", "10000"))
 
-    with get_db() as conn:
-        cursor = conn.cursor()
-        
-        # Check if user already exists
-        cursor.execute("SELECT id FROM users WHERE username = ? OR email = ?", 
-                      (user.username, user.email))
-        if cursor.fetchone():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username or email already registered"
-            )
-        
-        # Hash password
-        password_hash = bcrypt.hashpw(user.password.encode('utf-8'), bcrypt.gensalt())
-        
-        # Create user
-        user_id = str(uuid.uuid4())
-        cursor.execute("""
-            INSERT INTO users (id, username, email, password_hash, role)
-            VALUES (?, ?, ?, ?, ?)
-        """, (user_id, user.username, user.email, password_hash.decode('utf-8'), 'scorer'))
-        seed_default_teams_for_user(cursor, user_id)
-        
-        conn.commit()
-        
-        # Create token
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": user.username}, expires_delta=access_token_expires
-        )
-        
-        return {"access_token": access_token, "token_type": "bearer"}
+class AuthCache:
+    """Short-TTL LRU of token -> AuthenticatedUser.
 
-@app.post("/api/login", response_model=Token)
-def login(user: UserLogin):
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT username, password_hash FROM users WHERE username = ?", 
-                      (user.username,))
-        db_user = cursor.fetchone()
-        
-        if not db_user or not bcrypt.checkpw(user.password.encode('utf-8'), 
-                                           db_user['password_hash'].encode('utf-8')):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect username or password",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": user.username}, expires_delta=access_token_expires
-        )
-        
-        return {"access_token": access_token, "token_type": "bearer"}
+    Entries never outlive the token's own expiry. Call invalidate_user after
+    deleting a user or changing their role; other server processes pick the
+    change up once their entries age out, or at the next admin check, which
+    reads the role from the database (see require_admin).
+    """
 
-@app.get("/api/me")
-def get_current_user(current_user: str = Depends(verify_token)):
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._tokens_by_user = {}
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, token: str) -> Optional[AuthenticatedUser]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                user, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(token)
+                    self._hits += 1
+                    return user
+                self._discard(token)
+            self._misses += 1
+            return None
+
+    def put(self, token: str, user: AuthenticatedUser, token_expires_at: Optional[float]):
+        ttl = self.ttl
+        if token_expires_at is not None:
+            ttl = min(ttl, token_expires_at - time.time())
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._discard(token)
+            self._entries[token] = (user, time.monotonic() + ttl)
+            self._tokens_by_user.setdefault(user.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: str):
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._discard(token)
+
+    def _discard(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry[0].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry[0].id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+auth_cache = AuthCache(AUTH_CACHE_TTL, AUTH_CACHE_MAX_ENTRIES)
+
+def invalidate_user(user_id: str):
+    """Drop cached sessions of a user that was deleted or changed role"""
+    auth_cache.invalidate_user(user_id)
+
+def resolve_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> AuthenticatedUser:
+    token = credentials.credentials
+    user = auth_cache.get(token)
+    if user is not None:
+        return user
+
+    payload = verify_token(token)
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT id, username, email, role FROM users WHERE username = ?", 
-                      (current_user,))
-        user = cursor.fetchone()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        return dict(user)
+        # Tokens issued before the uid claim only carry the username
+        if payload.get("uid"):
+            cursor.execute("SELECT id, username, role FROM users WHERE id = ?", (payload["uid"],))
+        else:
+            cursor.execute("SELECT id, username, role FROM users WHERE username = ?",
+                           (payload["sub"],))
+        user_row = cursor.fetchone()
+    if not user_row:
+        raise HTTPException(status_code=404, detail="User not found")
 
-@app.get("/api/stats/global")
-def get_global_stats():
-    """Get global platform statistics"""
+    user = AuthenticatedUser(user_row['id'], user_row['username'], user_row['role'])
+    auth_cache.put(token, user, payload.get("exp"))
+    return user
+
+def require_admin(current_user: AuthenticatedUser = Depends(resolve_current_user)) -> AuthenticatedUser:
+    """Operational endpoints are for admins; grant the role with `python server.py grant-admin`.
+
+    The role is read again instead of trusted from the auth cache, since the
+    CLI changes it from another process. A role that changed drops the user's
+    cached sessions, so the rest of the API sees it from the next request.
+    """
     with get_db() as conn:
         cursor = conn.cursor()
-        
-        # Get total matches
-        cursor.execute("SELECT COUNT(*) as count FROM matches")
-        total_matches = cursor.fetchone()['count']
-        
-        # Get total legal balls from the ball-by-ball scoring table
-        cursor.execute("""
-            SELECT COUNT(*) as count
-            FROM balls
-            WHERE extras_type IS NULL OR extras_type NOT IN ('wide', 'no-ball')
-        """)
-        total_balls = cursor.fetchone()['count']
-        
-        # Get total runs from ball-by-ball data
-        cursor.execute("""
-            SELECT COALESCE(SUM(runs + extras), 0) as total_runs
-            FROM balls
-        """)
-        total_runs = cursor.fetchone()['total_runs'] or 0
-        
-        # Get active users (users who have created matches)
-        cursor.execute("SELECT COUNT(DISTINCT created_by) as count FROM matches")
-        active_users = cursor.fetchone()['count']
-        
-        return {
-            "totalMatches": total_matches,
-            "totalBalls": total_balls,
-            "totalRuns": total_runs,
-            "activeUsers": active_users
-        }
+        cursor.execute("SELECT role FROM users WHERE id = ?", (current_user.id,))
+        user_row = cursor.fetchone()
+    role = user_row['role'] if user_row else None
+    if role != current_user.role:
+        invalidate_user(current_user.id)
+    if role != 'admin':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user._replace(role=role)
 
-@app.post("/api/matches")
-def create_match(match: MatchCreate, current_user: str = Depends(verify_token)):
+# Read-endpoint result cache
+MATCH_CACHE_MAX_BYTES = int(os.environ.get("MATCH_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+MATCH_CACHE_MAX_ENTRIES = int(os.environ.get("MATCH_CACHE_MAX_ENTRIES", "4096"))
+
+class MatchResultCache:
+    """Bounded LRU of rendered match read responses.
+
+    Keys are (endpoint, match_id, match_version, *params). Every write path
+    bumps matches.version in the same transaction as the change, so a
+    reader can only ever look up the entry for the version it just read and
+    stale entries are simply never hit again; they age out of the LRU.
+    """
+
+    def __init__(self, max_bytes: int, max_entries: int):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return body
+
+    def put(self, key, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = body
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._evictions += 1
+
+    def invalidate_match(self, match_id: str):
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == match_id]:
+                self._bytes -= len(self._entries.pop(key))
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+match_cache = MatchResultCache(MATCH_CACHE_MAX_BYTES, MATCH_CACHE_MAX_ENTRIES)
+
+def bump_match_version(cursor, match_id: str) -> Optional[int]:
+    """Mark a match as changed; call in the same transaction as the write.
+
+    Returns the new version, which also serves as the seq of a ball written
+    or deleted in that transaction.
+    """
+    cursor.execute("UPDATE matches SET version = version + 1 WHERE id = ? RETURNING version",
+                   (match_id,))
+    row = cursor.fetchone()
+    return row['version'] if row else None
+
+def ensure_match_writable(match):
+    """Archived matches are read-only until restored into the live database"""
+    if match['archived_season'] is not None:
+        raise HTTPException(status_code=409, detail="Match is archived and read-only")
+
+def has_non_finite_float(value) -> bool:
+    if isinstance(value, float):
+        return not math.isfinite(value)
+    if isinstance(value, dict):
+        return any(map(has_non_finite_float, value.values()))
+    if isinstance(value, (list, tuple)):
+        return any(map(has_non_finite_float, value))
+    return False
+
+def render_json(content) -> bytes:
+    """Compact UTF-8 JSON, decoding to the same values as FastAPI's JSONResponse.
+
+    The bytes can differ between encoders: orjson spells some floats
+    differently (1e16 where the standard library writes 1e+16). Both reject
+    NaN and infinity, and integers too wide for orjson go through the
+    standard library.
+    """
+    started = time.perf_counter()
+    body = None
+    if JSON_ENCODER == "orjson":
+        # orjson would quietly write NaN and infinity as null
+        if has_non_finite_float(content):
+            raise ValueError("Out of range float values are not JSON compliant")
+        try:
+            # Innings scores are keyed by number; the standard encoder turns those keys into strings too
+            body = orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            pass
+    if body is None:
+        body = json.dumps(content, ensure_ascii=False, allow_nan=False,
+                          separators=(",", ":")).encode("utf-8")
+    add_json_encode_time(time.perf_counter() - started)
+    return body
+
+class MatchJSONResponse(JSONResponse):
+    """JSONResponse rendered through render_json, for the large match payloads"""
+
+    def render(self, content) -> bytes:
+        return render_json(content)
+
+def match_etag(match_id: str, version: int, pending_generation: int = 0) -> str:
+    if pending_generation:
+        return f'"{match_id}.{version}.p{pending_generation}"'
+    return f'"{match_id}.{version}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # If-None-Match uses weak comparison, so a W/ prefix still matches
+    return "*" in candidates or any(
+        candidate.removeprefix("W/") == etag for candidate in candidates
+    )
+
+def read_match_body(cursor, endpoint: str, match_id: str, build, params: tuple,
+                    if_none_match: Optional[str] = None):
+    """Rendered JSON for a match read endpoint, served from cache when unchanged.
+
+    Returns (etag, body). body is None when if_none_match already names the
+    current version; in that case the balls table is never read. The score and
+    ball list also show balls the scoring pipeline has queued but not yet
+    committed, with a null seq; they come again with their seq once committed.
+    """
+    merge_pending = PENDING_BALL_MERGES.get(endpoint)
+    # Read the version and the payload from one snapshot so they always agree
+    with pending_balls.lock if merge_pending else nullcontext():
+        cursor.execute("BEGIN")
+        cursor.execute("SELECT version, archived_season FROM matches WHERE id = ?", (match_id,))
+        match = cursor.fetchone()
+        generation, pending = pending_balls.snapshot(match_id) if merge_pending else (0, [])
+    if match is None:
+        return None, render_json(build(cursor, match_id, *params))
+    version = match['version']
+
+    etag = match_etag(match_id, version, generation)
+    if etag_matches(if_none_match, etag):
+        return etag, None
+
+    key = (endpoint, match_id, version, generation) + params
+    body = match_cache.get(key)
+    if body is None:
+        data = build(match_data_cursor(cursor, match['archived_season']), match_id, *params)
+        if pending:
+            data = merge_pending(data, pending, *params)
+        body = render_json(data)
+        match_cache.put(key, body)
+    return etag, body
+
+def cached_match_body(endpoint: str, match_id: str, build, *params,
+                      if_none_match: Optional[str] = None):
+    with get_db() as conn:
+        return read_match_body(conn.cursor(), endpoint, match_id, build, params, if_none_match)
+
+async def match_read_response(request: Request, endpoint: str, match_id: str, build,
+                              *params) -> Response:
+    etag, body = await db_read(read_match_body, endpoint, match_id, build, params,
+                               request.headers.get("if-none-match"))
+    if etag is None:
+        return Response(content=body, media_type="application/json")
+
+    # no-cache: clients may store the body but must revalidate it on every poll
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if body is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# Live score streaming
+SSE_HEARTBEAT_SECONDS = float(os.environ.get("SSE_HEARTBEAT_SECONDS", "15"))
+SSE_QUEUE_SIZE = int(os.environ.get("SSE_QUEUE_SIZE", "64"))
+
+def format_sse(event: str, data) -> str:
+    # Bodies already rendered for the read cache are sent as-is
+    payload = data.decode('utf-8') if isinstance(data, bytes) else json.dumps(data, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+class MatchBroadcaster:
+    """In-process fan-out of live score events to every stream watching a match.
+
+    Publishers run in worker threads (sync route handlers); subscribers are
+    asyncio queues owned by the event loop. Each event is serialized once and
+    the same payload is handed to all subscribers.
+    """
+
+    RESYNC = object()
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._loop = None
+
+    def subscribe(self, match_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscribers.setdefault(match_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, match_id: str, queue: asyncio.Queue):
+        with self._lock:
+            queues = self._subscribers.get(match_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[match_id]
+
+    def has_subscribers(self, match_id: str) -> bool:
+        return match_id in self._subscribers
+
+    def subscriber_count(self, match_id: str) -> int:
+        return len(self._subscribers.get(match_id, ()))
+
+    def publish(self, match_id: str, event: str, data):
+        if not self.has_subscribers(match_id) or self._loop is None:
+            return
+        payload = format_sse(event, data)
+        try:
+            self._loop.call_soon_threadsafe(self._deliver, match_id, payload)
+        except RuntimeError:
+            # Event loop already closed (shutdown)
+            pass
+
+    def _deliver(self, match_id: str, payload: str):
+        with self._lock:
+            queues = list(self._subscribers.get(match_id, ()))
+        for queue in queues:
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog and make it start over from a snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.RESYNC)
+
+broadcaster = MatchBroadcaster(SSE_QUEUE_SIZE)
+
+def publish_balls_scored(cursor, match_id: str, seq: int,
+                         background_tasks: Optional[BackgroundTasks]):
+    """Push the balls committed at `seq` as small deltas instead of the full ball list"""
+    if not broadcaster.has_subscribers(match_id):
+        return
+
+    innings_scores, current_over = get_innings_scores(cursor, match_id)
+    for ball in load_ball_log(cursor, match_id, BALLS_AT_SEQ_SQL, seq).as_dicts():
+        broadcaster.publish(match_id, "ball", {
+            "ball_id": ball['id'],
+            "seq": seq,
+            "ball": ball,
+            "innings_scores": innings_scores,
+            "current_over": current_over,
+        })
+    if background_tasks is None:
+        publish_match_statistics(match_id)
+    else:
+        background_tasks.add_task(publish_match_statistics, match_id)
+
+def publish_ball_deleted(cursor, match_id: str, ball_id: str, seq: int,
+                         background_tasks: BackgroundTasks):
+    if not broadcaster.has_subscribers(match_id):
+        return
+
+    data = {"ball_id": ball_id, "seq": seq}
+    data["innings_scores"], data["current_over"] = get_innings_scores(cursor, match_id)
+    broadcaster.publish(match_id, "ball_deleted", data)
+    background_tasks.add_task(publish_match_statistics, match_id)
+
+def publish_match_statistics(match_id: str):
+    """Compute statistics once per change and push them to every viewer"""
+    if not broadcaster.has_subscribers(match_id):
+        return
+    try:
+        _, statistics = cached_match_body("statistics", match_id, build_match_statistics)
+    except (HTTPException, PoolTimeout):
+        return
+    broadcaster.publish(match_id, "statistics", statistics)
+
+# API Routes
+@app.get("/")
+def root():
+    return {"message": "Cricklytics API is running!"}
+
+def auth_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is busy, please retry shortly",
+        headers={"Retry-After": BCRYPT_RETRY_AFTER},
+    )
+
+def issue_access_token(user_id: str, username: str) -> dict:
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": username, "uid": user_id}, expires_delta=access_token_expires
+    )
+    return {"access_token": access_token, "token_type": "bearer"}
+
+def find_registered_user(username: str, email: str) -> bool:
     with get_db() as conn:
         cursor = conn.cursor()
-        
-        # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (current_user,))
-        user_row = cursor.fetchone()
-        if not user_row:
+        cursor.execute("SELECT id FROM users WHERE username = ? OR email = ?",
+                      (username, email))
+        return cursor.fetchone() is not None
+
+def insert_user(username: str, email: str, password_hash: str) -> str:
+    with get_db() as conn:
+        cursor = conn.cursor()
+        user_id = str(uuid.uuid4())
+        try:
+            cursor.execute("""
+                INSERT INTO users (id, username, email, password_hash, role)
+                VALUES (?, ?, ?, ?, ?)
+            """, (user_id, username, email, password_hash, 'scorer'))
+        except sqlite3.IntegrityError:
+            # Registered by a concurrent request while the password was hashing
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Username or email already registered"
+            )
+        seed_default_teams(cursor, user_id)
+
+        conn.commit()
+        return user_id
+
+def find_login_user(username: str):
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, password_hash FROM users WHERE username = ?", (username,))
+        return cursor.fetchone()
+
+@app.post("/api/register", response_model=Token)
+@query_budget(12)
+async def register(user: UserRegister):
+    if user.password != user.confirm_password:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Passwords do not match"
+        )
+
+    # Check if user already exists
+    if await run_in_threadpool(find_registered_user, user.username, user.email):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username or email already registered"
+        )
+
+    # Hash password
+    try:
+        password_hash = await password_hasher.hash(user.password)
+    except PasswordHasherBusy:
+        raise auth_busy()
+
+    # Create user
+    user_id = await run_in_threadpool(insert_user, user.username, user.email, password_hash)
+
+    return issue_access_token(user_id, user.username)
+
+@app.post("/api/login", response_model=Token)
+@query_budget(2)
+async def login(user: UserLogin):
+    db_user = await run_in_threadpool(find_login_user, user.username)
+
+    try:
+        valid = db_user is not None and await password_hasher.verify(user.password,
+                                                                     db_user['password_hash'])
+    except PasswordHasherBusy:
+        raise auth_busy()
+
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return issue_access_token(db_user['id'], user.username)
+
+@app.get("/api/me")
+@query_budget(2)
+def get_current_user(current_user: AuthenticatedUser = Depends(resolve_current_user)):
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, username, email, role FROM users WHERE id = ?",
+                      (current_user.id,))
+        user = cursor.fetchone()
+        if not user:
             raise HTTPException(status_code=404, detail="User not found")
+        return dict(user)
+
+@app.get("/api/db/pool")
+def get_db_pool_stats(current_user: AuthenticatedUser = Depends(require_admin)):
+    """Connection pool usage, for sizing against the worker/threadpool settings"""
+    return get_pool().stats()
+
+@app.get("/api/auth/hasher")
+def get_password_hasher_stats(current_user: AuthenticatedUser = Depends(require_admin)):
+    """Backlog and rejection counters of the password hashing pool"""
+    return password_hasher.stats()
+
+@app.get("/api/auth/cache")
+def get_auth_cache_stats(current_user: AuthenticatedUser = Depends(require_admin)):
+    """Hit/miss counters of the authenticated user cache"""
+    return auth_cache.stats()
+
+@app.get("/api/db/async")
+def get_async_db_stats(current_user: AuthenticatedUser = Depends(require_admin)):
+    """Reader/writer threads behind the async routes"""
+    return database.stats()
+
+@app.get("/api/scoring/pipeline")
+def get_scoring_pipeline_stats(current_user: AuthenticatedUser = Depends(require_admin)):
+    """Queue depth and group-commit counters when SCORING_MODE=pipeline"""
+    pipeline = get_scoring_pipeline()
+    if pipeline is None:
+        return {"mode": SCORING_MODE}
+    return {"mode": SCORING_MODE, **pipeline.stats()}
+
+@app.get("/api/cache/stats")
+def get_cache_stats(current_user: AuthenticatedUser = Depends(require_admin)):
+    """Hit/miss/eviction counters of the match read cache"""
+    return match_cache.stats()
+
+@app.get("/api/compression/stats")
+def get_compression_stats(current_user: AuthenticatedUser = Depends(require_admin)):
+    """What response compression saved, and the JSON encoder in use"""
+    return {**compression_cache.stats(), "minimum_size": COMPRESSION_MIN_SIZE,
+            "json_encoder": JSON_ENCODER}
+
+db_pool_connections = metrics_registry.gauge(
+    "cricklytics_db_pool_connections", "Pooled SQLite connections by state", ("state",))
+
+def collect_pool_metrics():
+    pool = get_pool().stats()
+    db_pool_connections.set(pool["checked_out"], ("checked_out",))
+    db_pool_connections.set(pool["idle"], ("idle",))
+
+metrics_registry.on_scrape(collect_pool_metrics)
+
+if METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def get_metrics():
+        """Prometheus text exposition of the request, SQL and pool metrics"""
+        return Response(content=metrics_registry.render(),
+                        media_type="text/plain; version=0.0.4; charset=utf-8")
+
+GLOBAL_STATS_MAX_AGE = int(os.environ.get("GLOBAL_STATS_MAX_AGE", "10"))
+GLOBAL_STATS_RECONCILE_SECONDS = float(os.environ.get("GLOBAL_STATS_RECONCILE_SECONDS", "3600"))
+
+# (expires_at, rendered body) of the last /api/stats/global response
+global_stats_body = (0.0, None)
+global_stats_lock = threading.Lock()
+
+def read_global_stats() -> dict:
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM global_stats WHERE id = 1")
+        counters = cursor.fetchone()
+    return {
+        "totalMatches": counters['total_matches'],
+        "totalBalls": counters['total_balls'],
+        "totalRuns": counters['total_runs'],
+        "activeUsers": counters['active_users']
+    }
+
+@app.get("/api/stats/global")
+@query_budget(2)
+def get_global_stats():
+    """Get global platform statistics.
+
+    Read from the counters row that the write paths maintain, and held in
+    memory for GLOBAL_STATS_MAX_AGE seconds, which is also what clients and
+    proxies are told they may cache it for.
+    """
+    global global_stats_body
+    expires_at, body = global_stats_body
+    now = time.monotonic()
+    if body is None or now >= expires_at:
+        with global_stats_lock:
+            expires_at, body = global_stats_body
+            if body is None or now >= expires_at:
+                body = render_json(read_global_stats())
+                global_stats_body = (now + GLOBAL_STATS_MAX_AGE, body)
+    return Response(content=body, media_type="application/json",
+                    headers={"Cache-Control": f"public, max-age={GLOBAL_STATS_MAX_AGE}"})
+
+global_stats_reconciler_stop = threading.Event()
+
+def reconcile_global_stats_periodically():
+    """Background safety net: correct any drift in the counters with a full recount"""
+    while not global_stats_reconciler_stop.wait(GLOBAL_STATS_RECONCILE_SECONDS):
+        try:
+            with get_db() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                drift = reconcile_global_stats(cursor)
+                conn.commit()
+            if drift:
+                logger.warning("Global stats counters drifted, corrected by %s", drift)
+        except (sqlite3.Error, PoolTimeout):
+            logger.exception("Global stats reconciliation failed")
+
+@app.post("/api/matches")
+@query_budget(10)
+def create_match(match: MatchCreate, current_user: AuthenticatedUser = Depends(resolve_current_user)):
+    with get_db() as conn:
+        cursor = conn.cursor()
         
-        user_id = user_row['id']
+        user_id = current_user.id
         
         # Validate that both teams exist in the standalone teams table
-        cursor.execute("SELECT * FROM standalone_teams WHERE name = ?", (match.team1,))
-        team1_data = cursor.fetchone()
-        if not team1_data:
-            raise HTTPException(status_code=404, detail=f"Team '{match.team1}' not found")
-        
-        cursor.execute("SELECT * FROM standalone_teams WHERE name = ?", (match.team2,))
-        team2_data = cursor.fetchone()
-        if not team2_data:
-            raise HTTPException(status_code=404, detail=f"Team '{match.team2}' not found")
+        cursor.execute("SELECT name, id FROM standalone_teams WHERE name IN (?, ?) ORDER BY rowid",
+                       (match.team1, match.team2))
+        source_team_ids = {}
+        for row in cursor.fetchall():
+            source_team_ids.setdefault(row['name'], row['id'])
+        for team_name in (match.team1, match.team2):
+            if team_name not in source_team_ids:
+                raise HTTPException(status_code=404, detail=f"Team '{team_name}' not found")
         
         match_id = str(uuid.uuid4())
         
@@ -587,6 +2353,8 @@ def create_match(match: MatchCreate, current_user: str = Depends(verify_token)):
         """, (match_id, match.name, match.date, match.venue, match.match_type,
               match.team1, match.team2, match.toss_winner, match.toss_decision,
               match.batting_first, user_id))
+        add_to_global_stats(cursor, matches=1)
+        count_match_for_creator(cursor, user_id)
         
         # Create teams in the match-specific teams table (for match context)
         team1_id = str(uuid.uuid4())
@@ -594,14 +2362,11 @@ def create_match(match: MatchCreate, current_user: str = Depends(verify_token)):
         
         # Copy team data from standalone teams
         cursor.execute("""
-            INSERT INTO teams (id, match_id, name, players)
-            VALUES (?, ?, ?, ?)
-        """, (team1_id, match_id, match.team1, team1_data['players']))
-        
-        cursor.execute("""
-            INSERT INTO teams (id, match_id, name, players)
-            VALUES (?, ?, ?, ?)
-        """, (team2_id, match_id, match.team2, team2_data['players']))
+            INSERT INTO teams (id, match_id, name)
+            VALUES (?, ?, ?), (?, ?, ?)
+        """, (team1_id, match_id, match.team1, team2_id, match_id, match.team2))
+        copy_team_rosters(cursor, [(source_team_ids[match.team1], team1_id),
+                                   (source_team_ids[match.team2], team2_id)])
         
         # Update team usage count in standalone teams
         cursor.execute("""
@@ -610,35 +2375,111 @@ def create_match(match: MatchCreate, current_user: str = Depends(verify_token)):
             WHERE name IN (?, ?)
         """, (match.team1, match.team2))
         
-        # Add match usage record
+        # Add match usage records
         cursor.execute("""
             INSERT INTO team_match_usage (id, team_name, match_id, match_name)
-            VALUES (lower(hex(randomblob(16))), ?, ?, ?)
-        """, (match.team1, match_id, match.name))
-        
-        cursor.execute("""
-            INSERT INTO team_match_usage (id, team_name, match_id, match_name)
-            VALUES (lower(hex(randomblob(16))), ?, ?, ?)
-        """, (match.team2, match_id, match.name))
+            VALUES (lower(hex(randomblob(16))), ?, ?, ?), (lower(hex(randomblob(16))), ?, ?, ?)
+        """, (match.team1, match_id, match.name, match.team2, match_id, match.name))
         
         conn.commit()
         
         return {"message": "Match created successfully", "match_id": match_id}
 
-@app.get("/api/matches")
-def get_matches():
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT m.*, u.username as created_by_name
-            FROM matches m
-            LEFT JOIN users u ON m.created_by = u.id
-            ORDER BY m.created_at DESC
-        """)
-        matches = [dict(row) for row in cursor.fetchall()]
-        return matches
+def encode_matches_cursor(created_at: str, match_id: str) -> str:
+    raw = json.dumps([created_at, match_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_matches_cursor(cursor_token: str):
+    try:
+        created_at, match_id = json.loads(base64.urlsafe_b64decode(cursor_token.encode('ascii')))
+        return str(created_at), str(match_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def fetch_matches_page(cursor, conditions: list, params: list) -> list:
+    cursor.execute(matches_page_sql(conditions), params)
+    return [dict(row) for row in cursor.fetchall()]
+
+def match_list_conditions(status: Optional[str], created_by: Optional[str], team: Optional[str],
+                          match_type: Optional[str], date_from: Optional[str], date_to: Optional[str]):
+    """WHERE conditions and their parameters for the match list filters"""
+    conditions = []
+    params = []
 
-@app.get("/api/matches/{match_id}")
+    if status:
+        conditions.append("m.status = ?")
+        params.append(status)
+    if created_by:
+        conditions.append("m.created_by = ?")
+        params.append(created_by)
+    if team:
+        conditions.append("(m.team1 = ? OR m.team2 = ?)")
+        params.extend([team, team])
+    if match_type:
+        conditions.append("m.match_type = ?")
+        params.append(match_type)
+    if date_from:
+        conditions.append("m.date >= ?")
+        params.append(date_from)
+    if date_to:
+        conditions.append("m.date <= ?")
+        params.append(date_to)
+    return conditions, params
+
+@app.get("/api/matches", response_class=MatchJSONResponse)
+@query_budget(2)
+async def get_matches(
+    status: Optional[str] = None,
+    created_by: Optional[str] = None,
+    team: Optional[str] = None,
+    match_type: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+):
+    """Every matching match, newest first, as a plain list.
+
+    Kept for existing clients; new ones should page through /api/v2/matches.
+    """
+    conditions, params = match_list_conditions(status, created_by, team, match_type, date_from, date_to)
+    # LIMIT -1 is no limit in SQLite
+    return MatchJSONResponse(await db_read(fetch_matches_page, conditions, params + [-1]))
+
+@app.get("/api/v2/matches", response_class=MatchJSONResponse)
+@query_budget(2)
+async def get_matches_page(
+    status: Optional[str] = None,
+    created_by: Optional[str] = None,
+    team: Optional[str] = None,
+    match_type: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    limit: int = Query(default=MATCHES_PAGE_SIZE, ge=1, le=MATCHES_PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+):
+    """Matches newest first, paginated by keyset on (created_at, id).
+
+    Returns {"matches", "next_cursor"}; pass next_cursor back as ?cursor= for
+    the following page. It is null on the last page.
+    """
+    conditions, params = match_list_conditions(status, created_by, team, match_type, date_from, date_to)
+    if cursor:
+        cursor_created_at, cursor_id = decode_matches_cursor(cursor)
+        conditions.append(MATCHES_KEYSET_CONDITION)
+        params.extend([cursor_created_at, cursor_id])
+
+    # Fetch one extra row to know whether another page exists
+    matches = await db_read(fetch_matches_page, conditions, params + [limit + 1])
+
+    next_cursor = None
+    if len(matches) > limit:
+        matches = matches[:limit]
+        last = matches[-1]
+        next_cursor = encode_matches_cursor(last['created_at'], last['id'])
+
+    return MatchJSONResponse({"matches": matches, "next_cursor": next_cursor})
+
+@app.get("/api/matches/{match_id}", response_class=MatchJSONResponse)
+@query_budget(3)
 def get_match(match_id: str):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -648,16 +2489,18 @@ def get_match(match_id: str):
             raise HTTPException(status_code=404, detail="Match not found")
         
         # Get teams
-        cursor.execute("SELECT * FROM teams WHERE match_id = ?", (match_id,))
-        teams = [dict(row) for row in cursor.fetchall()]
+        data_cursor = match_data_cursor(cursor, match['archived_season'])
+        data_cursor.execute(MATCH_TEAMS_SQL, (match_id,))
+        teams = [dict(row) for row in data_cursor.fetchall()]
         
         match_dict = dict(match)
         match_dict['teams'] = teams
         
-        return match_dict
+        return MatchJSONResponse(match_dict)
 
 @app.patch("/api/matches/{match_id}/start")
-def start_match(match_id: str, current_user: str = Depends(verify_token)):
+@query_budget(4)
+def start_match(match_id: str, current_user: AuthenticatedUser = Depends(resolve_current_user)):
     with get_db() as conn:
         cursor = conn.cursor()
         
@@ -666,15 +2509,20 @@ def start_match(match_id: str, current_user: str = Depends(verify_token)):
         match = cursor.fetchone()
         if not match:
             raise HTTPException(status_code=404, detail="Match not found")
+        ensure_match_writable(match)
         
         # Update match status
         cursor.execute("UPDATE matches SET status = 'live' WHERE id = ?", (match_id,))
+        bump_match_version(cursor, match_id)
         conn.commit()
+        broadcaster.publish(match_id, "status", {"status": "live"})
         
         return {"message": "Match started successfully"}
 
 @app.patch("/api/matches/{match_id}/status")
-def update_match_status(match_id: str, status: str, current_user: str = Depends(verify_token)):
+@query_budget(4)
+def update_match_status(match_id: str, status: str, current_user: AuthenticatedUser = Depends(resolve_current_user)):
+    drain_scoring_pipeline()
     with get_db() as conn:
         cursor = conn.cursor()
         
@@ -688,25 +2536,39 @@ def update_match_status(match_id: str, status: str, current_user: str = Depends(
         match = cursor.fetchone()
         if not match:
             raise HTTPException(status_code=404, detail="Match not found")
+        ensure_match_writable(match)
         
         # Update match status
         cursor.execute("UPDATE matches SET status = ? WHERE id = ?", (status, match_id))
+        bump_match_version(cursor, match_id)
         conn.commit()
+        broadcaster.publish(match_id, "status", {"status": status})
         
         return {"message": f"Match status updated to {status}"}
 
+def build_match_teams(cursor, match_id: str):
+    cursor.execute(MATCH_TEAMS_SQL, (match_id,))
+    teams = [dict(row) for row in cursor.fetchall()]
+    cursor.execute(MATCH_TEAM_ROSTERS_SQL, (match_id,))
+    rosters = group_rosters(cursor.fetchall())
+    for team in teams:
+        team["players"] = rosters.get(team["id"], [])
+    return teams
+
 @app.get("/api/matches/{match_id}/teams")
-def get_match_teams(match_id: str):
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM teams WHERE match_id = ?", (match_id,))
-        teams = [dict(row) for row in cursor.fetchall()]
-        return teams
+@query_budget(5)
+async def get_match_teams(match_id: str, request: Request):
+    return await match_read_response(request, "teams", match_id, build_match_teams)
 
 @app.get("/api/matches/{match_id}/state")
+@query_budget(3)
 def get_match_state(match_id: str):
     with get_db() as conn:
         cursor = conn.cursor()
+        cursor.execute("SELECT archived_season FROM matches WHERE id = ?", (match_id,))
+        match = cursor.fetchone()
+        if match:
+            cursor = match_data_cursor(cursor, match['archived_season'])
         cursor.execute("SELECT * FROM match_state WHERE match_id = ?", (match_id,))
         state = cursor.fetchone()
         if state:
@@ -723,10 +2585,16 @@ def get_match_state(match_id: str):
             }
 
 @app.post("/api/matches/{match_id}/state")
-def update_match_state(match_id: str, state: MatchState, current_user: str = Depends(verify_token)):
+@query_budget(5)
+def update_match_state(match_id: str, state: MatchState, current_user: AuthenticatedUser = Depends(resolve_current_user)):
     with get_db() as conn:
         cursor = conn.cursor()
         
+        cursor.execute("SELECT archived_season FROM matches WHERE id = ?", (match_id,))
+        match = cursor.fetchone()
+        if match:
+            ensure_match_writable(match)
+        
         # Check if state exists
         cursor.execute("SELECT match_id FROM match_state WHERE match_id = ?", (match_id,))
         existing = cursor.fetchone()
@@ -748,66 +2616,422 @@ def update_match_state(match_id: str, state: MatchState, current_user: str = Dep
                 VALUES (?, ?, ?, ?, ?, ?)
             """, (match_id, state.current_striker, state.current_non_striker, state.current_bowler,
                   state.on_strike, state.current_innings))
+        bump_match_version(cursor, match_id)
         
         conn.commit()
+        broadcaster.publish(match_id, "state", {"match_id": match_id, **state.model_dump()})
         return {"message": "Match state updated successfully"}
 
-@app.post("/api/matches/{match_id}/score")
-def add_ball_score(match_id: str, ball_data: BallScore, current_user: str = Depends(verify_token)):
-    with get_db() as conn:
-        cursor = conn.cursor()
-        
-        # Verify match exists and is live
-        cursor.execute("SELECT status FROM matches WHERE id = ?", (match_id,))
+def find_existing_balls(cursor, match_id: str, ball_ids) -> dict:
+    """Balls and this match's tombstones for the given ids, keyed by id"""
+    existing = {}
+    for start in range(0, len(ball_ids), 500):
+        chunk = ball_ids[start:start + 500]
+        placeholders = ", ".join("?" * len(chunk))
+        cursor.execute(f"""
+            SELECT id, match_id, legal_ball_number, 0 AS deleted FROM balls
+            WHERE id IN ({placeholders})
+            UNION ALL
+            SELECT ball_id, match_id, NULL, 1 FROM ball_tombstones
+            WHERE match_id = ? AND ball_id IN ({placeholders})
+        """, chunk + [match_id] + chunk)
+        existing.update((row['id'], row) for row in cursor.fetchall())
+    return existing
+
+def existing_ball_result(index: int, ball_id: str, previous, match_id: str) -> dict:
+    """The result for a delivery whose id is already taken"""
+    if previous['match_id'] != match_id:
+        return {"index": index, "ball_id": ball_id, "status": "rejected",
+                "detail": "Ball id belongs to another match"}
+    if previous['deleted']:
+        return {"index": index, "ball_id": ball_id, "status": "deleted"}
+    return {"index": index, "ball_id": ball_id, "status": "duplicate",
+            "legal_ball_number": previous['legal_ball_number']}
+
+def load_over_counts(cursor, match_id: str, balls) -> dict:
+    """(innings, over) -> [legal balls so far, highest legal ball number], for every over at once"""
+    over_keys = list(dict.fromkeys((ball.innings, ball.over_number) for ball in balls))
+    over_counts = {over_key: [0, 0] for over_key in over_keys}
+    cursor.execute(OVERS_LEGAL_BALLS_SQL, (json.dumps(over_keys), match_id))
+    for row in cursor.fetchall():
+        over_counts[row['innings'], row['over_number']] = [row['legal_balls'], row['last_legal']]
+    return over_counts
+
+def next_legal_ball_number(counts: list, extras_type: Optional[str]) -> int:
+    """Number a delivery within its over, advancing the over's counts for a legal one"""
+    if not is_legal_delivery(extras_type):
+        # Wides and no-balls share the number of the current legal ball
+        return counts[1] or 1
+    counts[0] += 1
+    counts[1] = max(counts[1], counts[0])
+    return counts[0]
+
+def ingest_balls(cursor, match_id: str, balls: List[BallScore]):
+    """Insert an ordered run of deliveries in the caller's transaction.
+
+    Legal ball numbers are worked out in memory from one lookup covering every
+    over in the batch, the rows go in with a single executemany and the match
+    version is bumped once, so every new ball shares one seq. Balls whose client-supplied id already
+    exists are skipped, which makes replaying a batch safe. So are ids this match has a tombstone
+    for, so a resent batch or a journal replay cannot bring a deleted ball back.
+
+    Returns (seq, results); seq is None when nothing new was inserted.
+    """
+    # Verify match exists and is live
+    cursor.execute("SELECT status, archived_season FROM matches WHERE id = ?", (match_id,))
+    match = cursor.fetchone()
+    if not match:
+        raise HTTPException(status_code=404, detail="Match not found")
+    ensure_match_writable(match)
+    if match['status'] != 'live':
+        raise HTTPException(status_code=400, detail="Match is not live")
+
+    existing = find_existing_balls(cursor, match_id, [ball.id for ball in balls if ball.id])
+    over_counts = load_over_counts(cursor, match_id, balls)
+
+    results = []
+    rows = []
+    new_balls = []
+    for index, ball_data in enumerate(balls):
+        ball_id = ball_data.id or str(uuid.uuid4())
+        if ball_id in existing:
+            results.append(existing_ball_result(index, ball_id, existing[ball_id], match_id))
+            continue
+
+        legal_ball_number = next_legal_ball_number(
+            over_counts[ball_data.innings, ball_data.over_number], ball_data.extras_type)
+
+        # Auto-generate commentary if none provided
+        commentary = ball_data.commentary
+        if not commentary:
+            commentary = generate_ball_commentary(ball_data)
+
+        rows.append((ball_id, match_id, ball_data.innings, ball_data.over_number,
+                     ball_data.ball_number, legal_ball_number, ball_data.batsman, ball_data.bowler,
+                     ball_data.runs, ball_data.extras, ball_data.extras_type,
+                     ball_data.wicket, ball_data.wicket_type, ball_data.wicket_player,
+                     commentary))
+        new_balls.append(ball_data.model_dump())
+        existing[ball_id] = {"match_id": match_id, "legal_ball_number": legal_ball_number, "deleted": 0}
+        results.append({"index": index, "ball_id": ball_id, "status": "created",
+                        "legal_ball_number": legal_ball_number})
+
+    if not rows:
+        return None, results
+
+    seq = bump_match_version(cursor, match_id)
+    player_ids = get_player_ids(cursor, [name for ball in new_balls
+                                         for name in ball_player_names(ball)])
+    cursor.executemany("""
+        INSERT INTO balls (id, match_id, innings, over_number, ball_number, legal_ball_number,
+                         batsman, bowler, runs, extras, extras_type, wicket,
+                         wicket_type, wicket_player, commentary, seq, batsman_id, bowler_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [row + (seq, player_ids[ball['batsman']], player_ids[ball['bowler']])
+          for row, ball in zip(rows, new_balls)])
+    add_balls_to_innings_totals(cursor, match_id, new_balls)
+    add_balls_to_player_stats(cursor, match_id, new_balls, player_ids)
+    add_to_global_stats(cursor,
+                        balls=sum(1 for ball in new_balls if is_legal_delivery(ball['extras_type'])),
+                        runs=sum(ball['runs'] + ball['extras'] for ball in new_balls))
+    for result in results:
+        if result["status"] == "created":
+            result["seq"] = seq
+    return seq, results
+
+class PendingBalls:
+    """Deliveries the scoring pipeline has acknowledged but not yet committed.
+
+    Kept per match in submit order, already numbered and shaped like ball rows,
+    so the score and ball list can show an enqueue-mode ball as soon as it is
+    acknowledged. `lock` is held while a reader opens its snapshot and takes
+    the pending balls, and while the writer commits and drops them, so every
+    ball is in exactly one of the two.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._balls = {}
+        self._owners = {}
+        self._generations = {}
+        self._generation = 0
+
+    def add(self, match_id: str, rows):
+        with self.lock:
+            balls = self._balls.setdefault(match_id, OrderedDict())
+            for row in rows:
+                balls[row['id']] = row
+                self._owners[row['id']] = match_id
+            self._touch(match_id)
+
+    def discard(self, match_id: str, ball_ids):
+        with self.lock:
+            balls = self._balls.get(match_id)
+            if not balls:
+                return
+            removed = [ball_id for ball_id in ball_ids if balls.pop(ball_id, None) is not None]
+            for ball_id in removed:
+                del self._owners[ball_id]
+            if not balls:
+                del self._balls[match_id]
+                del self._generations[match_id]
+            elif removed:
+                self._touch(match_id)
+
+    def owner(self, ball_id: str) -> Optional[str]:
+        with self.lock:
+            return self._owners.get(ball_id)
+
+    def snapshot(self, match_id: str):
+        """(generation, pending balls); the generation is 0 when nothing is pending"""
+        with self.lock:
+            balls = self._balls.get(match_id)
+            if not balls:
+                return 0, []
+            return self._generations[match_id], list(balls.values())
+
+    def _touch(self, match_id: str):
+        self._generation += 1
+        self._generations[match_id] = self._generation
+
+pending_balls = PendingBalls()
+# One submission at a time, so each is numbered after every ball queued before it
+scoring_submit_lock = threading.Lock()
+
+def pending_ball_row(match_id: str, ball: BallScore, legal_ball_number: int) -> dict:
+    """A queued delivery in the shape of its balls row; seq and player ids come with the commit"""
+    return {
+        "id": ball.id, "match_id": match_id, "innings": ball.innings,
+        "over_number": ball.over_number, "ball_number": ball.ball_number,
+        "legal_ball_number": legal_ball_number, "batsman": ball.batsman, "bowler": ball.bowler,
+        "runs": ball.runs, "extras": ball.extras, "extras_type": ball.extras_type,
+        "wicket": int(ball.wicket), "wicket_type": ball.wicket_type,
+        "wicket_player": ball.wicket_player,
+        "commentary": ball.commentary or generate_ball_commentary(ball),
+        "created_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+        "seq": None, "batsman_id": None, "bowler_id": None,
+    }
+
+def stage_pending_balls(cursor, match_id: str, payloads: List[dict]):
+    """Validate and number deliveries after everything committed or queued, and add them to the overlay.
+
+    Mirrors ingest_balls, so the writer later assigns the same legal ball
+    numbers. Returns (results, staged): a result per ball that is not new,
+    and (index, payload, legal_ball_number) for each ball that should be queued.
+    """
+    with pending_balls.lock:
+        cursor.execute("BEGIN")
+        cursor.execute("SELECT status, archived_season FROM matches WHERE id = ?", (match_id,))
         match = cursor.fetchone()
+        _, pending = pending_balls.snapshot(match_id)
+    try:
         if not match:
             raise HTTPException(status_code=404, detail="Match not found")
+        ensure_match_writable(match)
         if match['status'] != 'live':
             raise HTTPException(status_code=400, detail="Match is not live")
-        
-        # Calculate the legal ball number (counts only valid deliveries)
-        if ball_data.extras_type in ['wide', 'no-ball']:
-            # For wides and no-balls, use the same legal ball number as the current legal ball count
-            cursor.execute("""
-                SELECT COALESCE(MAX(legal_ball_number), 0) FROM balls 
-                WHERE match_id = ? AND innings = ? AND over_number = ? 
-                AND (extras_type IS NULL OR extras_type NOT IN ('wide', 'no-ball'))
-            """, (match_id, ball_data.innings, ball_data.over_number))
-            
-            legal_ball_number = cursor.fetchone()[0]
-            if legal_ball_number == 0:
-                legal_ball_number = 1  # First ball of the over
-        else:
-            # For valid deliveries, increment the legal ball count
-            cursor.execute("""
-                SELECT COUNT(*) FROM balls 
-                WHERE match_id = ? AND innings = ? AND over_number = ? 
-                AND (extras_type IS NULL OR extras_type NOT IN ('wide', 'no-ball'))
-            """, (match_id, ball_data.innings, ball_data.over_number))
-            
-            legal_balls_in_over = cursor.fetchone()[0]
-            legal_ball_number = legal_balls_in_over + 1
-        
-        # Auto-generate commentary if none provided
-        commentary = ball_data.commentary
-        if not commentary:
-            commentary = generate_ball_commentary(ball_data)
-        
-        # Insert ball data
-        ball_id = str(uuid.uuid4())
-        cursor.execute("""
-            INSERT INTO balls (id, match_id, innings, over_number, ball_number, legal_ball_number,
-                             batsman, bowler, runs, extras, extras_type, wicket, 
-                             wicket_type, wicket_player, commentary)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (ball_id, match_id, ball_data.innings, ball_data.over_number, 
-              ball_data.ball_number, legal_ball_number, ball_data.batsman, ball_data.bowler,
-              ball_data.runs, ball_data.extras, ball_data.extras_type,
-              ball_data.wicket, ball_data.wicket_type, ball_data.wicket_player,
-              commentary))
-        
-        conn.commit()
-        return {"message": "Ball scored successfully", "ball_id": ball_id}
+
+        balls = [BallScore(**payload) for payload in payloads]
+        existing = find_existing_balls(cursor, match_id, [ball.id for ball in balls])
+        over_counts = load_over_counts(cursor, match_id, balls)
+    finally:
+        cursor.connection.rollback()
+
+    # Queued balls count as if they were already in the over
+    for row in pending:
+        existing[row['id']] = {"match_id": match_id, "legal_ball_number": row['legal_ball_number'],
+                               "deleted": 0}
+        counts = over_counts.get((row['innings'], row['over_number']))
+        if counts is not None and is_legal_delivery(row['extras_type']):
+            counts[0] += 1
+            counts[1] = max(counts[1], row['legal_ball_number'])
+
+    results, staged, rows = [], [], []
+    for index, (payload, ball) in enumerate(zip(payloads, balls)):
+        owner = pending_balls.owner(ball.id)
+        if ball.id in existing or owner not in (None, match_id):
+            previous = existing.get(ball.id) or {"match_id": owner, "deleted": 0}
+            results.append(existing_ball_result(index, ball.id, previous, match_id))
+            continue
+        legal_ball_number = next_legal_ball_number(
+            over_counts[ball.innings, ball.over_number], ball.extras_type)
+        existing[ball.id] = {"match_id": match_id, "legal_ball_number": legal_ball_number,
+                             "deleted": 0}
+        rows.append(pending_ball_row(match_id, ball, legal_ball_number))
+        staged.append((index, payload, legal_ball_number))
+
+    if rows:
+        pending_balls.add(match_id, rows)
+    return results, staged
+
+def replay_into_overlay(entries):
+    """Put replayed journal entries back in the overlay before the writer commits them"""
+    by_match = OrderedDict()
+    for entry in entries:
+        by_match.setdefault(entry.match_id, []).append(entry.ball)
+    with get_db() as conn:
+        for match_id, payloads in by_match.items():
+            try:
+                stage_pending_balls(conn.cursor(), match_id, payloads)
+            except HTTPException:
+                # The writer fails these balls and dead-letters them
+                continue
+
+def discard_settled_balls(entries):
+    by_match = OrderedDict()
+    for entry in entries:
+        by_match.setdefault(entry.match_id, []).append(entry.ball.get("id"))
+    for match_id, ball_ids in by_match.items():
+        pending_balls.discard(match_id, ball_ids)
+
+scoring_pipeline = None
+scoring_pipeline_lock = threading.Lock()
+
+def get_scoring_pipeline() -> Optional[ScoringPipeline]:
+    """The running pipeline in pipeline mode, started (and replayed) on first use"""
+    global scoring_pipeline
+    if SCORING_MODE != "pipeline":
+        return None
+    with scoring_pipeline_lock:
+        if scoring_pipeline is None:
+            pipeline = ScoringPipeline(
+                SCORING_JOURNAL, flush_scoring_group,
+                durability=SCORING_DURABILITY,
+                interval=SCORING_FLUSH_INTERVAL_MS / 1000,
+                max_group=SCORING_MAX_GROUP,
+                fsync=SCORING_JOURNAL_FSYNC,
+                on_replay=replay_into_overlay,
+                on_done=discard_settled_balls,
+                retry_errors=(sqlite3.OperationalError, PoolTimeout),
+            )
+            pipeline.start()
+            scoring_pipeline = pipeline
+        return scoring_pipeline
+
+def flush_scoring_group(entries):
+    """Group commit for the pipeline writer: every queued ball in one transaction"""
+    outcomes = [None] * len(entries)
+    groups = OrderedDict()
+    for index, entry in enumerate(entries):
+        groups.setdefault(entry.match_id, []).append(index)
+
+    scored = []
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        for match_id, indices in groups.items():
+            # A match that ended or vanished only fails its own balls
+            cursor.execute("SAVEPOINT match_group")
+            try:
+                seq, results = ingest_balls(cursor, match_id,
+                                            [BallScore(**entries[i].ball) for i in indices])
+            except HTTPException as error:
+                cursor.execute("ROLLBACK TO match_group")
+                for i in indices:
+                    outcomes[i] = error
+            else:
+                for i, result in zip(indices, results):
+                    outcomes[i] = result
+                if seq is not None:
+                    scored.append((match_id, seq))
+            cursor.execute("RELEASE match_group")
+        # Readers take their snapshot under the same lock, so no ball is seen twice or missed
+        with pending_balls.lock:
+            conn.commit()
+            discard_settled_balls(entries)
+
+        for match_id, seq in scored:
+            publish_balls_scored(cursor, match_id, seq, None)
+    return outcomes
+
+def submit_to_pipeline(pipeline: ScoringPipeline, match_id: str, balls: List[BallScore]) -> list:
+    """Validate, journal and queue deliveries; returns one result per ball"""
+    # Ids are fixed before journaling so a replay can never insert a ball twice
+    payloads = [{**ball.model_dump(), "id": ball.id or str(uuid.uuid4())} for ball in balls]
+    with scoring_submit_lock:
+        with get_db() as conn:
+            results, staged = stage_pending_balls(conn.cursor(), match_id, payloads)
+        if not staged:
+            return results
+        try:
+            futures = pipeline.submit(match_id, [payload for _, payload, _ in staged])
+        except Exception:
+            pending_balls.discard(match_id, [payload["id"] for _, payload, _ in staged])
+            raise
+
+    if pipeline.durability == DURABILITY_ENQUEUE:
+        results += [{"index": index, "ball_id": payload["id"], "status": "accepted",
+                     "legal_ball_number": legal_ball_number}
+                    for index, payload, legal_ball_number in staged]
+        return sorted(results, key=lambda result: result["index"])
+
+    for (index, _, _), future in zip(staged, futures):
+        try:
+            result = future.result(SCORING_ACK_TIMEOUT)
+        except TimeoutError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Scoring is backlogged; resend with the same ball ids",
+                headers={"Retry-After": "1"},
+            )
+        results.append({**result, "index": index})
+    return sorted(results, key=lambda result: result["index"])
+
+def drain_scoring_pipeline():
+    """Let queued balls land before an edit that depends on them"""
+    pipeline = get_scoring_pipeline()
+    if pipeline is not None and not pipeline.wait_flushed(SCORING_ACK_TIMEOUT):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Scoring is backlogged, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+async def publish_balls_scored_async(match_id: str, seq: Optional[int],
+                                     background_tasks: BackgroundTasks):
+    if seq is not None and broadcaster.has_subscribers(match_id):
+        await db_read(publish_balls_scored, match_id, seq, background_tasks)
+
+@app.post("/api/matches/{match_id}/score")
+@query_budget(13)
+async def add_ball_score(match_id: str, ball_data: BallScore, background_tasks: BackgroundTasks,
+                         current_user: AuthenticatedUser = Depends(resolve_current_user)):
+    pipeline = get_scoring_pipeline()
+    if pipeline is not None:
+        result = (await run_in_threadpool(submit_to_pipeline, pipeline, match_id, [ball_data]))[0]
+        if result["status"] == "rejected":
+            raise HTTPException(status_code=409, detail=result["detail"])
+        return {"message": "Ball scored successfully", "ball_id": result["ball_id"]}
+
+    # A rejected ball writes nothing, so its commit is empty
+    seq, results = await db_write(ingest_balls, match_id, [ball_data])
+    result = results[0]
+    if result["status"] == "rejected":
+        raise HTTPException(status_code=409, detail=result["detail"])
+
+    await publish_balls_scored_async(match_id, seq, background_tasks)
+    return {"message": "Ball scored successfully", "ball_id": result["ball_id"]}
+
+@app.post("/api/matches/{match_id}/score/batch")
+@query_budget(13)
+async def add_ball_scores(match_id: str, batch: BallBatch, background_tasks: BackgroundTasks,
+                          current_user: AuthenticatedUser = Depends(resolve_current_user)):
+    """Score an ordered list of deliveries in one transaction.
+
+    Give each ball a client-generated id so a batch can be resent after a
+    dropped connection: balls already stored come back as "duplicate", and balls
+    deleted since they were stored come back as "deleted" and stay deleted.
+    """
+    pipeline = get_scoring_pipeline()
+    if pipeline is not None:
+        results = await run_in_threadpool(submit_to_pipeline, pipeline, match_id, batch.balls)
+        seqs = [result["seq"] for result in results if "seq" in result]
+        return {"message": "Balls scored successfully", "seq": max(seqs, default=None),
+                "results": results}
+
+    seq, results = await db_write(ingest_balls, match_id, batch.balls)
+    await publish_balls_scored_async(match_id, seq, background_tasks)
+    return {"message": "Balls scored successfully", "seq": seq, "results": results}
 
 def generate_ball_commentary(ball_data: BallScore) -> str:
     """Generate basic commentary for a ball"""
@@ -846,105 +3070,185 @@ def generate_ball_commentary(ball_data: BallScore) -> str:
     else:
         return f"{runs} runs! {ball_data.batsman} keeps the scoreboard ticking"
 
+def build_match_score(cursor, match_id: str, since: Optional[int] = None):
+    # Get match details
+    cursor.execute("SELECT * FROM matches WHERE id = ?", (match_id,))
+    match = cursor.fetchone()
+    if not match:
+        raise HTTPException(status_code=404, detail="Match not found")
+    
+    # Get all balls for the match, or only the delta after a known seq
+    if since is None:
+        balls = load_ball_log(cursor, match_id).as_dicts()
+    else:
+        balls, deleted = load_ball_delta(cursor, match_id, since)
+
+    # Current score by innings comes from the incrementally maintained aggregate
+    innings_scores, current_over = get_innings_scores(cursor, match_id)
+
+    # Get current match state
+    cursor.execute("SELECT * FROM match_state WHERE match_id = ?", (match_id,))
+    match_state = cursor.fetchone()
+    state_dict = dict(match_state) if match_state else {
+        "current_striker": None,
+        "current_non_striker": None,
+        "current_bowler": None,
+        "on_strike": "striker",
+        "current_innings": 1
+    }
+    
+    score = {
+        "match": dict(match),
+        "innings_scores": innings_scores,
+        "current_over": current_over,
+        "match_state": state_dict,
+        "balls": balls,
+        "seq": match['version']
+    }
+    if since is not None:
+        score["deleted"] = deleted
+    return score
+
 @app.get("/api/matches/{match_id}/score")
-def get_match_score(match_id: str):
-    with get_db() as conn:
-        cursor = conn.cursor()
-        
-        # Get match details
-        cursor.execute("SELECT * FROM matches WHERE id = ?", (match_id,))
+@query_budget(8)
+async def get_match_score(match_id: str, request: Request,
+                          since: Optional[int] = Query(None, ge=0)):
+    return await match_read_response(request, "score", match_id, build_match_score, since)
+
+@app.get("/api/matches/{match_id}/stream")
+async def stream_match(match_id: str, request: Request):
+    """Server-sent events: one snapshot on connect, then deltas as the match is scored"""
+    # Subscribe before taking the snapshot so no change can fall in between
+    queue = broadcaster.subscribe(match_id)
+    try:
+        _, snapshot = await run_in_threadpool(cached_match_body, "score", match_id,
+                                              build_match_score)
+    except (HTTPException, PoolTimeout):
+        broadcaster.unsubscribe(match_id, queue)
+        raise
+
+    async def event_stream():
+        try:
+            yield format_sse("snapshot", snapshot)
+            while True:
+                try:
+                    payload = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if payload is MatchBroadcaster.RESYNC:
+                    _, resync = await run_in_threadpool(cached_match_body, "score", match_id,
+                                                        build_match_score)
+                    yield format_sse("snapshot", resync)
+                else:
+                    yield payload
+        finally:
+            broadcaster.unsubscribe(match_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def load_ball_delta(cursor, match_id: str, since: int):
+    """Balls written after seq `since`, and ids of balls deleted after it"""
+    balls = load_ball_log(cursor, match_id, BALLS_SINCE_SQL, since).as_dicts()
+    cursor.execute(TOMBSTONES_SINCE_SQL, (match_id, since))
+    deleted = [row['ball_id'] for row in cursor.fetchall()]
+    return balls, deleted
+
+def build_match_balls(cursor, match_id: str, innings: Optional[int] = None,
+                      since: Optional[int] = None):
+    if since is not None:
+        cursor.execute("SELECT version FROM matches WHERE id = ?", (match_id,))
         match = cursor.fetchone()
         if not match:
             raise HTTPException(status_code=404, detail="Match not found")
-        
-        # Get all balls for the match
-        cursor.execute("""
-            SELECT * FROM balls WHERE match_id = ? 
-            ORDER BY innings, over_number, ball_number
-        """, (match_id,))
-        balls = [dict(row) for row in cursor.fetchall()]
-        
-        # Calculate current score by innings
-        innings_scores = {}
-        current_over = {"innings": 1, "over": 0, "ball": 0}
-        
-        for ball in balls:
-            innings = ball['innings']
-            if innings not in innings_scores:
-                innings_scores[innings] = {
-                    "runs": 0,
-                    "wickets": 0,
-                    "overs": 0,
-                    "balls": 0,
-                    "extras": 0
-                }
-            
-            innings_scores[innings]["runs"] += ball['runs'] + ball['extras']
-            innings_scores[innings]["extras"] += ball['extras']
-            
-            if ball['wicket']:
-                innings_scores[innings]["wickets"] += 1
-            
-            # Count balls (excluding wides and no-balls for over calculation)
-            if ball['extras_type'] is None or ball['extras_type'] not in ['wide', 'no-ball']:
-                innings_scores[innings]["balls"] += 1
-            
-            # Update current over info
-            if ball['innings'] >= current_over["innings"]:
-                current_over = {
-                    "innings": ball['innings'],
-                    "over": ball['over_number'],
-                    "ball": ball['ball_number']
-                }
-        
-        # Calculate overs completed
-        for innings in innings_scores:
-            total_balls = innings_scores[innings]["balls"]
-            innings_scores[innings]["overs"] = total_balls // 6
-            innings_scores[innings]["balls_in_current_over"] = total_balls % 6
-        
-        # Get current match state
-        cursor.execute("SELECT * FROM match_state WHERE match_id = ?", (match_id,))
-        match_state = cursor.fetchone()
-        state_dict = dict(match_state) if match_state else {
-            "current_striker": None,
-            "current_non_striker": None,
-            "current_bowler": None,
-            "on_strike": "striker",
-            "current_innings": 1
-        }
-        
-        return {
-            "match": dict(match),
-            "innings_scores": innings_scores,
-            "current_over": current_over,
-            "match_state": state_dict,
-            "balls": balls
-        }
+        balls, deleted = load_ball_delta(cursor, match_id, since)
+        if innings:
+            balls = [ball for ball in balls if ball['innings'] == innings]
+        return {"balls": balls, "deleted": deleted, "seq": match['version']}
+
+    query = "SELECT * FROM balls WHERE match_id = ?"
+    params = [match_id]
+    
+    if innings:
+        query += " AND innings = ?"
+        params.append(innings)
+    
+    query += " ORDER BY innings, over_number, ball_number"
+    
+    cursor.execute(query, params)
+    return [dict(row) for row in cursor.fetchall()]
+
+def ball_order(ball) -> tuple:
+    return ball['innings'], ball['over_number'], ball['ball_number']
+
+def merge_pending_score(score: dict, pending: list, since: Optional[int] = None) -> dict:
+    """Fold queued balls into a build_match_score result"""
+    balls = score["balls"] + pending
+    score["balls"] = balls if since is not None else sorted(balls, key=ball_order)
+
+    innings_scores = score["innings_scores"]
+    current_over = score["current_over"]
+    for ball in pending:
+        totals = innings_scores.setdefault(ball['innings'], {
+            "runs": 0, "wickets": 0, "overs": 0, "balls": 0, "extras": 0,
+            "balls_in_current_over": 0,
+        })
+        totals["runs"] += ball['runs'] + ball['extras']
+        totals["extras"] += ball['extras']
+        totals["wickets"] += 1 if ball['wicket'] else 0
+        if is_legal_delivery(ball['extras_type']):
+            totals["balls"] += 1
+            totals["overs"] = totals["balls"] // 6
+            totals["balls_in_current_over"] = totals["balls"] % 6
+        if ball_order(ball) >= (current_over["innings"], current_over["over"], current_over["ball"]):
+            current_over = {"innings": ball['innings'], "over": ball['over_number'],
+                            "ball": ball['ball_number']}
+    score["current_over"] = current_over
+    return score
+
+def merge_pending_balls(balls, pending: list, innings: Optional[int] = None,
+                        since: Optional[int] = None):
+    """Fold queued balls into a build_match_balls result"""
+    if innings:
+        pending = [ball for ball in pending if ball['innings'] == innings]
+    if since is not None:
+        return {**balls, "balls": balls["balls"] + pending}
+    return sorted(balls + pending, key=ball_order)
+
+# Read endpoints whose payload includes queued balls, and how to merge them in
+PENDING_BALL_MERGES = {"score": merge_pending_score, "balls": merge_pending_balls}
 
 @app.get("/api/matches/{match_id}/balls")
-def get_match_balls(match_id: str, innings: Optional[int] = None):
-    with get_db() as conn:
-        cursor = conn.cursor()
-        
-        query = "SELECT * FROM balls WHERE match_id = ?"
-        params = [match_id]
-        
-        if innings:
-            query += " AND innings = ?"
-            params.append(innings)
-        
-        query += " ORDER BY innings, over_number, ball_number"
-        
-        cursor.execute(query, params)
-        balls = [dict(row) for row in cursor.fetchall()]
-        return balls
+@query_budget(5)
+async def get_match_balls(match_id: str, request: Request, innings: Optional[int] = None,
+                          since: Optional[int] = Query(None, ge=0)):
+    """Every ball of the match, or with `since` only what changed after that seq.
+
+    The delta form is {"balls", "deleted", "seq"}: pass the returned seq as the
+    next `since`. Start a local ball log with since=0.
+    """
+    return await match_read_response(request, "balls", match_id, build_match_balls, innings, since)
 
 @app.delete("/api/matches/{match_id}/balls/{ball_id}")
-def delete_ball(match_id: str, ball_id: str, current_user: str = Depends(verify_token)):
+@query_budget(15)
+def delete_ball(match_id: str, ball_id: str, background_tasks: BackgroundTasks,
+                current_user: AuthenticatedUser = Depends(resolve_current_user)):
+    drain_scoring_pipeline()
     with get_db() as conn:
         cursor = conn.cursor()
         
+        cursor.execute("SELECT archived_season FROM matches WHERE id = ?", (match_id,))
+        match = cursor.fetchone()
+        if match:
+            ensure_match_writable(match)
+        
         # Verify ball exists and belongs to match
         cursor.execute("SELECT * FROM balls WHERE id = ? AND match_id = ?", (ball_id, match_id))
         ball = cursor.fetchone()
@@ -953,14 +3257,29 @@ def delete_ball(match_id: str, ball_id: str, current_user: str = Depends(verify_
         
         # Delete the ball
         cursor.execute("DELETE FROM balls WHERE id = ?", (ball_id,))
+        apply_ball_to_innings_totals(cursor, match_id, ball, sign=-1)
+        add_balls_to_player_stats(cursor, match_id, [ball],
+                                  get_player_ids(cursor, ball_player_names(ball)), sign=-1)
+        add_to_global_stats(cursor, balls=-1 if is_legal_delivery(ball['extras_type']) else 0,
+                            runs=-(ball['runs'] + ball['extras']))
+        seq = bump_match_version(cursor, match_id)
+        cursor.execute("""
+            INSERT INTO ball_tombstones (match_id, seq, ball_id) VALUES (?, ?, ?)
+        """, (match_id, seq, ball_id))
         conn.commit()
+        publish_ball_deleted(cursor, match_id, ball_id, seq, background_tasks)
         
         return {"message": "Ball deleted successfully"}
 
 @app.get("/api/matches/{match_id}/partnerships")
+@query_budget(3)
 def get_partnerships(match_id: str, innings: int):
     with get_db() as conn:
         cursor = conn.cursor()
+        cursor.execute("SELECT archived_season FROM matches WHERE id = ?", (match_id,))
+        match = cursor.fetchone()
+        if match:
+            cursor = match_data_cursor(cursor, match['archived_season'])
         
         # Get all balls for the innings
         cursor.execute("""
@@ -977,363 +3296,723 @@ def get_partnerships(match_id: str, innings: int):
         
         return partnerships
 
+def build_match_statistics(cursor, match_id: str):
+    # Get match details
+    cursor.execute("SELECT * FROM matches WHERE id = ?", (match_id,))
+    match = cursor.fetchone()
+    if not match:
+        raise HTTPException(status_code=404, detail="Match not found")
+
+    return statistics_view(compute_match_stats(load_ball_log(cursor, match_id)))
+
 @app.get("/api/matches/{match_id}/statistics")
-def get_match_statistics(match_id: str):
-    with get_db() as conn:
-        cursor = conn.cursor()
-        
-        # Get match details
-        cursor.execute("SELECT * FROM matches WHERE id = ?", (match_id,))
-        match = cursor.fetchone()
-        if not match:
-            raise HTTPException(status_code=404, detail="Match not found")
-        
-        # Get all balls for the match
-        cursor.execute("""
-            SELECT * FROM balls WHERE match_id = ? 
-            ORDER BY innings, over_number, ball_number
-        """, (match_id,))
-        balls = [dict(row) for row in cursor.fetchall()]
-        
-        # Calculate batting statistics
-        batting_stats = {}
-        bowling_stats = {}
-        
-        for ball in balls:
-            batsman = ball['batsman']
-            bowler = ball['bowler']
-            innings = ball['innings']
-            
-            # Initialize batting stats
-            if batsman not in batting_stats:
-                batting_stats[batsman] = {
-                    "name": batsman,
-                    "runs": 0,
-                    "balls": 0,
-                    "fours": 0,
-                    "sixes": 0,
-                    "strike_rate": 0,
-                    "innings": innings
-                }
-            
-            # Initialize bowling stats  
-            if bowler not in bowling_stats:
-                bowling_stats[bowler] = {
-                    "name": bowler,
-                    "runs_conceded": 0,
-                    "balls_bowled": 0,
-                    "wickets": 0,
-                    "economy_rate": 0,
-                    "innings": innings
-                }
-            
-            # Update batting stats
-            batting_stats[batsman]["runs"] += ball['runs']
-            if ball['extras_type'] is None or ball['extras_type'] not in ['wide', 'no-ball']:
-                batting_stats[batsman]["balls"] += 1
-            
-            if ball['runs'] == 4:
-                batting_stats[batsman]["fours"] += 1
-            elif ball['runs'] == 6:
-                batting_stats[batsman]["sixes"] += 1
-            
-            # Update bowling stats
-            bowling_stats[bowler]["runs_conceded"] += ball['runs'] + ball['extras']
-            if ball['extras_type'] is None or ball['extras_type'] not in ['wide', 'no-ball']:
-                bowling_stats[bowler]["balls_bowled"] += 1
-            
-            if ball['wicket']:
-                bowling_stats[bowler]["wickets"] += 1
-        
-        # Calculate derived statistics
-        for batsman in batting_stats:
-            stats = batting_stats[batsman]
-            if stats["balls"] > 0:
-                stats["strike_rate"] = round((stats["runs"] / stats["balls"]) * 100, 2)
-        
-        for bowler in bowling_stats:
-            stats = bowling_stats[bowler]
-            if stats["balls_bowled"] > 0:
-                overs = stats["balls_bowled"] / 6
-                stats["economy_rate"] = round(stats["runs_conceded"] / overs, 2) if overs > 0 else 0
-        
-        # Calculate fall of wickets
-        fall_of_wickets = []
-        team_score = 0
-        team_wickets = 0
-        
-        # Calculate player performance scores for Man of the Match
-        player_scores = {}
-        
-        # Batting performance scoring
-        for batsman_name, batsman in batting_stats.items():
-            if batsman["balls"] > 0:  # Only consider batsmen who faced balls
-                score = 0
-                
-                # Base run score
-                score += batsman["runs"]
-                
-                # Strike rate bonus/penalty
-                strike_rate = batsman["strike_rate"]
-                if strike_rate > 150:
-                    score += 20  # Excellent strike rate
-                elif strike_rate > 120:
-                    score += 10  # Good strike rate
-                elif strike_rate < 80:
-                    score -= 10  # Poor strike rate
-                
-                # Boundary bonus
-                score += batsman["fours"] * 2  # 2 points per four
-                score += batsman["sixes"] * 4   # 4 points per six
-                
-                # Milestone bonuses
-                if batsman["runs"] >= 50:
-                    score += 15  # Half century bonus
-                if batsman["runs"] >= 100:
-                    score += 25  # Century bonus
-                
-                player_scores[batsman["name"]] = {
-                    "score": score,
-                    "type": "batting",
-                    "details": f"{batsman['runs']} runs from {batsman['balls']} balls (SR: {batsman['strike_rate']})"
-                }
-        
-        # Bowling performance scoring
-        for bowler in bowling_stats.values():
-            if bowler["balls_bowled"] > 0:  # Only consider bowlers who bowled
-                score = 0
-                
-                # Wicket bonus (major factor)
-                score += bowler["wickets"] * 20
-                
-                # Economy rate bonus/penalty
-                economy = bowler["economy_rate"]
-                if economy < 4:
-                    score += 15  # Excellent economy
-                elif economy < 6:
-                    score += 8   # Good economy  
-                elif economy > 10:
-                    score -= 10  # Poor economy
-                elif economy > 8:
-                    score -= 5   # Below average economy
-                
-                # Milestone bonuses
-                if bowler["wickets"] >= 3:
-                    score += 15  # Three-wicket haul
-                if bowler["wickets"] >= 5:
-                    score += 25  # Five-wicket haul
-                
-                overs = bowler["balls_bowled"] / 6
-                player_scores[bowler["name"]] = {
-                    "score": score,
-                    "type": "bowling", 
-                    "details": f"{bowler['wickets']} wickets in {overs:.1f} overs (ER: {bowler['economy_rate']})"
-                }
-        
-        # Find Man of the Match
-        if player_scores:
-            mom = max(player_scores.items(), key=lambda x: x[1]["score"])
-            man_of_match = {
-                "player": mom[0],
-                "score": mom[1]["score"],
-                "type": mom[1]["type"],
-                "details": mom[1]["details"],
-                "reasoning": f"Outstanding {mom[1]['type']} performance with {mom[1]['details']}"
-            }
-        else:
-            man_of_match = None
-        
-        # Generate match insights
-        insights = []
-        
-        # Top scorer insight
-        batting_list = list(batting_stats.values())
-        bowling_list = list(bowling_stats.values())
-
-        if batting_list:
-            top_scorer = max(batting_list, key=lambda x: x["runs"])
-            if top_scorer["runs"] > 0:
-                insights.append(f"Highest scorer: {top_scorer['name']} with {top_scorer['runs']} runs")
-        
-        # Best bowler insight
-        if bowling_list:
-            best_bowler = max(bowling_list, key=lambda x: x["wickets"])
-            if best_bowler["wickets"] > 0:
-                insights.append(f"Best bowler: {best_bowler['name']} with {best_bowler['wickets']} wickets")
-        
-        # Strike rate insights
-        if batting_list:
-            fastest_scorer = max(batting_list, key=lambda x: x["strike_rate"] if x["balls"] > 5 else 0)
-            if fastest_scorer["balls"] > 5:
-                insights.append(f"Fastest scorer: {fastest_scorer['name']} (SR: {fastest_scorer['strike_rate']})")
-        
-        # Economy insights
-        if bowling_list:
-            most_economical = min(bowling_list, key=lambda x: x["economy_rate"] if x["balls_bowled"] > 5 else 999)
-            if most_economical["balls_bowled"] > 5:
-                insights.append(f"Most economical: {most_economical['name']} (ER: {most_economical['economy_rate']})")
-        
-        return {
-            "batting_stats": batting_list,
-            "bowling_stats": bowling_list,
-            "fall_of_wickets": fall_of_wickets,
-            "man_of_match": man_of_match,
-            "player_scores": player_scores,
-            "insights": insights
-        }
+@query_budget(5)
+async def get_match_statistics(match_id: str, request: Request):
+    return await match_read_response(request, "statistics", match_id, build_match_statistics)
+
+def build_visualization_data(cursor, match_id: str):
+    ball_log = load_ball_log(cursor, match_id)
+    return visualization_view(compute_match_stats(ball_log), ball_log)
 
 @app.get("/api/matches/{match_id}/visualization")
-def get_visualization_data(match_id: str):
-    with get_db() as conn:
-        cursor = conn.cursor()
-        
-        # Get all balls for the match
-        cursor.execute("""
-            SELECT * FROM balls WHERE match_id = ? 
-            ORDER BY innings, over_number, ball_number
-        """, (match_id,))
-        balls = [dict(row) for row in cursor.fetchall()]
-        
-        # Calculate run progression by over
-        run_progression = []
-        cumulative_runs = 0
-        current_over = -1
-        over_runs = 0
-        
-        for ball in balls:
-            if ball['over_number'] != current_over:
-                if current_over >= 0:
-                    run_progression.append({
-                        "over": current_over + 1,
-                        "runs_in_over": over_runs,
-                        "cumulative_runs": cumulative_runs
-                    })
-                current_over = ball['over_number']
-                over_runs = 0
-            
-            run_value = ball['runs'] + ball['extras']
-            over_runs += run_value
-            cumulative_runs += run_value
-        
-        # Add final over
-        if current_over >= 0:
-            run_progression.append({
-                "over": current_over + 1,
-                "runs_in_over": over_runs,
-                "cumulative_runs": cumulative_runs
-            })
-        
-        # Calculate wicket timeline
-        wicket_timeline = []
-        cumulative_runs = 0
-        
-        for ball in balls:
-            cumulative_runs += ball['runs'] + ball['extras']
-            if ball['wicket']:
-                wicket_timeline.append({
-                    "over": f"{ball['over_number']}.{ball['ball_number']}",
-                    "player": ball['wicket_player'],
-                    "score": cumulative_runs,
-                    "wicket_type": ball['wicket_type']
-                })
-        
-        # Calculate ball-by-ball analysis for recent balls
-        recent_balls = []
-        for ball in balls[-20:]:  # Last 20 balls
-            recent_balls.append({
-                "over": f"{ball['over_number']}.{ball['ball_number']}",
-                "batsman": ball['batsman'],
-                "bowler": ball['bowler'],
-                "runs": ball['runs'],
-                "extras": ball['extras'],
-                "extras_type": ball['extras_type'],
-                "wicket": ball['wicket'],
-                "commentary": ball['commentary']
-            })
-        
-        return {
-            "run_progression": run_progression,
-            "wicket_timeline": wicket_timeline,
-            "recent_balls": recent_balls,
-            "total_balls": len(balls)
-        }
+@query_budget(4)
+async def get_visualization_data(match_id: str, request: Request):
+    return await match_read_response(request, "visualization", match_id, build_visualization_data)
+
+def remove_match(cursor, match_id: str, created_by: Optional[str]):
+    """Delete a match and everything derived from it, in the caller's transaction"""
+    # The innings aggregates hold exactly what this match adds to the global counters
+    cursor.execute("""
+        SELECT COALESCE(SUM(legal_balls), 0) AS balls, COALESCE(SUM(runs), 0) AS runs
+        FROM innings_totals WHERE match_id = ?
+    """, (match_id,))
+    totals = cursor.fetchone()
+    add_to_global_stats(cursor, matches=-1, balls=-totals['balls'], runs=-totals['runs'])
+    if created_by:
+        count_match_for_creator(cursor, created_by, sign=-1)
+
+    # Delete related data first (foreign key constraints)
+    cursor.execute("DELETE FROM balls WHERE match_id = ?", (match_id,))
+    cursor.execute("DELETE FROM innings_totals WHERE match_id = ?", (match_id,))
+    cursor.execute("DELETE FROM player_match_stats WHERE match_id = ?", (match_id,))
+    cursor.execute("DELETE FROM ball_tombstones WHERE match_id = ?", (match_id,))
+    cursor.execute("DELETE FROM match_state WHERE match_id = ?", (match_id,))
+    cursor.execute("""
+        DELETE FROM team_players WHERE team_id IN (SELECT id FROM teams WHERE match_id = ?)
+    """, (match_id,))
+    cursor.execute("DELETE FROM teams WHERE match_id = ?", (match_id,))
+    cursor.execute("DELETE FROM matches WHERE id = ?", (match_id,))
 
 @app.delete("/api/matches/{match_id}")
-def delete_match(match_id: str, current_user: str = Depends(verify_token)):
+@query_budget(22)
+def delete_match(match_id: str, current_user: AuthenticatedUser = Depends(resolve_current_user)):
+    drain_scoring_pipeline()
     with get_db() as conn:
         cursor = conn.cursor()
         
         # Check if match exists and user has permission
-        cursor.execute("SELECT created_by FROM matches WHERE id = ?", (match_id,))
+        cursor.execute("SELECT created_by, archived_season FROM matches WHERE id = ?", (match_id,))
         match = cursor.fetchone()
         if not match:
             raise HTTPException(status_code=404, detail="Match not found")
         
-        # Get user ID to check permissions
-        cursor.execute("SELECT id FROM users WHERE username = ?", (current_user,))
-        user_row = cursor.fetchone()
-        if not user_row:
-            raise HTTPException(status_code=404, detail="User not found")
-        
         # Check if user is the creator of the match
-        if match['created_by'] != user_row['id']:
+        if match['created_by'] != current_user.id:
             raise HTTPException(status_code=403, detail="Not authorized to delete this match")
         
-        # Delete related data first (foreign key constraints)
-        cursor.execute("DELETE FROM balls WHERE match_id = ?", (match_id,))
-        cursor.execute("DELETE FROM teams WHERE match_id = ?", (match_id,))
-        cursor.execute("DELETE FROM matches WHERE id = ?", (match_id,))
+        remove_match(cursor, match_id, match['created_by'])
         
         conn.commit()
+        match_cache.invalidate_match(match_id)
+        if match['archived_season'] is not None:
+            # Gone from the live database already, so a failure here only leaves a stale copy
+            purge_matches_from_archive(conn, match['archived_season'], [match_id])
         
         return {"message": "Match deleted successfully"}
 
+# Match archives
+
+ARCHIVE_MEDIA_TYPE = "application/vnd.cricklytics.match-archive"
+
+def export_match_archive(cursor, match_id: str, compress: bool = True) -> bytes:
+    """Binary archive of a completed match (see match_archive.py)"""
+    cursor.execute("SELECT * FROM matches WHERE id = ?", (match_id,))
+    match = cursor.fetchone()
+    if not match:
+        raise HTTPException(status_code=404, detail="Match not found")
+    if match['status'] != 'completed':
+        raise HTTPException(status_code=400, detail="Only completed matches can be archived")
+
+    match = dict(match)
+    data_cursor = match_data_cursor(cursor, match.pop('archived_season'))
+    data_cursor.execute("SELECT * FROM match_state WHERE match_id = ?", (match_id,))
+    state = data_cursor.fetchone()
+    return encode_match_archive(
+        match, build_match_teams(data_cursor, match_id), dict(state) if state else None,
+        load_ball_log(data_cursor, match_id).as_dicts(), compress=compress,
+    )
+
+def insert_row(cursor, table: str, row: dict):
+    """Insert the keys of row that are still columns of table"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    columns = [column[1] for column in cursor.fetchall() if column[1] in row]
+    cursor.execute(f"""
+        INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})
+    """, [row[column] for column in columns])
+
+def required_columns(cursor, table: str) -> list:
+    """Columns of table an insert must supply: the primary key and NOT NULL columns without a default"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [column['name'] for column in cursor.fetchall()
+            if column['pk'] or (column['notnull'] and column['dflt_value'] is None)]
+
+def import_match_archive(cursor, archive: dict, owner_id: str) -> str:
+    """Restore a decoded archive in the caller's transaction, aggregates included.
+
+    Team ids are minted afresh: the archive's own ids may already belong to
+    another match's teams, or to someone's standalone team, and rosters are
+    keyed by team id.
+    """
+    match = dict(archive["match"])
+    missing = [column for column in required_columns(cursor, "matches") if match.get(column) is None]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Archived match has no {', '.join(missing)}")
+    match_id = match["id"]
+    cursor.execute("SELECT 1 FROM matches WHERE id = ?", (match_id,))
+    if cursor.fetchone():
+        raise HTTPException(status_code=409, detail="Match already exists")
+
+    balls = archive["balls"]
+    match["created_by"] = owner_id
+    # Imported balls land in the live database whatever tier the match came from
+    match.pop("archived_season", None)
+    # Keep seq below the version so delta readers of the restored match stay consistent
+    match["version"] = max([match.get("version") or 0] + [ball["seq"] for ball in balls])
+    insert_row(cursor, "matches", match)
+    add_to_global_stats(cursor, matches=1)
+    if owner_id:
+        count_match_for_creator(cursor, owner_id)
+
+    for team in archive["teams"]:
+        team_id = str(uuid.uuid4())
+        cursor.execute("INSERT INTO teams (id, match_id, name) VALUES (?, ?, ?)",
+                       (team_id, match_id, team["name"]))
+        set_team_roster(cursor, team_id, team.get("players"))
+    if archive["state"]:
+        insert_row(cursor, "match_state", {**archive["state"], "match_id": match_id})
+
+    if balls:
+        player_ids = get_player_ids(cursor, [name for ball in balls
+                                             for name in ball_player_names(ball)])
+        cursor.executemany("""
+            INSERT INTO balls (id, match_id, innings, over_number, ball_number, legal_ball_number,
+                             batsman, bowler, runs, extras, extras_type, wicket,
+                             wicket_type, wicket_player, commentary, created_at, seq,
+                             batsman_id, bowler_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(ball["id"], match_id, ball["innings"], ball["over_number"], ball["ball_number"],
+               ball["legal_ball_number"], ball["batsman"], ball["bowler"], ball["runs"],
+               ball["extras"], ball["extras_type"], ball["wicket"], ball["wicket_type"],
+               ball["wicket_player"], ball["commentary"], ball["created_at"], ball["seq"],
+               player_ids[ball["batsman"]], player_ids[ball["bowler"]]) for ball in balls])
+        add_balls_to_innings_totals(cursor, match_id, balls)
+        add_balls_to_player_stats(cursor, match_id, balls, player_ids)
+        add_to_global_stats(cursor,
+                            balls=sum(1 for ball in balls if is_legal_delivery(ball['extras_type'])),
+                            runs=sum(ball['runs'] + ball['extras'] for ball in balls))
+    return match_id
+
+def import_match_archives(cursor, archives, current_user: AuthenticatedUser) -> list:
+    """Import archive blobs one savepoint each; returns one result per archive"""
+    results = []
+    for index, data in enumerate(archives):
+        cursor.execute("SAVEPOINT match_import")
+        try:
+            archive = decode_match_archive(data)
+            original_owner = archive["match"].get("created_by")
+            cursor.execute("SELECT 1 FROM users WHERE id = ?", (original_owner,))
+            if cursor.fetchone() is None:
+                # The creator is not a user of this server, so the importer takes the match
+                owner_id = current_user.id
+            elif original_owner == current_user.id or current_user.role == 'admin':
+                owner_id = original_owner
+            else:
+                raise HTTPException(status_code=403, detail="Not authorized to import this match")
+            match_id = import_match_archive(cursor, archive, owner_id)
+        except ArchiveError as error:
+            cursor.execute("ROLLBACK TO match_import")
+            results.append({"index": index, "status": "invalid", "detail": str(error)})
+        except HTTPException as error:
+            cursor.execute("ROLLBACK TO match_import")
+            status_name = "exists" if error.status_code == 409 else "rejected"
+            results.append({"index": index, "status": status_name, "detail": error.detail})
+        except sqlite3.IntegrityError as error:
+            # e.g. a ball id already scored in another match
+            cursor.execute("ROLLBACK TO match_import")
+            results.append({"index": index, "status": "rejected",
+                            "detail": f"Archive conflicts with existing data: {error}"})
+        else:
+            results.append({"index": index, "status": "imported", "match_id": match_id})
+        cursor.execute("RELEASE match_import")
+    return results
+
+@app.get("/api/matches/{match_id}/archive")
+def get_match_archive(match_id: str, compress: bool = True):
+    """Download a completed match as a compact binary archive"""
+    with get_db() as conn:
+        archive = export_match_archive(conn.cursor(), match_id, compress)
+    return Response(content=archive, media_type=ARCHIVE_MEDIA_TYPE, headers={
+        "Content-Disposition": f'attachment; filename="{match_id}.ckar"',
+    })
+
+@app.post("/api/matches/archive")
+async def import_archives(request: Request,
+                          current_user: AuthenticatedUser = Depends(resolve_current_user)):
+    """Restore matches from an archive, or a bundle of archives, sent as the request body.
+
+    Each archive is imported on its own: matches that already exist come back
+    as "exists", unreadable archives as "invalid" and archives the database
+    cannot take (missing match fields, clashing ball ids) as "rejected",
+    without failing the rest.
+    """
+    data = await request.body()
+    try:
+        archives = split_archives(data)
+    except ArchiveError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    results = await db_write(import_match_archives, archives, current_user)
+    return {"message": "Archives processed",
+            "imported": sum(1 for result in results if result["status"] == "imported"),
+            "results": results}
+
+# Storage tiers
+
+# What an archived match keeps in its season database. The moved tables leave
+# the live database; the copied ones stay there as well, so listings, career
+# stats (with their team filter, which reads the match rosters) and the global
+# counters never open an archive, while the archive can still answer every
+# match read on its own. team_players comes before teams: its rows are found
+# through them.
+TIER_MOVED_TABLES = ("match_state", "ball_tombstones", "balls")
+TIER_COPIED_TABLES = ("matches", "innings_totals", "team_players", "teams", "players")
+# Per-match rows of the archive, in the order they can be deleted
+TIER_MATCH_TABLES = ("team_players", "teams") + TIER_MOVED_TABLES + ("innings_totals", "matches")
+
+# Rows of each table that belong to the match ids passed as one JSON array parameter
+TIER_MATCH_IDS = "SELECT value FROM json_each(?)"
+TIER_TABLE_ROWS = {
+    "matches": "id IN ({match_ids})",
+    "innings_totals": "match_id IN ({match_ids})",
+    "teams": "match_id IN ({match_ids})",
+    "team_players": "team_id IN (SELECT id FROM {schema}.teams WHERE match_id IN ({match_ids}))",
+    "match_state": "match_id IN ({match_ids})",
+    "ball_tombstones": "match_id IN ({match_ids})",
+    "balls": "match_id IN ({match_ids})",
+    "players": """id IN (
+        SELECT player_id FROM {schema}.team_players
+        WHERE team_id IN (SELECT id FROM {schema}.teams WHERE match_id IN ({match_ids}))
+        UNION SELECT batsman_id FROM {schema}.balls WHERE match_id IN ({match_ids})
+        UNION SELECT bowler_id FROM {schema}.balls WHERE match_id IN ({match_ids})
+    )""",
+}
+
+def match_season(match_date: Optional[str]) -> str:
+    """Archive a match belongs to: the year of its date, as the player stats season filter reads it"""
+    year = (match_date or "")[:4]
+    return year if year.isdigit() else "undated"
+
+def tier_rows(table: str, schema: str):
+    rows = TIER_TABLE_ROWS[table].format(schema=schema, match_ids=TIER_MATCH_IDS)
+    return rows, rows.count("?")
+
+def sync_archive_schema(cursor, schema: str):
+    """Create the tiered tables and their indexes in an attached archive, or add columns it lacks"""
+    for table in TIER_COPIED_TABLES + TIER_MOVED_TABLES:
+        cursor.execute(f"PRAGMA {schema}.table_info({table})")
+        existing = {column[1] for column in cursor.fetchall()}
+        if not existing:
+            cursor.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?",
+                           (table,))
+            sql = cursor.fetchone()['sql']
+            cursor.execute(re.sub(r"^CREATE TABLE\s+(IF NOT EXISTS\s+)?", f"CREATE TABLE {schema}.", sql))
+            continue
+        cursor.execute(f"PRAGMA main.table_info({table})")
+        for column in cursor.fetchall():
+            if column[1] not in existing:
+                cursor.execute(f"ALTER TABLE {schema}.{table} ADD COLUMN {column[1]} {column[2]}")
+
+    tables = TIER_COPIED_TABLES + TIER_MOVED_TABLES
+    cursor.execute(f"""
+        SELECT sql FROM main.sqlite_master
+        WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({", ".join("?" * len(tables))})
+    """, tables)
+    for (sql,) in cursor.fetchall():
+        cursor.execute(re.sub(r"^CREATE (UNIQUE )?INDEX\s+(IF NOT EXISTS\s+)?",
+                              lambda found: f"CREATE {found.group(1) or ''}INDEX IF NOT EXISTS {schema}.",
+                              sql))
+
+def copy_match_rows(cursor, source: str, target: str, tables, match_ids: str):
+    """Copy the rows of the matches in match_ids (a JSON array) between attached databases"""
+    for table in tables:
+        cursor.execute(f"PRAGMA {target}.table_info({table})")
+        target_columns = {column[1] for column in cursor.fetchall()}
+        cursor.execute(f"PRAGMA {source}.table_info({table})")
+        columns = ", ".join(column[1] for column in cursor.fetchall() if column[1] in target_columns)
+        rows, placeholders = tier_rows(table, source)
+        cursor.execute(f"""
+            INSERT OR REPLACE INTO {target}.{table} ({columns})
+            SELECT {columns} FROM {source}.{table} WHERE {rows}
+        """, [match_ids] * placeholders)
+
+def delete_match_rows(cursor, schema: str, tables, match_ids: str):
+    for table in tables:
+        rows, placeholders = tier_rows(table, schema)
+        cursor.execute(f"DELETE FROM {schema}.{table} WHERE {rows}", [match_ids] * placeholders)
+
+@contextmanager
+def attached_archive(conn, season: str):
+    """The season's archive database attached to conn as `archive`, created on first use"""
+    path = archive_database_path(season)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn.execute("ATTACH DATABASE ? AS archive", (path,))
+    try:
+        yield conn.cursor()
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.execute("DETACH DATABASE archive")
+
+def move_matches_to_archive(conn, season: str, match_ids: list) -> list:
+    """Move completed matches into their season archive; returns the ids actually moved.
+
+    The archive copy is committed before anything leaves the live database,
+    so a crash in between leaves the match live and the next run copies it
+    again. A match whose version moved while it was being copied (reopened,
+    rescored) stays live.
+    """
+    ids = json.dumps(match_ids)
+    with attached_archive(conn, season) as cursor:
+        cursor.execute("BEGIN")
+        sync_archive_schema(cursor, "archive")
+        # Drop what an interrupted earlier run may have left, then copy afresh
+        delete_match_rows(cursor, "archive", ("team_players", "teams") + TIER_MOVED_TABLES, ids)
+        copy_match_rows(cursor, "main", "archive", TIER_COPIED_TABLES + TIER_MOVED_TABLES, ids)
+        conn.commit()
+
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(f"""
+            SELECT m.id FROM main.matches m JOIN archive.matches a ON a.id = m.id
+            WHERE m.id IN ({TIER_MATCH_IDS}) AND m.version = a.version
+              AND m.status = 'completed' AND m.archived_season IS NULL
+        """, (ids,))
+        moved = [row['id'] for row in cursor.fetchall()]
+        moved_ids = json.dumps(moved)
+        delete_match_rows(cursor, "main", TIER_MOVED_TABLES, moved_ids)
+        cursor.execute(f"""
+            UPDATE main.matches SET archived_season = ? WHERE id IN ({TIER_MATCH_IDS})
+        """, (season, moved_ids))
+        conn.commit()
+    return moved
+
+def restore_matches_from_archive(conn, season: str, match_ids: list):
+    """Bring archived matches back into the live database, where they can be edited again"""
+    ids = json.dumps(match_ids)
+    with attached_archive(conn, season) as cursor:
+        cursor.execute("BEGIN IMMEDIATE")
+        copy_match_rows(cursor, "archive", "main", TIER_MOVED_TABLES, ids)
+        cursor.execute(f"""
+            UPDATE main.matches SET archived_season = NULL WHERE id IN ({TIER_MATCH_IDS})
+        """, (ids,))
+        conn.commit()
+
+    # The live rows are authoritative from here on; a crash now only leaves a stale copy
+    purge_matches_from_archive(conn, season, match_ids)
+
+def purge_matches_from_archive(conn, season: str, match_ids: list):
+    """Drop matches the live database has taken back (or deleted) from their season archive"""
+    with attached_archive(conn, season) as cursor:
+        cursor.execute("BEGIN IMMEDIATE")
+        delete_match_rows(cursor, "archive", TIER_MATCH_TABLES, json.dumps(match_ids))
+        conn.commit()
+
+def group_by_season(rows, season_of) -> dict:
+    seasons = {}
+    for row in rows:
+        seasons.setdefault(season_of(row), []).append(row['id'])
+    return seasons
+
+def archive_completed_matches(older_than_days: float, match_ids: Optional[list] = None) -> dict:
+    """Move completed matches dated more than older_than_days ago (or the given ones) to
+    their season archives; returns {season: [moved match ids]}
+
+    The match date is whatever the scorer typed, so a match must also have
+    been created that long ago: a backdated match scored today stays live.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    with get_db() as conn:
+        cursor = conn.cursor()
+        if match_ids:
+            cursor.execute(f"""
+                SELECT id, date FROM matches
+                WHERE id IN ({TIER_MATCH_IDS}) AND status = 'completed' AND archived_season IS NULL
+            """, (json.dumps(match_ids),))
+        else:
+            cursor.execute("""
+                SELECT id, date FROM matches
+                WHERE status = 'completed' AND archived_season IS NULL AND date < ? AND created_at < ?
+                ORDER BY date
+            """, (cutoff.strftime("%Y-%m-%d"), cutoff.strftime("%Y-%m-%d %H:%M:%S")))
+        seasons = group_by_season(cursor.fetchall(), lambda row: match_season(row['date']))
+
+        archived = {}
+        for season, season_match_ids in seasons.items():
+            moved = move_matches_to_archive(conn, season, season_match_ids)
+            if moved:
+                archived[season] = moved
+    return archived
+
+def restore_archived_matches(match_ids: list) -> dict:
+    """Move archived matches back to the live database; returns {season: [match ids]}"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT id, archived_season FROM matches
+            WHERE id IN ({TIER_MATCH_IDS}) AND archived_season IS NOT NULL
+        """, (json.dumps(match_ids),))
+        seasons = group_by_season(cursor.fetchall(), lambda row: row['archived_season'])
+        for season, season_match_ids in seasons.items():
+            restore_matches_from_archive(conn, season, season_match_ids)
+    return seasons
+
+storage_tiering_stop = threading.Event()
+
+def tier_matches_periodically():
+    """Background job: keep the live database down to recent and unfinished matches"""
+    while not storage_tiering_stop.wait(ARCHIVE_INTERVAL_SECONDS):
+        try:
+            archived = archive_completed_matches(ARCHIVE_AFTER_DAYS)
+            if archived:
+                logger.info("Archived %s completed matches into seasons %s",
+                            sum(len(moved) for moved in archived.values()), sorted(archived))
+        except (sqlite3.Error, OSError, PoolTimeout):
+            logger.exception("Storage tiering failed")
+
+@app.get("/api/db/tiers")
+def get_storage_tiers(current_user: AuthenticatedUser = Depends(require_admin)):
+    """Matches in the live database and in each season archive"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT archived_season, COUNT(*) AS matches FROM matches GROUP BY archived_season
+        """)
+        counts = {row['archived_season']: row['matches'] for row in cursor.fetchall()}
+    live_matches = counts.pop(None, 0)
+    archives = {}
+    for season, matches in sorted(counts.items()):
+        path = archive_database_path(season)
+        archives[season] = {"matches": matches,
+                            "bytes": os.path.getsize(path) if os.path.exists(path) else None}
+    return {
+        "live": {"matches": live_matches, "bytes": os.path.getsize(DATABASE_FILE)},
+        "archives": archives,
+        "archive_after_days": ARCHIVE_AFTER_DAYS,
+        "readers": archive_readers.stats(),
+    }
+
+# Data backfills
+
+backfill_stop = threading.Event()
+
+def run_backfill_chunk(name: str) -> Optional[dict]:
+    """Advance a backfill by one chunk in its own short write transaction.
+
+    Returns its progress row, or None once it has finished.
+    """
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("SELECT position, done FROM schema_backfills WHERE name = ? AND finished_at IS NULL",
+                       (name,))
+        progress = cursor.fetchone()
+        if progress is None:
+            conn.rollback()
+            return None
+        match_ids = BACKFILLS[name](cursor, progress['position'], BACKFILL_CHUNK_MATCHES)
+        if match_ids:
+            cursor.execute("""
+                UPDATE schema_backfills SET position = ?, done = done + ? WHERE name = ?
+                RETURNING name, done, total
+            """, (match_ids[-1], len(match_ids), name))
+        else:
+            cursor.execute("""
+                UPDATE schema_backfills SET finished_at = CURRENT_TIMESTAMP WHERE name = ?
+            """, (name,))
+        row = cursor.fetchone()
+        conn.commit()
+        return dict(row) if match_ids else None
+
+def run_backfills(stop: threading.Event, pause: float = BACKFILL_PAUSE_SECONDS):
+    """Drive every unfinished backfill to completion, pausing between chunks so
+    requests waiting on the write lock get their turn; resumes after a restart"""
+    names = None
+    while names is None and not stop.is_set():
+        try:
+            with get_db() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT name FROM schema_backfills WHERE finished_at IS NULL ORDER BY started_at")
+                names = [row['name'] for row in cursor.fetchall()]
+        except (sqlite3.OperationalError, PoolTimeout):
+            logger.exception("Listing unfinished backfills failed, retrying")
+            stop.wait(1.0)
+    for name in names or ():
+        if name not in BACKFILLS:
+            logger.warning("Unknown backfill %s left unfinished", name)
+            continue
+        logger.info("Backfill %s started", name)
+        while not stop.is_set():
+            try:
+                progress = run_backfill_chunk(name)
+            except (sqlite3.OperationalError, PoolTimeout):
+                # Busy database or no free connection; the chunk rolled back, so retry it
+                logger.exception("Backfill %s chunk failed, retrying", name)
+                stop.wait(1.0)
+                continue
+            if progress is None:
+                logger.info("Backfill %s finished", name)
+                break
+            logger.info("Backfill %s: %s/%s matches", name, progress['done'], progress['total'])
+            stop.wait(pause)
+
+@app.get("/api/db/backfills")
+def get_backfills(current_user: AuthenticatedUser = Depends(require_admin)):
+    """Progress of the chunked data backfills"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM schema_backfills ORDER BY started_at")
+        return [dict(row) for row in cursor.fetchall()]
+
+# Player Statistics Endpoints
+
+LEADERBOARD_MIN_BALLS = int(os.environ.get("LEADERBOARD_MIN_BALLS", "30"))
+
+PLAYER_TOTALS_COLUMNS = """
+    COUNT(*) AS matches,
+    COALESCE(SUM(s.runs), 0) AS runs,
+    COALESCE(SUM(s.balls_faced), 0) AS balls_faced,
+    COALESCE(SUM(s.fours), 0) AS fours,
+    COALESCE(SUM(s.sixes), 0) AS sixes,
+    COALESCE(SUM(s.dismissals), 0) AS dismissals,
+    COALESCE(SUM(s.runs_conceded), 0) AS runs_conceded,
+    COALESCE(SUM(s.balls_bowled), 0) AS balls_bowled,
+    COALESCE(SUM(s.wickets), 0) AS wickets
+"""
+
+# stat -> (value expression, sort order, column a rate must have enough balls in)
+LEADERBOARD_STATS = {
+    "runs": ("SUM(s.runs)", "DESC", None),
+    "wickets": ("SUM(s.wickets)", "DESC", None),
+    "strike_rate": ("100.0 * SUM(s.runs) / SUM(s.balls_faced)", "DESC", "SUM(s.balls_faced)"),
+    "economy": ("6.0 * SUM(s.runs_conceded) / SUM(s.balls_bowled)", "ASC", "SUM(s.balls_bowled)"),
+}
+
+def player_stats_filters(team: Optional[str], season: Optional[str], match_type: Optional[str]):
+    """SQL conditions over player_match_stats s / matches m for the shared filters"""
+    conditions = []
+    params = []
+    if season:
+        conditions.append("substr(m.date, 1, 4) = ?")
+        params.append(season)
+    if match_type:
+        conditions.append("m.match_type = ?")
+        params.append(match_type)
+    if team:
+        # The team a player turned out for is the match roster they were listed in
+        conditions.append("""
+            EXISTS (
+                SELECT 1 FROM teams t JOIN team_players tp ON tp.team_id = t.id
+                WHERE t.match_id = s.match_id AND t.name = ? AND tp.player_id = s.player_id
+            )
+        """)
+        params.append(team)
+    return "".join(f" AND {condition}" for condition in conditions), params
+
+def player_totals_view(row) -> dict:
+    balls_faced = row['balls_faced']
+    balls_bowled = row['balls_bowled']
+    return {
+        "matches": row['matches'],
+        "batting": {
+            "runs": row['runs'],
+            "balls": balls_faced,
+            "fours": row['fours'],
+            "sixes": row['sixes'],
+            "dismissals": row['dismissals'],
+            "average": round(row['runs'] / row['dismissals'], 2) if row['dismissals'] else None,
+            "strike_rate": round(row['runs'] / balls_faced * 100, 2) if balls_faced else 0,
+        },
+        "bowling": {
+            "balls": balls_bowled,
+            "overs": f"{balls_bowled // 6}.{balls_bowled % 6}",
+            "runs_conceded": row['runs_conceded'],
+            "wickets": row['wickets'],
+            "economy_rate": round(row['runs_conceded'] / (balls_bowled / 6), 2) if balls_bowled else 0,
+            "average": round(row['runs_conceded'] / row['wickets'], 2) if row['wickets'] else None,
+        },
+    }
+
+@app.get("/api/players/{name}/stats")
+@query_budget(4)
+def get_player_stats(name: str, team: Optional[str] = None, season: Optional[str] = None,
+                     match_type: Optional[str] = None):
+    """Career figures for one player, summed from the per-match rollup"""
+    filters, params = player_stats_filters(team, season, match_type)
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM players WHERE name = ?", (name,))
+        player = cursor.fetchone()
+        if not player:
+            raise HTTPException(status_code=404, detail="Player not found")
+
+        cursor.execute(f"""
+            SELECT {PLAYER_TOTALS_COLUMNS}
+            FROM player_match_stats s JOIN matches m ON m.id = s.match_id
+            WHERE s.player_id = ? {filters}
+        """, [player['id'], *params])
+        totals = cursor.fetchone()
+        cursor.execute(f"""
+            SELECT substr(m.date, 1, 4) AS season, {PLAYER_TOTALS_COLUMNS}
+            FROM player_match_stats s JOIN matches m ON m.id = s.match_id
+            WHERE s.player_id = ? {filters}
+            GROUP BY season ORDER BY season
+        """, [player['id'], *params])
+        seasons = [{"season": row['season'], **player_totals_view(row)} for row in cursor.fetchall()]
+
+    return {
+        "player": name,
+        "filters": {"team": team, "season": season, "match_type": match_type},
+        **player_totals_view(totals),
+        "seasons": seasons,
+    }
+
+@app.get("/api/leaderboards")
+@query_budget(2)
+def get_leaderboards(
+    stat: str = "runs",
+    team: Optional[str] = None,
+    season: Optional[str] = None,
+    match_type: Optional[str] = None,
+    min_balls: int = Query(default=LEADERBOARD_MIN_BALLS, ge=1),
+    limit: int = Query(default=10, ge=1, le=100),
+):
+    """Top players by runs, wickets, strike rate or economy, from the per-match rollup.
+
+    Strike rate and economy only rank players with at least `min_balls` balls
+    faced or bowled under the same filters.
+    """
+    if stat not in LEADERBOARD_STATS:
+        raise HTTPException(status_code=400,
+                            detail=f"stat must be one of {', '.join(LEADERBOARD_STATS)}")
+    value, order, qualifying = LEADERBOARD_STATS[stat]
+    having = f"{qualifying} >= ?" if qualifying else f"{value} > 0"
+    filters, params = player_stats_filters(team, season, match_type)
+    if qualifying:
+        params.append(min_balls)
+
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT p.name, {value} AS value, {PLAYER_TOTALS_COLUMNS}
+            FROM player_match_stats s
+            JOIN matches m ON m.id = s.match_id
+            JOIN players p ON p.id = s.player_id
+            WHERE 1 = 1 {filters}
+            GROUP BY s.player_id
+            HAVING {having}
+            ORDER BY value {order}, p.name
+            LIMIT ?
+        """, params + [limit])
+        rows = cursor.fetchall()
+
+    return {
+        "stat": stat,
+        "filters": {"team": team, "season": season, "match_type": match_type},
+        "min_balls": min_balls if qualifying else None,
+        "leaders": [
+            {"rank": rank, "player": row['name'], "value": round(row['value'], 2),
+             **player_totals_view(row)}
+            for rank, row in enumerate(rows, start=1)
+        ],
+    }
+
 # Team Management Endpoints
 
 @app.get("/api/teams")
-def get_user_teams(current_user: str = Depends(verify_token)):
+@query_budget(3)
+def get_user_teams(current_user: AuthenticatedUser = Depends(resolve_current_user)):
     with get_db() as conn:
         cursor = conn.cursor()
         
-        # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (current_user,))
-        user_row = cursor.fetchone()
-        if not user_row:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        user_id = user_row['id']
+        user_id = current_user.id
         
         # Get all teams from standalone_teams created by the user
-        cursor.execute("""
-            SELECT st.*, 
-                   COALESCE(
-                       (SELECT json_group_array(
-                           json_object('match_id', tmu.match_id, 'match_name', tmu.match_name)
-                       ) FROM team_match_usage tmu WHERE tmu.team_name = st.name), 
-                       '[]'
-                   ) as matches_used_json
-            FROM standalone_teams st
-            WHERE st.created_by = ?
-            ORDER BY st.created_at DESC
-        """, (user_id,))
+        cursor.execute(USER_TEAMS_SQL, (user_id,))
         
         teams_data = cursor.fetchall()
         
+        cursor.execute(USER_TEAM_ROSTERS_SQL, (user_id,))
+        rosters = group_rosters(cursor.fetchall())
+        
         # Process teams data
         teams = []
         for row in teams_data:
-            # Parse players JSON
             try:
-                import json
-                players = json.loads(row['players'])
                 matches_used = json.loads(row['matches_used_json']) if row['matches_used_json'] != '[]' else []
-            except:
-                players = []
+            except (TypeError, json.JSONDecodeError):
                 matches_used = []
             
             teams.append({
                 'name': row['name'],
-                'players': players,
+                'players': rosters.get(row['id'], []),
                 'captain': row['captain'],
                 'viceCaptain': row['vice_captain'],
                 'total_matches': row['total_matches'],
@@ -1344,17 +4023,12 @@ def get_user_teams(current_user: str = Depends(verify_token)):
         return teams
 
 @app.post("/api/teams")
-def create_team(team_data: dict, current_user: str = Depends(verify_token)):
+@query_budget(7)
+def create_team(team_data: dict, current_user: AuthenticatedUser = Depends(resolve_current_user)):
     with get_db() as conn:
         cursor = conn.cursor()
         
-        # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (current_user,))
-        user_row = cursor.fetchone()
-        if not user_row:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        user_id = user_row['id']
+        user_id = current_user.id
         
         # Validate team data
         if not team_data.get('name'):
@@ -1375,36 +4049,28 @@ def create_team(team_data: dict, current_user: str = Depends(verify_token)):
         # Create standalone team entry
         team_id = str(uuid.uuid4())
         
-        # Convert players to JSON format
-        import json
-        players_json = json.dumps(team_data['players'])
-        
         # Get captain and vice-captain
         captain = team_data.get('captain', '')
         vice_captain = team_data.get('viceCaptain', '')
         
         cursor.execute("""
-            INSERT INTO standalone_teams (id, name, players, captain, vice_captain, 
+            INSERT INTO standalone_teams (id, name, captain, vice_captain, 
                                         total_matches, created_by)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (team_id, team_data['name'], players_json, captain, vice_captain, 0, user_id))
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (team_id, team_data['name'], captain, vice_captain, 0, user_id))
+        set_team_roster(cursor, team_id, team_data['players'])
         
         conn.commit()
         
         return {"message": "Team created successfully", "team_id": team_id}
 
 @app.put("/api/teams/{team_name}")
-def update_team(team_name: str, team_data: dict, current_user: str = Depends(verify_token)):
+@query_budget(6)
+def update_team(team_name: str, team_data: dict, current_user: AuthenticatedUser = Depends(resolve_current_user)):
     with get_db() as conn:
         cursor = conn.cursor()
         
-        # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (current_user,))
-        user_row = cursor.fetchone()
-        if not user_row:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        user_id = user_row['id']
+        user_id = current_user.id
         
         # Find team belonging to user
         cursor.execute("""
@@ -1435,11 +4101,7 @@ def update_team(team_name: str, team_data: dict, current_user: str = Depends(ver
             params.append(team_data['name'])
         
         if 'players' in team_data:
-            # Convert players to JSON format
-            import json
-            players_json = json.dumps(team_data['players'])
-            updates.append("players = ?")
-            params.append(players_json)
+            set_team_roster(cursor, team_row['id'], team_data['players'])
         
         if 'captain' in team_data:
             updates.append("captain = ?")
@@ -1452,22 +4114,17 @@ def update_team(team_name: str, team_data: dict, current_user: str = Depends(ver
         if updates:
             params.append(team_row['id'])
             cursor.execute(f"UPDATE standalone_teams SET {', '.join(updates)} WHERE id = ?", params)
-            conn.commit()
+        conn.commit()
         
         return {"message": "Team updated successfully"}
 
 @app.delete("/api/teams/{team_name}")
-def delete_team(team_name: str, current_user: str = Depends(verify_token)):
+@query_budget(5)
+def delete_team(team_name: str, current_user: AuthenticatedUser = Depends(resolve_current_user)):
     with get_db() as conn:
         cursor = conn.cursor()
         
-        # Get user ID
-        cursor.execute("SELECT id FROM users WHERE username = ?", (current_user,))
-        user_row = cursor.fetchone()
-        if not user_row:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        user_id = user_row['id']
+        user_id = current_user.id
         
         # Find team belonging to user
         cursor.execute("""
@@ -1480,6 +4137,7 @@ def delete_team(team_name: str, current_user: str = Depends(verify_token)):
             raise HTTPException(status_code=404, detail="Team not found")
         
         # Delete the standalone team
+        cursor.execute("DELETE FROM team_players WHERE team_id = ?", (team_row['id'],))
         cursor.execute("DELETE FROM standalone_teams WHERE id = ?", (team_row['id'],))
         
         # Also delete any team_match_usage records
@@ -1494,10 +4152,172 @@ def delete_team(team_name: str, current_user: str = Depends(verify_token)):
 def handle_options(path: str):
     return {"message": "OK"}
 
+@app.on_event("startup")
+def start_scoring_pipeline():
+    # Replay the journal at boot rather than on the first scored ball
+    get_scoring_pipeline()
+
+@app.on_event("shutdown")
+def stop_scoring_pipeline():
+    if scoring_pipeline is not None:
+        scoring_pipeline.stop()
+
+@app.on_event("shutdown")
+def stop_async_database():
+    database.shutdown()
+
+@app.on_event("shutdown")
+def stop_password_hasher():
+    password_hasher.shutdown()
+
+@app.on_event("startup")
+def start_global_stats_reconciler():
+    if GLOBAL_STATS_RECONCILE_SECONDS > 0:
+        global_stats_reconciler_stop.clear()
+        threading.Thread(target=reconcile_global_stats_periodically,
+                         name="global-stats-reconciler", daemon=True).start()
+
+@app.on_event("shutdown")
+def stop_global_stats_reconciler():
+    global_stats_reconciler_stop.set()
+
+@app.on_event("startup")
+def start_storage_tiering():
+    if ARCHIVE_INTERVAL_SECONDS > 0:
+        storage_tiering_stop.clear()
+        threading.Thread(target=tier_matches_periodically,
+                         name="storage-tiering", daemon=True).start()
+
+@app.on_event("shutdown")
+def stop_storage_tiering():
+    storage_tiering_stop.set()
+    archive_readers.close()
+
+@app.on_event("startup")
+def start_backfills():
+    backfill_stop.clear()
+    threading.Thread(target=run_backfills, args=(backfill_stop,),
+                     name="backfills", daemon=True).start()
+
+@app.on_event("shutdown")
+def stop_backfills():
+    backfill_stop.set()
+
 # Initialize database on module import
 init_database()
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cricklytics API server")
+    parser.add_argument(
+        "command", nargs="?", default="serve",
+        choices=["serve", "rebuild-aggregates", "export-archives", "import-archives",
+                 "archive-matches", "restore-matches", "backfill", "grant-admin"],
+        help="'serve' runs the API, 'rebuild-aggregates' recomputes innings totals, "
+             "player rollups and global counters from balls, 'export-archives' writes "
+             "completed matches to archive files and 'import-archives' restores them, "
+             "'archive-matches' moves completed matches to the season archive databases "
+             "and 'restore-matches' brings them back, 'backfill' finishes pending data "
+             "backfills in the foreground, 'grant-admin' lets the named users read the "
+             "operational endpoints",
+    )
+    parser.add_argument("targets", nargs="*",
+                        help="match ids to export, archive or restore (default for export and archive: "
+                             "every eligible completed match), archive files to import or usernames "
+                             "to make admins")
+    parser.add_argument("--out", default=".", help="directory for exported archives")
+    parser.add_argument("--remove", action="store_true",
+                        help="delete exported matches from the database once their archive is written")
+    parser.add_argument("--older-than", type=float, default=ARCHIVE_AFTER_DAYS, metavar="DAYS",
+                        help="archive-matches: only matches dated, and created, more than DAYS ago")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="archive-matches: compact the live database file afterwards")
+    args = parser.parse_args()
+
     init_database()
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if args.command == "rebuild-aggregates":
+        with get_db() as conn:
+            cursor = conn.cursor()
+            rebuild_innings_totals(cursor)
+            rebuild_player_stats(cursor)
+            reconcile_global_stats(cursor)
+            # Totals may have changed under cached responses
+            cursor.execute("UPDATE matches SET version = version + 1")
+            conn.commit()
+        print("Innings and player aggregates rebuilt from ball log")
+    elif args.command == "export-archives":
+        os.makedirs(args.out, exist_ok=True)
+        with get_db() as conn:
+            cursor = conn.cursor()
+            match_ids = args.targets
+            if not match_ids:
+                cursor.execute("SELECT id FROM matches WHERE status = 'completed' ORDER BY created_at")
+                match_ids = [row['id'] for row in cursor.fetchall()]
+            exported = 0
+            for match_id in match_ids:
+                try:
+                    archive = export_match_archive(cursor, match_id)
+                except HTTPException as error:
+                    print(f"{match_id}: {error.detail}")
+                    continue
+                path = os.path.join(args.out, f"{match_id}.ckar")
+                with open(path, "wb") as archive_file:
+                    archive_file.write(archive)
+                    archive_file.flush()
+                    os.fsync(archive_file.fileno())
+                if args.remove:
+                    cursor.execute("SELECT created_by, archived_season FROM matches WHERE id = ?",
+                                   (match_id,))
+                    match = cursor.fetchone()
+                    if match['archived_season'] is None:
+                        remove_match(cursor, match_id, match['created_by'])
+                    else:
+                        print(f"{match_id}: archived matches are read-only, restore it to remove it")
+                print(f"{match_id} -> {path}")
+                exported += 1
+            conn.commit()
+        print(f"Exported {exported} matches")
+    elif args.command == "import-archives":
+        # Original creators keep their matches; archives from unknown users come in unowned
+        operator = AuthenticatedUser(id=None, username="cli", role="admin")
+        with get_db() as conn:
+            cursor = conn.cursor()
+            for path in args.targets:
+                with open(path, "rb") as archive_file:
+                    archives = split_archives(archive_file.read())
+                for result in import_match_archives(cursor, archives, operator):
+                    print(path, result)
+            conn.commit()
+    elif args.command == "archive-matches":
+        archived = archive_completed_matches(args.older_than, args.targets)
+        for season, match_ids in sorted(archived.items()):
+            print(f"{season}: {len(match_ids)} matches -> {archive_database_path(season)}")
+        print(f"Archived {sum(len(match_ids) for match_ids in archived.values())} matches")
+        if args.vacuum:
+            with get_db() as conn:
+                conn.execute("VACUUM")
+                # Fold the rewritten pages back from the WAL so the file size is real
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            print(f"Live database is {os.path.getsize(DATABASE_FILE)} bytes")
+    elif args.command == "restore-matches":
+        restored = restore_archived_matches(args.targets)
+        for season, match_ids in sorted(restored.items()):
+            for match_id in match_ids:
+                print(f"{match_id} <- {archive_database_path(season)}")
+        print(f"Restored {sum(len(match_ids) for match_ids in restored.values())} matches")
+    elif args.command == "backfill":
+        run_backfills(threading.Event(), pause=0)
+        print("Backfills finished")
+    elif args.command == "grant-admin":
+        with get_db() as conn:
+            cursor = conn.cursor()
+            for username in args.targets:
+                cursor.execute("UPDATE users SET role = 'admin' WHERE username = ?", (username,))
+                print(f"{username}: {'admin' if cursor.rowcount else 'no such user'}")
+            conn.commit()
+        # Admin checks read the role afresh; other cached sessions age out
+        print(f"Admin endpoints accept them now; other role checks within {AUTH_CACHE_TTL:g} seconds")
+    else:
+        import uvicorn
+        uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,325 @@
+"""
+Match statistics engine shared by the score, statistics and visualization endpoints.
+
+A match's deliveries are loaded once into a column-oriented BallLog and every
+derived figure (batting and bowling cards, run progression, wicket timeline and
+innings totals) is computed in a single pass over those columns.
+"""
+
+ILLEGAL_DELIVERIES = ('wide', 'no-ball')
+
+MATCH_BALLS_SQL = """
+    SELECT * FROM balls WHERE match_id = ?
+    ORDER BY innings, over_number, ball_number
+"""
+
+
+class BallLog:
+    """Deliveries of a match in scoring order, stored column-wise"""
+
+    __slots__ = ("names", "rows", "columns")
+
+    def __init__(self, names, rows):
+        self.names = tuple(names)
+        self.rows = rows
+        # Transposing in C is far cheaper than building a dict per row
+        columns = zip(*rows) if rows else [()] * len(self.names)
+        self.columns = dict(zip(self.names, columns))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def as_dicts(self, start: int = 0):
+        """Row dicts in the shape the API has always returned for balls"""
+        names = self.names
+        return [dict(zip(names, row)) for row in self.rows[start:]]
+
+
+def load_ball_log(cursor, match_id: str, sql: str = MATCH_BALLS_SQL, *params) -> BallLog:
+    raw = cursor.connection.cursor()
+    raw.row_factory = None
+    raw.execute(sql, (match_id,) + params)
+    rows = raw.fetchall()
+    names = [column[0] for column in raw.description]
+    return BallLog(names, rows)
+
+
+class MatchStats:
+    """Everything derived from one pass over a BallLog"""
+
+    __slots__ = ("batting", "bowling", "run_progression", "wicket_timeline",
+                 "innings_totals", "total_balls")
+
+    def __init__(self):
+        self.batting = {}
+        self.bowling = {}
+        self.run_progression = []
+        self.wicket_timeline = []
+        self.innings_totals = {}
+        self.total_balls = 0
+
+
+def compute_match_stats(log: BallLog) -> MatchStats:
+    stats = MatchStats()
+    stats.total_balls = len(log)
+    if not len(log):
+        return stats
+
+    col = log.columns
+    batting = stats.batting
+    bowling = stats.bowling
+    innings_totals = stats.innings_totals
+    run_progression = stats.run_progression
+    wicket_timeline = stats.wicket_timeline
+
+    cumulative_runs = 0
+    current_over = -1
+    over_runs = 0
+
+    for (innings, over_number, ball_number, batsman, bowler, runs, extras,
+         extras_type, wicket, wicket_type, wicket_player) in zip(
+            col['innings'], col['over_number'], col['ball_number'], col['batsman'],
+            col['bowler'], col['runs'], col['extras'], col['extras_type'],
+            col['wicket'], col['wicket_type'], col['wicket_player']):
+        legal = extras_type not in ILLEGAL_DELIVERIES
+        run_value = runs + extras
+
+        # Batting card
+        bat = batting.get(batsman)
+        if bat is None:
+            bat = batting[batsman] = {
+                "name": batsman,
+                "runs": 0,
+                "balls": 0,
+                "fours": 0,
+                "sixes": 0,
+                "strike_rate": 0,
+                "innings": innings
+            }
+        bat["runs"] += runs
+        if legal:
+            bat["balls"] += 1
+        if runs == 4:
+            bat["fours"] += 1
+        elif runs == 6:
+            bat["sixes"] += 1
+
+        # Bowling card
+        bowl = bowling.get(bowler)
+        if bowl is None:
+            bowl = bowling[bowler] = {
+                "name": bowler,
+                "runs_conceded": 0,
+                "balls_bowled": 0,
+                "wickets": 0,
+                "economy_rate": 0,
+                "innings": innings
+            }
+        bowl["runs_conceded"] += run_value
+        if legal:
+            bowl["balls_bowled"] += 1
+        if wicket:
+            bowl["wickets"] += 1
+
+        # Innings totals
+        totals = innings_totals.get(innings)
+        if totals is None:
+            totals = innings_totals[innings] = {"runs": 0, "wickets": 0, "extras": 0, "balls": 0}
+        totals["runs"] += run_value
+        totals["extras"] += extras
+        if wicket:
+            totals["wickets"] += 1
+        if legal:
+            totals["balls"] += 1
+
+        # Run progression, grouped whenever the over number changes
+        if over_number != current_over:
+            if current_over >= 0:
+                run_progression.append({
+                    "over": current_over + 1,
+                    "runs_in_over": over_runs,
+                    "cumulative_runs": cumulative_runs
+                })
+            current_over = over_number
+            over_runs = 0
+        over_runs += run_value
+        cumulative_runs += run_value
+
+        # Wicket timeline
+        if wicket:
+            wicket_timeline.append({
+                "over": f"{over_number}.{ball_number}",
+                "player": wicket_player,
+                "score": cumulative_runs,
+                "wicket_type": wicket_type
+            })
+
+    if current_over >= 0:
+        run_progression.append({
+            "over": current_over + 1,
+            "runs_in_over": over_runs,
+            "cumulative_runs": cumulative_runs
+        })
+
+    for bat in batting.values():
+        if bat["balls"] > 0:
+            bat["strike_rate"] = round((bat["runs"] / bat["balls"]) * 100, 2)
+
+    for bowl in bowling.values():
+        if bowl["balls_bowled"] > 0:
+            overs = bowl["balls_bowled"] / 6
+            bowl["economy_rate"] = round(bowl["runs_conceded"] / overs, 2) if overs > 0 else 0
+
+    return stats
+
+
+def player_performance_scores(stats: MatchStats) -> dict:
+    """Points used to pick the Man of the Match"""
+    player_scores = {}
+
+    # Batting performance scoring
+    for batsman in stats.batting.values():
+        if batsman["balls"] > 0:  # Only consider batsmen who faced balls
+            score = batsman["runs"]
+
+            # Strike rate bonus/penalty
+            strike_rate = batsman["strike_rate"]
+            if strike_rate > 150:
+                score += 20  # Excellent strike rate
+            elif strike_rate > 120:
+                score += 10  # Good strike rate
+            elif strike_rate < 80:
+                score -= 10  # Poor strike rate
+
+            # Boundary bonus
+            score += batsman["fours"] * 2  # 2 points per four
+            score += batsman["sixes"] * 4   # 4 points per six
+
+            # Milestone bonuses
+            if batsman["runs"] >= 50:
+                score += 15  # Half century bonus
+            if batsman["runs"] >= 100:
+                score += 25  # Century bonus
+
+            player_scores[batsman["name"]] = {
+                "score": score,
+                "type": "batting",
+                "details": f"{batsman['runs']} runs from {batsman['balls']} balls (SR: {batsman['strike_rate']})"
+            }
+
+    # Bowling performance scoring
+    for bowler in stats.bowling.values():
+        if bowler["balls_bowled"] > 0:  # Only consider bowlers who bowled
+            # Wicket bonus (major factor)
+            score = bowler["wickets"] * 20
+
+            # Economy rate bonus/penalty
+            economy = bowler["economy_rate"]
+            if economy < 4:
+                score += 15  # Excellent economy
+            elif economy < 6:
+                score += 8   # Good economy
+            elif economy > 10:
+                score -= 10  # Poor economy
+            elif economy > 8:
+                score -= 5   # Below average economy
+
+            # Milestone bonuses
+            if bowler["wickets"] >= 3:
+                score += 15  # Three-wicket haul
+            if bowler["wickets"] >= 5:
+                score += 25  # Five-wicket haul
+
+            overs = bowler["balls_bowled"] / 6
+            player_scores[bowler["name"]] = {
+                "score": score,
+                "type": "bowling",
+                "details": f"{bowler['wickets']} wickets in {overs:.1f} overs (ER: {bowler['economy_rate']})"
+            }
+
+    return player_scores
+
+
+def man_of_the_match(player_scores: dict):
+    if not player_scores:
+        return None
+
+    name, best = max(player_scores.items(), key=lambda x: x[1]["score"])
+    return {
+        "player": name,
+        "score": best["score"],
+        "type": best["type"],
+        "details": best["details"],
+        "reasoning": f"Outstanding {best['type']} performance with {best['details']}"
+    }
+
+
+def match_insights(batting_list: list, bowling_list: list) -> list:
+    insights = []
+
+    if batting_list:
+        top_scorer = max(batting_list, key=lambda x: x["runs"])
+        if top_scorer["runs"] > 0:
+            insights.append(f"Highest scorer: {top_scorer['name']} with {top_scorer['runs']} runs")
+
+    if bowling_list:
+        best_bowler = max(bowling_list, key=lambda x: x["wickets"])
+        if best_bowler["wickets"] > 0:
+            insights.append(f"Best bowler: {best_bowler['name']} with {best_bowler['wickets']} wickets")
+
+    if batting_list:
+        fastest_scorer = max(batting_list, key=lambda x: x["strike_rate"] if x["balls"] > 5 else 0)
+        if fastest_scorer["balls"] > 5:
+            insights.append(f"Fastest scorer: {fastest_scorer['name']} (SR: {fastest_scorer['strike_rate']})")
+
+    if bowling_list:
+        most_economical = min(bowling_list, key=lambda x: x["economy_rate"] if x["balls_bowled"] > 5 else 999)
+        if most_economical["balls_bowled"] > 5:
+            insights.append(f"Most economical: {most_economical['name']} (ER: {most_economical['economy_rate']})")
+
+    return insights
+
+
+def statistics_view(stats: MatchStats) -> dict:
+    """Payload of GET /api/matches/{id}/statistics"""
+    batting_list = list(stats.batting.values())
+    bowling_list = list(stats.bowling.values())
+    player_scores = player_performance_scores(stats)
+
+    return {
+        "batting_stats": batting_list,
+        "bowling_stats": bowling_list,
+        "fall_of_wickets": [],
+        "man_of_match": man_of_the_match(player_scores),
+        "player_scores": player_scores,
+        "insights": match_insights(batting_list, bowling_list)
+    }
+
+
+def visualization_view(stats: MatchStats, log: BallLog, recent: int = 20) -> dict:
+    """Payload of GET /api/matches/{id}/visualization"""
+    col = log.columns
+    start = max(len(log) - recent, 0)
+    recent_balls = [
+        {
+            "over": f"{over_number}.{ball_number}",
+            "batsman": batsman,
+            "bowler": bowler,
+            "runs": runs,
+            "extras": extras,
+            "extras_type": extras_type,
+            "wicket": wicket,
+            "commentary": commentary
+        }
+        for over_number, ball_number, batsman, bowler, runs, extras, extras_type, wicket, commentary
+        in zip(col['over_number'][start:], col['ball_number'][start:], col['batsman'][start:],
+               col['bowler'][start:], col['runs'][start:], col['extras'][start:],
+               col['extras_type'][start:], col['wicket'][start:], col['commentary'][start:])
+    ]
+
+    return {
+        "run_progression": stats.run_progression,
+        "wicket_timeline": stats.wicket_timeline,
+        "recent_balls": recent_balls,
+        "total_balls": stats.total_balls
+    }
@@ -0,0 +1,113 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+class ApiServer:
+    """The API under uvicorn in a child process, so tests can kill it outright"""
+
+    def __init__(self, workdir, env):
+        self.workdir = workdir
+        self.env = env
+        self.process = None
+        self.base_url = None
+        self.token = None
+
+    def start(self, **env_overrides):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        env = dict(os.environ, PYTHONPATH=BACKEND_DIR, **self.env, **env_overrides)
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port),
+             "--log-level", "warning"],
+            cwd=self.workdir, env=env,
+        )
+        self.base_url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                urllib.request.urlopen(self.base_url + "/", timeout=1)
+                return self
+            except OSError:
+                time.sleep(0.1)
+        self.kill()
+        raise RuntimeError("API server did not start")
+
+    def kill(self):
+        """Simulate a crash: no shutdown hooks, no final flush"""
+        if self.process is not None:
+            self.process.send_signal(signal.SIGKILL)
+            self.process.wait()
+            self.process = None
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+            self.process = None
+
+    def call(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method)
+        request.add_header("Content-Type", "application/json")
+        if self.token:
+            request.add_header("Authorization", f"Bearer {self.token}")
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return response.status, json.loads(response.read() or b"null")
+        except urllib.error.HTTPError as error:
+            return error.code, json.loads(error.read() or b"null")
+
+    def login(self, username="scorer", password="scorer-pass", admin=False):
+        status, body = self.call("POST", "/api/login", {"username": username, "password": password})
+        if status != 200:
+            status, body = self.call("POST", "/api/register", {
+                "username": username, "email": f"{username}@example.com",
+                "password": password, "confirmPassword": password,
+            })
+        assert status == 200, body
+        if admin:
+            # Before the token's first use, so the auth cache never holds the old role
+            subprocess.run([sys.executable, os.path.join(BACKEND_DIR, "server.py"), "grant-admin", username],
+                           cwd=self.workdir, env=dict(os.environ, PYTHONPATH=BACKEND_DIR, **self.env),
+                           check=True, stdout=subprocess.DEVNULL)
+        self.token = body["access_token"]
+
+    def create_live_match(self):
+        status, body = self.call("POST", "/api/matches", {
+            "name": "Recovery", "date": "2025-01-01", "venue": "Ground",
+            "matchType": "T20", "team1": "India", "team2": "Pakistan",
+        })
+        assert status == 200, body
+        match_id = body["match_id"]
+        assert self.call("PATCH", f"/api/matches/{match_id}/start")[0] == 200
+        return match_id
+
+
+@pytest.fixture
+def api_server(tmp_path):
+    servers = []
+
+    def start(**env):
+        server = ApiServer(str(tmp_path), {
+            "DATABASE_FILE": str(tmp_path / "cricklytics.db"),
+            "BCRYPT_ROUNDS": "4",
+        })
+        servers.append(server)
+        return server.start(**env)
+
+    yield start
+    for server in servers:
+        server.kill()
@@ -0,0 +1,80 @@
+"""
+The write-path aggregates: innings totals, the per-player rollup and the global
+counters are kept up to date as balls and matches come and go, and must equal
+what `server.py rebuild-aggregates` recomputes from the ball log.
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+
+from conftest import BACKEND_DIR
+
+
+def delivery(match_id, index, **overrides):
+    ball = {"match_id": match_id, "innings": 1 + index // 24, "over_number": index % 24 // 6,
+            "ball_number": index % 6 + 1, "batsman": f"Batter {index % 4}",
+            "bowler": f"Bowler {index // 6 % 3}", "runs": (0, 1, 2, 4, 6, 1, 0)[index % 7]}
+    ball.update(overrides)
+    return ball
+
+
+def score_match(server, match_id):
+    balls = [delivery(match_id, index) for index in range(40)]
+    # Extras, a batter out on their own ball, and a non-striker run out
+    balls[5].update(extras=1, extras_type="wide", runs=0)
+    balls[9].update(extras=1, extras_type="no-ball", runs=4)
+    balls[13].update(extras=2, extras_type="bye", runs=0)
+    balls[17].update(wicket=True, wicket_type="bowled", wicket_player=balls[17]["batsman"])
+    balls[21].update(wicket=True, wicket_type="run out", wicket_player="Batter 9")
+    balls[30].update(wicket=True, wicket_type="caught", wicket_player=balls[30]["batsman"])
+    status, body = server.call("POST", f"/api/matches/{match_id}/score/batch", {"balls": balls})
+    assert status == 200, body
+    return [result["ball_id"] for result in body["results"]]
+
+
+def aggregates(database):
+    with sqlite3.connect(database) as conn:
+        return {
+            "player_match_stats": conn.execute(
+                "SELECT * FROM player_match_stats ORDER BY player_id, match_id").fetchall(),
+            "innings_totals": conn.execute(
+                "SELECT * FROM innings_totals ORDER BY match_id, innings").fetchall(),
+            "global_stats": conn.execute(
+                "SELECT total_matches, total_balls, total_runs, active_users FROM global_stats").fetchall(),
+            "user_match_counts": conn.execute(
+                "SELECT * FROM user_match_counts ORDER BY user_id").fetchall(),
+        }
+
+
+def test_maintained_aggregates_match_a_rebuild_from_the_ball_log(api_server, tmp_path):
+    database = tmp_path / "cricklytics.db"
+    server = api_server()
+    server.login()
+    kept = server.create_live_match()
+    kept_balls = score_match(server, kept)
+    dropped = server.create_live_match()
+    score_match(server, dropped)
+    # A second creator whose only match goes away takes active_users down with it
+    server.login("visitor", "visitor-pass")
+    visitor_match = server.create_live_match()
+    score_match(server, visitor_match)
+    assert server.call("DELETE", f"/api/matches/{visitor_match}")[0] == 200
+
+    server.login()
+    # The batter's own dismissal, a wide and a plain ball
+    for index in (17, 5, 2):
+        status, body = server.call("DELETE", f"/api/matches/{kept}/balls/{kept_balls[index]}")
+        assert status == 200, body
+    assert server.call("DELETE", f"/api/matches/{dropped}")[0] == 200
+
+    maintained = aggregates(database)
+    assert maintained["player_match_stats"]
+    assert {row[1] for row in maintained["player_match_stats"]} == {kept}
+    server.stop()
+
+    subprocess.run([sys.executable, os.path.join(BACKEND_DIR, "server.py"), "rebuild-aggregates"],
+                   cwd=tmp_path, env=dict(os.environ, PYTHONPATH=BACKEND_DIR, **server.env),
+                   check=True, stdout=subprocess.DEVNULL)
+    assert aggregates(database) == maintained
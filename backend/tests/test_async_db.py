@@ -0,0 +1,67 @@
+"""
+AsyncDatabase: reads on the reader threads, committed writes on the single
+writer thread, and errors reaching the awaiting caller with nothing left behind.
+"""
+
+import asyncio
+import contextvars
+import sqlite3
+import threading
+
+import pytest
+
+from async_db import AsyncDatabase
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / "async.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.execute("INSERT INTO counters VALUES ('hits', 0)")
+    database = AsyncDatabase(lambda: sqlite3.connect(path, check_same_thread=False), readers=2)
+    yield database
+    database.shutdown()
+
+
+def read_hits(cursor):
+    cursor.execute("SELECT value FROM counters WHERE name = 'hits'")
+    return cursor.fetchone()[0], threading.current_thread().name, request_id.get()
+
+
+def add_hit(cursor, fail=False):
+    cursor.execute("UPDATE counters SET value = value + 1 WHERE name = 'hits'")
+    if fail:
+        raise ValueError("scoring rejected")
+    return threading.current_thread().name
+
+
+def test_reads_and_writes_run_on_their_own_threads_with_the_callers_context(database):
+    async def scenario():
+        request_id.set("req-1")
+        writers = await asyncio.gather(*(database.write(add_hit) for _ in range(20)))
+        return writers, await database.read(read_hits)
+
+    writers, (hits, reader, seen_request) = asyncio.run(scenario())
+    assert hits == 20
+    assert {name.rsplit("_", 1)[0] for name in writers} == {"db-writer"}
+    assert reader.startswith("db-reader")
+    assert seen_request == "req-1"
+    stats = database.stats()
+    assert (stats["reads"], stats["writes"], stats["pending_reads"], stats["pending_writes"]) == (1, 20, 0, 0)
+
+
+def test_a_failed_write_raises_to_the_caller_and_rolls_back(database):
+    async def scenario():
+        with pytest.raises(ValueError, match="scoring rejected"):
+            await database.write(add_hit, True)
+        with pytest.raises(sqlite3.OperationalError):
+            await database.read(lambda cursor: cursor.execute("SELECT * FROM missing"))
+        # The writer's connection is not left inside the failed transaction
+        await database.write(add_hit)
+        return await database.read(read_hits)
+
+    hits, _, _ = asyncio.run(scenario())
+    assert hits == 1
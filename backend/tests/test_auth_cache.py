@@ -0,0 +1,77 @@
+"""
+The authenticated user cache: repeat requests skip the token decode and user
+lookup, no entry outlives its token, tokens from before the uid claim still
+resolve, and admin checks see a role change made by the CLI at once.
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+import jwt
+
+from conftest import BACKEND_DIR
+
+
+def as_user(server, token, method, path):
+    previous, server.token = server.token, token
+    try:
+        return server.call(method, path)
+    finally:
+        server.token = previous
+
+
+def cache_stats(server):
+    status, stats = server.call("GET", "/api/auth/cache")
+    assert status == 200, stats
+    return stats
+
+
+def test_cached_sessions_hit_and_admin_checks_see_role_changes(api_server, tmp_path):
+    server = api_server()
+    server.login()
+    scorer = server.token
+    server.login("ops", "ops-pass", admin=True)
+
+    before = cache_stats(server)
+    for _ in range(3):
+        assert as_user(server, scorer, "GET", "/api/me")[0] == 200
+    after = cache_stats(server)
+    # The scorer misses once then hits twice; the admin's own stats call is a hit
+    assert (after["misses"] - before["misses"], after["hits"] - before["hits"]) == (1, 3)
+
+    assert as_user(server, scorer, "GET", "/api/auth/cache")[0] == 403
+    subprocess.run([sys.executable, os.path.join(BACKEND_DIR, "server.py"), "grant-admin", "scorer"],
+                   cwd=server.workdir, env=dict(os.environ, PYTHONPATH=BACKEND_DIR, **server.env),
+                   check=True, stdout=subprocess.DEVNULL)
+    # No waiting out AUTH_CACHE_TTL for the grant
+    assert as_user(server, scorer, "GET", "/api/auth/cache")[0] == 200
+    # and the session cached with the old role was dropped for the rest of the API
+    before = cache_stats(server)
+    assert as_user(server, scorer, "GET", "/api/me")[1]["role"] == "admin"
+    assert cache_stats(server)["misses"] - before["misses"] == 1
+
+    with sqlite3.connect(tmp_path / "cricklytics.db") as conn:
+        conn.execute("UPDATE users SET role = 'user' WHERE username = 'scorer'")
+    assert as_user(server, scorer, "GET", "/api/auth/cache")[0] == 403
+
+
+def test_entries_expire_with_the_token_and_legacy_tokens_resolve(api_server):
+    server = api_server(AUTH_CACHE_TTL="600")
+    server.login()
+    user_id = server.call("GET", "/api/me")[1]["id"]
+
+    # Issued before tokens carried a uid: only the username in `sub`
+    legacy = jwt.encode({"sub": "scorer", "exp": int(time.time()) + 3}, "osho", algorithm="HS256")
+    status, me = as_user(server, legacy, "GET", "/api/me")
+    assert (status, me["id"]) == (200, user_id)
+    assert as_user(server, legacy, "GET", "/api/me")[0] == 200
+
+    unknown = jwt.encode({"sub": "nobody", "exp": int(time.time()) + 60}, "osho", algorithm="HS256")
+    assert as_user(server, unknown, "GET", "/api/me")[0] == 404
+
+    # Cached for well under the cache TTL: the token's exp cuts the entry short
+    time.sleep(3.5)
+    assert as_user(server, legacy, "GET", "/api/me")[0] == 401
@@ -0,0 +1,111 @@
+"""
+The legal_ball_number backfill on a database from before the column existed.
+
+Boot only adds the column; the numbering runs afterwards in chunks on a
+background thread, and must match what ingest_balls assigned. Clients
+polling the balls with ETags or the delta feed must see the renumbering.
+"""
+
+import json
+import sqlite3
+import time
+import urllib.error
+import urllib.request
+
+
+def score_with_extras(server, match_id):
+    extras = {2: "wide", 3: "no-ball", 8: "wide", 9: "bye"}
+    status, body = server.call("POST", f"/api/matches/{match_id}/score/batch", {"balls": [
+        {"match_id": match_id, "innings": 1, "over_number": index // 8, "ball_number": index % 8 + 1,
+         "batsman": "Batter", "bowler": "Bowler", "runs": 1,
+         "extras": 1 if index % 8 in extras else 0, "extras_type": extras.get(index % 8)}
+        for index in range(24)
+    ]})
+    assert status == 200, body
+
+
+def legal_ball_numbers(database):
+    with sqlite3.connect(database) as conn:
+        return conn.execute("""
+            SELECT match_id, innings, over_number, ball_number, legal_ball_number FROM balls
+            ORDER BY match_id, innings, over_number, ball_number
+        """).fetchall()
+
+
+class BallPoller:
+    """A client keeping one match's balls by ETag revalidation and one by the delta feed"""
+
+    def __init__(self, base_url, match_id):
+        self.url = f"{base_url}/api/matches/{match_id}/balls"
+        self.etag = None
+        self.balls = None
+        self.seq = 0
+        self.log = {}
+
+    def poll(self):
+        request = urllib.request.Request(self.url)
+        if self.etag:
+            request.add_header("If-None-Match", self.etag)
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                self.etag = response.headers["ETag"]
+                self.balls = json.loads(response.read())
+        except urllib.error.HTTPError as error:
+            assert error.code == 304
+        with urllib.request.urlopen(f"{self.url}?since={self.seq}", timeout=30) as response:
+            delta = json.loads(response.read())
+        self.log.update((ball["id"], ball) for ball in delta["balls"])
+        for ball_id in delta["deleted"]:
+            self.log.pop(ball_id, None)
+        self.seq = delta["seq"]
+
+    def numbering(self):
+        """(innings, over, ball, legal ball) as the full body and the delta log have them"""
+        return tuple(sorted((ball["innings"], ball["over_number"], ball["ball_number"],
+                             ball["legal_ball_number"]) for ball in balls)
+                     for balls in (self.balls, self.log.values()))
+
+
+def test_legacy_database_is_backfilled_in_chunks(api_server, tmp_path):
+    database = tmp_path / "cricklytics.db"
+    server = api_server()
+    server.login()
+    for _ in range(3):
+        score_with_extras(server, server.create_live_match())
+    expected = legal_ball_numbers(database)
+    server.stop()
+
+    # Roll the file back to before the column and the migrations table existed
+    with sqlite3.connect(database) as conn:
+        indexes = conn.execute("""
+            SELECT name FROM sqlite_master
+            WHERE type = 'index' AND tbl_name = 'balls' AND sql LIKE '%legal_ball_number%'
+        """).fetchall()
+        for (name,) in indexes:
+            conn.execute(f"DROP INDEX {name}")
+        conn.execute("ALTER TABLE balls DROP COLUMN legal_ball_number")
+        conn.execute("DROP TABLE schema_version")
+
+    server = api_server(BACKFILL_CHUNK_MATCHES="1", BACKFILL_PAUSE_SECONDS="0.5")
+    server.login(admin=True)
+    pollers = {match_id: BallPoller(server.base_url, match_id) for match_id in {row[0] for row in expected}}
+    deadline = time.monotonic() + 15
+    while True:
+        for poller in pollers.values():
+            poller.poll()
+        status, backfills = server.call("GET", "/api/db/backfills")
+        assert status == 200, backfills
+        (backfill,) = backfills
+        assert backfill["name"] == "legal_ball_number"
+        assert backfill["total"] == 3
+        if backfill["finished_at"] is not None:
+            break
+        assert time.monotonic() < deadline, backfill
+        time.sleep(0.05)
+    assert backfill["done"] == 3
+    assert legal_ball_numbers(database) == expected
+    for match_id, poller in pollers.items():
+        poller.poll()
+        numbering = sorted(row[1:] for row in expected if row[0] == match_id)
+        assert poller.numbering() == (numbering, numbering)
+    assert {row[4] for row in expected} == {1, 2, 3, 4, 5, 6}
@@ -0,0 +1,109 @@
+"""
+Accept-Encoding negotiation and the compression middleware, driven as plain ASGI.
+"""
+
+import asyncio
+import gzip
+
+import pytest
+
+from compression import CompressedBodyCache, CompressionMiddleware, choose_encoding
+
+BODY = b'{"balls":[' + b",".join(b'{"runs":%d}' % (i % 7) for i in range(500)) + b"]}"
+
+
+def app_sending(*messages):
+    async def app(scope, receive, send):
+        for message in messages:
+            await send(message)
+    return app
+
+
+def start(status=200, content_type=b"application/json", extra=()):
+    return {"type": "http.response.start", "status": status,
+            "headers": [(b"content-type", content_type), *extra]}
+
+
+def run(app, accept_encoding="gzip", path="/api/matches/m1/score"):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": b"",
+             "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    asyncio.run(app(scope, receive, send))
+    headers = {name.decode(): value.decode() for name, value in sent[0]["headers"]}
+    return sent[0]["status"], headers, [message.get("body", b"") for message in sent[1:]]
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate", "gzip"),
+    ("br;q=1.0, gzip;q=0.5", "gzip"),  # brotli is not installed here
+    ("gzip;q=0", None),
+    ("identity", None),
+    ("*", "gzip"),
+    ("", None),
+])
+def test_choose_encoding(header, expected, monkeypatch):
+    monkeypatch.setattr("compression.brotli", None)
+    assert choose_encoding(header) == expected
+
+
+def test_large_body_is_gzipped_with_weak_etag_and_vary():
+    app = CompressionMiddleware(app_sending(
+        start(extra=[(b"etag", b'"m1.4"'), (b"content-length", str(len(BODY)).encode())]),
+        {"type": "http.response.body", "body": BODY},
+    ))
+    status, headers, bodies = run(app)
+    assert status == 200
+    assert headers["content-encoding"] == "gzip"
+    assert headers["etag"] == 'W/"m1.4"'
+    assert headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(bodies[0]) == BODY
+    assert int(headers["content-length"]) == len(bodies[0])
+
+
+def test_versioned_bodies_are_compressed_once():
+    cache = CompressedBodyCache(1024 * 1024)
+    for _ in range(3):
+        run(CompressionMiddleware(app_sending(
+            start(extra=[(b"etag", b'"m1.4"')]), {"type": "http.response.body", "body": BODY},
+        ), cache=cache))
+    assert cache.stats()["cache"]["misses"] == 1
+    assert cache.stats()["cache"]["hits"] == 2
+
+
+@pytest.mark.parametrize("messages, accept_encoding", [
+    # Too small
+    ((start(), {"type": "http.response.body", "body": b"{}"}), "gzip"),
+    # Client did not ask
+    ((start(), {"type": "http.response.body", "body": BODY}), "identity"),
+    # Already compressed archive
+    ((start(content_type=b"application/vnd.cricklytics.match-archive"),
+      {"type": "http.response.body", "body": BODY}), "gzip"),
+])
+def test_bodies_that_pass_through(messages, accept_encoding):
+    status, headers, bodies = run(CompressionMiddleware(app_sending(*messages)), accept_encoding)
+    assert "content-encoding" not in headers
+    assert bodies == [messages[1]["body"]]
+
+
+def test_streams_are_not_buffered():
+    chunks = [{"type": "http.response.body", "body": BODY, "more_body": True},
+              {"type": "http.response.body", "body": b"data: 1\n\n", "more_body": False}]
+    status, headers, bodies = run(CompressionMiddleware(app_sending(
+        start(content_type=b"text/event-stream"), *chunks)))
+    assert "content-encoding" not in headers
+    assert bodies == [BODY, b"data: 1\n\n"]
+
+
+def test_not_modified_keeps_the_weak_validator():
+    status, headers, _ = run(CompressionMiddleware(app_sending(
+        start(status=304, extra=[(b"etag", b'"m1.4"')]), {"type": "http.response.body"},
+    )))
+    assert status == 304
+    assert headers["etag"] == 'W/"m1.4"'
@@ -0,0 +1,56 @@
+"""
+The benchmark data generator: deterministic output the API serves as scored.
+"""
+
+import random
+import sqlite3
+
+from datagen import USER_PASSWORD, generate_database, simulate_match
+
+
+def test_simulated_match_is_deterministic_and_chases_the_target():
+    balls = simulate_match(random.Random(7), "T20")
+    assert balls == simulate_match(random.Random(7), "T20")
+    first, second = ([ball for ball in balls if ball["innings"] == innings] for innings in (1, 2))
+
+    def legal_balls(innings):
+        return sum(ball["extras_type"] not in ("wide", "no-ball") for ball in innings)
+
+    def total(innings):
+        return sum(ball["runs"] + ball["extras"] for ball in innings)
+
+    assert legal_balls(first) <= 120
+    # The chase stops once the target is passed, or when the overs or wickets run out
+    assert total(second) > total(first) or legal_balls(second) == 120 \
+        or sum(ball["wicket"] for ball in second) == 10
+
+
+def test_generated_database_is_served_and_scored_by_the_api(api_server, tmp_path, monkeypatch):
+    monkeypatch.setenv("BCRYPT_ROUNDS", "4")
+    database = tmp_path / "cricklytics.db"
+    summary = generate_database(str(database), users=3, teams=4, matches=6, live=1)
+    assert summary.startswith("3 users, 4 tournament teams, 6 matches")
+    with sqlite3.connect(database) as conn:
+        balls, runs = conn.execute("""
+            SELECT COUNT(*) FILTER (WHERE extras_type IS NULL OR extras_type NOT IN ('wide', 'no-ball')),
+                   SUM(runs + extras)
+            FROM balls
+        """).fetchone()
+
+    server = api_server()
+    status, stats = server.call("GET", "/api/stats/global")
+    assert status == 200
+    assert (stats["totalMatches"], stats["totalBalls"], stats["totalRuns"]) == (6, balls, runs)
+
+    server.login("user0", USER_PASSWORD)
+    status, page = server.call("GET", "/api/v2/matches?status=live")
+    assert status == 200
+    assert len(page["matches"]) == 1
+    match_id = page["matches"][0]["id"]
+    status, state = server.call("GET", f"/api/matches/{match_id}/state")
+    assert status == 200, state
+    status, body = server.call("POST", f"/api/matches/{match_id}/score", {
+        "match_id": match_id, "innings": 2, "over_number": 19, "ball_number": 6,
+        "batsman": "Late Batter", "bowler": "Late Bowler", "runs": 4,
+    })
+    assert status == 200, body
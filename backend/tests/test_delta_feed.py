@@ -0,0 +1,54 @@
+"""
+The delta feed: /balls?since= and /score?since= return only what changed after
+a seq, deletions included, and a batch lands under a single seq.
+"""
+
+import uuid
+
+
+def delivery(match_id, index):
+    return {"id": str(uuid.uuid4()), "match_id": match_id, "innings": 1,
+            "over_number": index // 6, "ball_number": index % 6 + 1,
+            "batsman": "Batter", "bowler": "Bowler", "runs": index % 5}
+
+
+def delta(server, match_id, since, endpoint="balls"):
+    status, body = server.call("GET", f"/api/matches/{match_id}/{endpoint}?since={since}")
+    assert status == 200, body
+    return body
+
+
+def test_delta_feed_returns_only_changes_after_the_seq(api_server):
+    server = api_server()
+    server.login()
+    match_id = server.create_live_match()
+
+    ball_ids = []
+    for index in range(5):
+        status, body = server.call("POST", f"/api/matches/{match_id}/score", delivery(match_id, index))
+        assert status == 200, body
+        ball_ids.append(body["ball_id"])
+
+    everything = delta(server, match_id, 0)
+    assert [ball["id"] for ball in everything["balls"]] == ball_ids
+    assert len({ball["seq"] for ball in everything["balls"]}) == 5
+    seq = everything["seq"]
+    assert delta(server, match_id, seq) == {"balls": [], "deleted": [], "seq": seq}
+    score = delta(server, match_id, seq, "score")
+    assert (score["balls"], score["deleted"], score["seq"]) == ([], [], seq)
+
+    assert server.call("DELETE", f"/api/matches/{match_id}/balls/{ball_ids[2]}")[0] == 200
+    after_delete = delta(server, match_id, seq)
+    assert (after_delete["balls"], after_delete["deleted"]) == ([], [ball_ids[2]])
+    assert after_delete["seq"] > seq
+    assert delta(server, match_id, seq, "score")["deleted"] == [ball_ids[2]]
+    seq = after_delete["seq"]
+
+    batch = [delivery(match_id, index) for index in range(5, 9)]
+    status, body = server.call("POST", f"/api/matches/{match_id}/score/batch", {"balls": batch})
+    assert status == 200, body
+    after_batch = delta(server, match_id, seq)
+    assert [ball["id"] for ball in after_batch["balls"]] == [ball["id"] for ball in batch]
+    assert {ball["seq"] for ball in after_batch["balls"]} == {body["seq"]} == {after_batch["seq"]}
+    assert after_batch["deleted"] == []
+    assert delta(server, match_id, body["seq"]) == {"balls": [], "deleted": [], "seq": body["seq"]}
@@ -0,0 +1,137 @@
+"""
+Round trips through the binary match archive format, and importing archives
+through the API.
+"""
+
+import json
+import sqlite3
+import urllib.request
+import uuid
+
+import pytest
+
+from match_archive import (
+    ArchiveError, decode_match_archive, encode_match_archive, pack_archive_bundle, split_archives,
+)
+
+MATCH = {"id": "m1", "name": "Final", "status": "completed", "version": 4}
+TEAMS = [{"id": "t1", "match_id": "m1", "name": "India",
+          "players": [{"name": "Batter", "role": "Batsman"}]}]
+
+
+def ball(index, **overrides):
+    delivery = {
+        "id": str(uuid.uuid4()), "innings": 1 + index // 120, "over_number": index // 6 % 20,
+        "ball_number": index % 6 + 1, "legal_ball_number": index % 6 + 1,
+        "batsman": f"Batter {index % 3}", "bowler": f"Bowler {index // 6 % 4}",
+        "runs": index % 7 % 5, "extras": 0, "extras_type": None, "wicket": int(index % 17 == 0),
+        "wicket_type": "bowled" if index % 17 == 0 else None,
+        "wicket_player": f"Batter {index % 3}" if index % 17 == 0 else None,
+        "commentary": "Dot ball" if index % 7 % 5 == 0 else "Runs", "created_at": "2025-01-01 10:00:00",
+        "seq": index + 1,
+    }
+    delivery.update(overrides)
+    return delivery
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_round_trip_preserves_every_column(compress):
+    balls = [ball(i, created_at=f"2025-01-01 10:{i // 60 % 60:02d}:{i % 60:02d}") for i in range(240)]
+    archive = encode_match_archive(MATCH, TEAMS, {"current_striker": "Batter 0"}, balls, compress)
+    decoded = decode_match_archive(archive)
+    assert decoded["balls"] == balls
+    assert decoded["match"] == MATCH
+    assert decoded["teams"] == TEAMS
+    assert decoded["state"] == {"current_striker": "Batter 0"}
+
+
+def test_values_outside_the_packed_encodings_fall_back_to_strings():
+    balls = [ball(0, id="client-ball-1", created_at="not a timestamp", commentary=None),
+             ball(1, id=str(uuid.uuid4()).upper(), created_at=None, runs=70000)]
+    decoded = decode_match_archive(encode_match_archive(MATCH, [], None, balls))
+    assert decoded["balls"] == balls
+
+
+def test_repeated_names_are_stored_once():
+    few = encode_match_archive(MATCH, [], None, [ball(i) for i in range(50)], compress=False)
+    many = encode_match_archive(MATCH, [], None, [ball(i) for i in range(500)], compress=False)
+    # Past the id column, each extra ball costs a handful of bytes, not its name strings
+    assert (len(many) - len(few)) / 450 < 16 + 24
+
+
+def test_empty_match_round_trips():
+    assert decode_match_archive(encode_match_archive(MATCH, TEAMS, None, []))["balls"] == []
+
+
+@pytest.mark.parametrize("data", [b"", b"CKAR", b"CKAR\x01\x00\x05\x00", b"CKAR\x09\x00", b"CKAR\x01\x01junk"])
+def test_unreadable_archives_raise_archive_error(data):
+    with pytest.raises(ArchiveError):
+        decode_match_archive(data)
+
+
+def test_truncated_archive_raises_archive_error():
+    archive = encode_match_archive(MATCH, TEAMS, None, [ball(i) for i in range(20)], compress=False)
+    with pytest.raises(ArchiveError):
+        decode_match_archive(archive[:-5])
+
+
+def test_bundle_splits_back_into_archives():
+    archives = [encode_match_archive({**MATCH, "id": f"m{i}"}, [], None, [ball(i)]) for i in range(3)]
+    assert split_archives(pack_archive_bundle(archives)) == archives
+    assert split_archives(archives[0]) == [archives[0]]
+
+
+def post_archives(server, body):
+    request = urllib.request.Request(server.base_url + "/api/matches/archive", data=body, method="POST")
+    request.add_header("Authorization", f"Bearer {server.token}")
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read())
+
+
+def imported_match(match_id, teams=(), balls=(), **overrides):
+    match = {"id": match_id, "name": "Final", "date": "2025-01-01", "venue": "Ground",
+             "match_type": "T20", "team1": "India", "team2": "Pakistan", "status": "completed",
+             "created_by": "someone-elsewhere", "version": 4}
+    match.update(overrides)
+    return encode_match_archive(match, list(teams), None, list(balls))
+
+
+def test_import_cannot_touch_another_users_team_roster(api_server, tmp_path):
+    server = api_server()
+    server.login("alice", "alice-pass")
+    india_before = next(team for team in server.call("GET", "/api/teams")[1] if team["name"] == "India")
+    with sqlite3.connect(tmp_path / "cricklytics.db") as conn:
+        india_id, = conn.execute("""
+            SELECT t.id FROM standalone_teams t JOIN users u ON u.id = t.created_by
+            WHERE u.username = 'alice' AND t.name = 'India'
+        """).fetchone()
+
+    server.login("bob", "bob-pass")
+    teams = [{"id": india_id, "name": "India", "players": [{"name": "Hacked", "role": None}]}]
+    result = post_archives(server, imported_match("m-hijack", teams, [ball(0)]))
+    assert result["results"][0]["status"] == "imported", result
+    imported_teams = server.call("GET", "/api/matches/m-hijack/teams")[1]
+    assert [team["players"] for team in imported_teams] == [[{"name": "Hacked", "role": None}]]
+    assert imported_teams[0]["id"] != india_id
+
+    server.login("alice", "alice-pass")
+    india_after = next(team for team in server.call("GET", "/api/teams")[1] if team["name"] == "India")
+    assert india_after["players"] == india_before["players"]
+
+
+def test_archives_the_database_cannot_take_are_rejected_alone(api_server):
+    server = api_server()
+    server.login()
+    scored = [ball(i) for i in range(6)]
+    assert post_archives(server, imported_match("m-first", balls=scored))["imported"] == 1
+
+    result = post_archives(server, pack_archive_bundle([
+        imported_match("m-undated", balls=[ball(0)], date=None),
+        imported_match("m-clash", balls=[ball(0, id=scored[2]["id"])]),
+        imported_match("m-second", balls=[ball(i) for i in range(6)]),
+    ]))
+    assert [entry["status"] for entry in result["results"]] == ["rejected", "rejected", "imported"]
+    assert "date" in result["results"][0]["detail"]
+    assert server.call("GET", "/api/matches/m-undated")[0] == 404
+    assert server.call("GET", "/api/matches/m-clash")[0] == 404
+    assert len(server.call("GET", "/api/matches/m-first/balls")[1]) == 6
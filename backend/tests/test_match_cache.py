@@ -0,0 +1,120 @@
+"""
+The match read cache: an LRU bounded by bytes and by entries with hit, miss
+and eviction counters, and never a stale body after any write to the match.
+
+The LRU cases run in a child process, since importing server sets up the
+database at import time.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import uuid
+
+from conftest import BACKEND_DIR
+
+LRU_SCRIPT = """
+import json
+from server import MatchResultCache
+
+steps = {}
+cache = MatchResultCache(max_bytes=10, max_entries=3)
+cache.put(("score", "m1", 1), b"aaaa")
+cache.put(("score", "m2", 1), b"bbbb")
+steps["miss"] = cache.get(("score", "m1", 2))
+steps["hit"] = cache.get(("score", "m1", 1)).decode()
+# 12 bytes is over the ceiling: m2 is least recently used, so it goes
+cache.put(("balls", "m1", 1), b"cccc")
+steps["after_bytes"] = sorted(key[0] + ":" + key[1] for key in cache._entries)
+# Small bodies: the fourth entry is over the entry ceiling
+cache.put(("score", "m3", 1), b"d")
+cache.put(("score", "m5", 1), b"f")
+steps["after_entries"] = sorted(key[0] + ":" + key[1] for key in cache._entries)
+steps["stats_before_invalidate"] = cache.stats()
+cache.put(("score", "m4", 1), b"e" * 11)
+cache.invalidate_match("m1")
+steps["stats"] = cache.stats()
+print(json.dumps(steps))
+"""
+
+
+def test_lru_keeps_to_its_byte_and_entry_ceilings_and_counts(tmp_path):
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, DATABASE_FILE=str(tmp_path / "cricklytics.db"))
+    completed = subprocess.run([sys.executable, "-c", LRU_SCRIPT], capture_output=True, text=True,
+                               env=env, cwd=tmp_path, check=True)
+    steps = json.loads(completed.stdout.splitlines()[-1])
+
+    assert (steps["miss"], steps["hit"]) == (None, "aaaa")
+    assert steps["after_bytes"] == ["balls:m1", "score:m1"]
+    assert steps["after_entries"] == ["balls:m1", "score:m3", "score:m5"]
+    assert steps["stats_before_invalidate"] == {
+        "entries": 3, "bytes": 6, "max_entries": 3, "max_bytes": 10,
+        "hits": 1, "misses": 1, "evictions": 2, "hit_ratio": 0.5,
+    }
+    # A body over the byte ceiling is never stored; invalidation is not an eviction
+    assert (steps["stats"]["entries"], steps["stats"]["bytes"]) == (2, 2)
+    assert steps["stats"]["evictions"] == 2
+
+
+def read(server, match_id, path):
+    status, body = server.call("GET", f"/api/matches/{match_id}{path}")
+    assert status == 200, body
+    return body
+
+
+def cached_read(server, match_id, path):
+    """Read twice, so the second comes from the cache if the first was stored"""
+    first = read(server, match_id, path)
+    assert read(server, match_id, path) == first
+    return first
+
+
+def test_no_write_leaves_a_stale_body_behind(api_server):
+    server = api_server()
+    server.login(admin=True)
+    status, body = server.call("POST", "/api/matches", {
+        "name": "Cached", "date": "2025-01-01", "venue": "Ground",
+        "matchType": "T20", "team1": "India", "team2": "Pakistan",
+    })
+    assert status == 200, body
+    match_id = body["match_id"]
+    before = server.call("GET", "/api/cache/stats")[1]
+
+    assert cached_read(server, match_id, "/score")["match"]["status"] == "setup"
+    assert server.call("PATCH", f"/api/matches/{match_id}/start")[0] == 200
+    assert cached_read(server, match_id, "/score")["match"]["status"] == "live"
+
+    assert server.call("POST", f"/api/matches/{match_id}/state", {
+        "current_striker": "Rohit Sharma", "current_non_striker": "Shubman Gill",
+        "current_bowler": "Shaheen Afridi",
+    })[0] == 200
+    assert cached_read(server, match_id, "/score")["match_state"]["current_striker"] == "Rohit Sharma"
+    statistics = cached_read(server, match_id, "/statistics")
+    assert cached_read(server, match_id, "/balls") == []
+
+    ball_id = str(uuid.uuid4())
+    assert server.call("POST", f"/api/matches/{match_id}/score", {
+        "id": ball_id, "match_id": match_id, "innings": 1, "over_number": 0, "ball_number": 1,
+        "batsman": "Rohit Sharma", "bowler": "Shaheen Afridi", "runs": 4,
+    })[0] == 200
+    assert [ball["id"] for ball in cached_read(server, match_id, "/balls")] == [ball_id]
+    assert cached_read(server, match_id, "/score")["innings_scores"]["1"]["runs"] == 4
+    assert cached_read(server, match_id, "/statistics") != statistics
+
+    assert server.call("DELETE", f"/api/matches/{match_id}/balls/{ball_id}")[0] == 200
+    assert cached_read(server, match_id, "/balls") == []
+    assert cached_read(server, match_id, "/score")["innings_scores"] == {}
+    assert cached_read(server, match_id, "/statistics") == statistics
+
+    assert server.call("PATCH", f"/api/matches/{match_id}/status?status=completed")[0] == 200
+    assert cached_read(server, match_id, "/score")["match"]["status"] == "completed"
+
+    stats = server.call("GET", "/api/cache/stats")[1]
+    # Every second read of the twelve was served from the cache
+    assert stats["hits"] - before["hits"] == 12
+    assert stats["entries"] > 0
+
+    assert server.call("DELETE", f"/api/matches/{match_id}")[0] == 200
+    assert server.call("GET", f"/api/matches/{match_id}/score")[0] == 404
+    assert server.call("GET", "/api/cache/stats")[1]["entries"] == 0
@@ -0,0 +1,70 @@
+"""
+Conditional GETs on the match read endpoints: the ETag follows the match
+version, and a revalidation of an unchanged match answers 304 from the
+version lookup alone, without reading the balls.
+"""
+
+import urllib.error
+import urllib.request
+import uuid
+
+READ_PATHS = ("/score", "/statistics", "/visualization", "/balls")
+
+
+def get(server, path, etag=None):
+    """(status, ETag, X-Query-Count) of a GET"""
+    request = urllib.request.Request(server.base_url + path)
+    if etag:
+        request.add_header("If-None-Match", etag)
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+            headers = response.headers
+            status = response.status
+    except urllib.error.HTTPError as error:
+        headers = error.headers
+        status = error.code
+    return status, headers["ETag"], int(headers["X-Query-Count"])
+
+
+def score(server, match_id, index):
+    status, body = server.call("POST", f"/api/matches/{match_id}/score", {
+        "id": str(uuid.uuid4()), "match_id": match_id, "innings": 1, "over_number": index // 6,
+        "ball_number": index % 6 + 1, "batsman": "Batter", "bowler": "Bowler", "runs": index % 5,
+    })
+    assert status == 200, body
+    return body["ball_id"]
+
+
+def test_revalidation_skips_the_balls_until_a_write_changes_the_etag(api_server):
+    # "warn" adds X-Query-Count without failing any route
+    server = api_server(QUERY_BUDGET_MODE="warn")
+    server.login()
+    match_id = server.create_live_match()
+    for index in range(8):
+        score(server, match_id, index)
+
+    etags = {}
+    for path in READ_PATHS:
+        status, etag, full_read = get(server, f"/api/matches/{match_id}{path}")
+        assert status == 200 and etag, path
+        status, same_etag, revalidation = get(server, f"/api/matches/{match_id}{path}", etag)
+        assert (status, same_etag) == (304, etag), path
+        # BEGIN and the version lookup, nothing else
+        assert revalidation == 2, path
+        assert full_read > revalidation, path
+        # A weak validator or a list naming the current tag also matches
+        assert get(server, f"/api/matches/{match_id}{path}", f'"stale", W/{etag}')[0] == 304, path
+        etags[path] = etag
+
+    ball_id = score(server, match_id, 8)
+    for path in READ_PATHS:
+        status, etag, _ = get(server, f"/api/matches/{match_id}{path}", etags[path])
+        assert status == 200, path
+        assert etag != etags[path], path
+        etags[path] = etag
+
+    assert server.call("DELETE", f"/api/matches/{match_id}/balls/{ball_id}")[0] == 200
+    for path in READ_PATHS:
+        status, etag, _ = get(server, f"/api/matches/{match_id}{path}", etags[path])
+        assert (status, etag != etags[path]) == (200, True), path
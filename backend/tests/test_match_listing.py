@@ -0,0 +1,54 @@
+"""
+The match list: /api/matches keeps answering with a plain list of every match,
+and /api/v2/matches pages through the same rows with its filters applied on the
+server, so no page mixes in matches the filter excludes.
+"""
+
+import urllib.parse
+
+
+def create_match(server, name, start=False):
+    status, body = server.call("POST", "/api/matches", {
+        "name": name, "date": "2025-01-01", "venue": "Ground",
+        "matchType": "T20", "team1": "India", "team2": "Pakistan",
+    })
+    assert status == 200, body
+    if start:
+        assert server.call("PATCH", f"/api/matches/{body['match_id']}/start")[0] == 200
+    return body["match_id"]
+
+
+def all_pages(server, query):
+    names, cursor = [], None
+    while True:
+        path = f"/api/v2/matches?{query}" + (f"&cursor={urllib.parse.quote(cursor)}" if cursor else "")
+        status, page = server.call("GET", path)
+        assert status == 200, page
+        assert len(page["matches"]) <= 2
+        names += [match["name"] for match in page["matches"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return names
+
+
+def test_pages_are_filtered_on_the_server_and_the_legacy_list_is_unchanged(api_server):
+    server = api_server()
+    server.login()
+    for index in range(5):
+        create_match(server, f"Match {index}", start=index % 2 == 0)
+
+    status, legacy = server.call("GET", "/api/matches")
+    assert status == 200
+    assert isinstance(legacy, list)
+    newest_first = [match["name"] for match in legacy]
+    assert sorted(newest_first) == [f"Match {index}" for index in range(5)]
+    assert all(match["created_by_name"] == "scorer" for match in legacy)
+
+    assert all_pages(server, "limit=2") == newest_first
+    # Three live matches over two pages of two, none of the setup ones in between
+    assert all_pages(server, "limit=2&status=live") == \
+        [name for name in newest_first if int(name[-1]) % 2 == 0]
+    assert [match["name"] for match in server.call("GET", "/api/matches?status=setup")[1]] == \
+        [name for name in newest_first if int(name[-1]) % 2 == 1]
+
+    assert server.call("GET", "/api/v2/matches?cursor=not-a-cursor")[0] == 400
@@ -0,0 +1,111 @@
+"""
+The live score stream: a snapshot on connect, small ball and ball_deleted
+deltas as the match is scored, and a fresh snapshot for a consumer that fell
+so far behind that its backlog was dropped.
+"""
+
+import json
+import urllib.request
+import uuid
+
+
+class EventStream:
+    """Reads server-sent events off /api/matches/{id}/stream.
+
+    The servers here send keep-alives less often than the read timeout, so an
+    event that never comes fails the test instead of hanging it.
+    """
+
+    def __init__(self, server, match_id):
+        self.response = urllib.request.urlopen(f"{server.base_url}/api/matches/{match_id}/stream",
+                                               timeout=10)
+        assert self.response.headers["Content-Type"].startswith("text/event-stream")
+
+    def next(self):
+        event, data = None, None
+        while True:
+            line = self.response.readline().decode("utf-8")
+            assert line, "stream closed"
+            line = line.rstrip("\n")
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+            elif not line and event is not None:
+                return event, data
+
+    def next_of(self, *events):
+        """The next event of the given kinds, skipping the statistics pushes"""
+        while True:
+            event, data = self.next()
+            if event in events:
+                return event, data
+
+    def close(self):
+        self.response.close()
+
+
+def delivery(match_id, index, **overrides):
+    ball = {"id": str(uuid.uuid4()), "match_id": match_id, "innings": 1,
+            "over_number": index // 6, "ball_number": index % 6 + 1,
+            "batsman": "Batter", "bowler": "Bowler", "runs": index % 4}
+    ball.update(overrides)
+    return ball
+
+
+def test_stream_sends_a_snapshot_then_ball_deltas(api_server):
+    server = api_server(SSE_HEARTBEAT_SECONDS="60")
+    server.login()
+    match_id = server.create_live_match()
+    first = delivery(match_id, 0, runs=4)
+    assert server.call("POST", f"/api/matches/{match_id}/score", first)[0] == 200
+
+    stream = EventStream(server, match_id)
+    try:
+        event, snapshot = stream.next()
+        assert event == "snapshot"
+        assert [ball["id"] for ball in snapshot["balls"]] == [first["id"]]
+        assert snapshot["innings_scores"]["1"]["runs"] == 4
+
+        second = delivery(match_id, 1, runs=6)
+        assert server.call("POST", f"/api/matches/{match_id}/score", second)[0] == 200
+        event, scored = stream.next_of("ball", "ball_deleted", "snapshot")
+        assert event == "ball"
+        assert scored["ball_id"] == second["id"]
+        assert scored["ball"]["runs"] == 6
+        assert scored["seq"] > snapshot["seq"]
+        assert scored["innings_scores"]["1"]["runs"] == 10
+
+        assert server.call("DELETE", f"/api/matches/{match_id}/balls/{first['id']}")[0] == 200
+        event, deleted = stream.next_of("ball", "ball_deleted", "snapshot")
+        assert event == "ball_deleted"
+        assert deleted["ball_id"] == first["id"]
+        assert deleted["seq"] > scored["seq"]
+        assert deleted["innings_scores"]["1"]["runs"] == 6
+        assert deleted["current_over"] == {"innings": 1, "over": 0, "ball": 2}
+    finally:
+        stream.close()
+
+
+def test_slow_consumer_is_resynced_with_a_new_snapshot(api_server):
+    # A one-event queue overflows as soon as a batch publishes faster than the stream drains
+    server = api_server(SSE_QUEUE_SIZE="1", SSE_HEARTBEAT_SECONDS="60")
+    server.login()
+    match_id = server.create_live_match()
+
+    stream = EventStream(server, match_id)
+    try:
+        event, snapshot = stream.next()
+        assert (event, snapshot["balls"]) == ("snapshot", [])
+
+        balls = [delivery(match_id, index) for index in range(40)]
+        status, body = server.call("POST", f"/api/matches/{match_id}/score/batch", {"balls": balls})
+        assert status == 200, body
+
+        # Whatever deltas got through, the backlog was dropped for a full snapshot
+        event, resync = stream.next_of("snapshot")
+        assert [ball["id"] for ball in resync["balls"]] == [ball["id"] for ball in balls]
+        assert resync["seq"] == body["seq"]
+        assert resync["innings_scores"]["1"]["runs"] == sum(ball["runs"] for ball in balls)
+    finally:
+        stream.close()
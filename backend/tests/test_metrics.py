@@ -0,0 +1,77 @@
+"""
+The Prometheus exposition, the instrumented SQLite cursor and /metrics itself.
+"""
+
+import sqlite3
+import urllib.request
+
+from metrics import (
+    InstrumentedConnection,
+    MetricsRegistry,
+    RequestSample,
+    SQLMetrics,
+    request_sample,
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, ('/a "b"',))
+    assert registry.render().splitlines() == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a \\"b\\"",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a \\"b\\"",le="1.0"} 3',
+        'latency_seconds_bucket{route="/a \\"b\\"",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a \\"b\\""} 4.25',
+        'latency_seconds_count{route="/a \\"b\\""} 4',
+    ]
+
+
+def test_instrumented_cursor_feeds_the_request_sample(monkeypatch):
+    registry = MetricsRegistry()
+    sql_metrics = SQLMetrics(registry)
+    monkeypatch.setattr(InstrumentedConnection, "sql_metrics", sql_metrics)
+    conn = sqlite3.connect(":memory:", factory=InstrumentedConnection)
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(n,) for n in range(5)])
+    conn.commit()
+
+    sample = RequestSample(sql_metrics)
+    token = request_sample.set(sample)
+    try:
+        assert len(conn.execute("SELECT id FROM t").fetchall()) == 5
+        assert conn.execute("SELECT id FROM t WHERE id = 3").fetchone() == (3,)
+    finally:
+        request_sample.reset(token)
+    assert sample.statements == 2
+    assert sample.sql > 0
+    # Nothing reaches the shared metrics until the request flushes
+    assert "cricklytics_sql_rows_fetched_total{" not in registry.render()
+    sample.flush()
+
+    exposition = registry.render()
+    assert 'cricklytics_sql_rows_fetched_total{statement="select"} 6' in exposition
+    assert 'cricklytics_sql_statement_duration_seconds_count{statement="select"} 2' in exposition
+    assert 'cricklytics_sql_statement_duration_seconds_count{statement="insert"} 1' in exposition
+    assert 'cricklytics_sql_statement_duration_seconds_count{statement="commit"} 1' in exposition
+
+
+def test_metrics_endpoint_labels_routes_by_template(api_server):
+    server = api_server()
+    server.login()
+    match_id = server.create_live_match()
+    for _ in range(3):
+        assert server.call("GET", f"/api/matches/{match_id}/statistics")[0] == 200
+
+    with urllib.request.urlopen(server.base_url + "/metrics") as response:
+        assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        exposition = response.read().decode()
+    route = 'method="GET",route="/api/matches/{match_id}/statistics"'
+    assert f"cricklytics_http_requests_total{{{route},status=\"200\"}} 3" in exposition
+    assert f"cricklytics_http_request_duration_seconds_count{{{route}}} 3" in exposition
+    assert f'cricklytics_http_request_phase_seconds_total{{{route},phase="sql"}}' in exposition
+    assert f'cricklytics_http_request_phase_seconds_total{{{route},phase="json_encode"}}' in exposition
+    assert match_id not in exposition
@@ -0,0 +1,59 @@
+"""
+The bounded bcrypt process pool: hashing, refusing work past its backlog, and
+keeping a slot taken while a cancelled caller's work still occupies a worker.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from passwords import PasswordHasher, PasswordHasherBusy
+
+
+async def wait_until_idle(hasher, timeout=15):
+    deadline = time.monotonic() + timeout
+    while hasher.stats()["pending"]:
+        assert time.monotonic() < deadline, hasher.stats()
+        await asyncio.sleep(0.05)
+
+
+def test_full_backlog_is_refused_until_work_finishes():
+    async def scenario():
+        hasher = PasswordHasher(workers=1, max_pending=1, rounds=4)
+        try:
+            slow = asyncio.ensure_future(hasher._run(time.sleep, 0.5))
+            await asyncio.sleep(0)
+            with pytest.raises(PasswordHasherBusy):
+                await hasher.hash("second")
+            await slow
+            assert await hasher.verify("pass", await hasher.hash("pass"))
+            assert not await hasher.verify("wrong", await hasher.hash("pass"))
+            return hasher.stats()
+        finally:
+            hasher.shutdown()
+
+    stats = asyncio.run(scenario())
+    assert (stats["pending"], stats["rejected"], stats["completed"]) == (0, 1, 5)
+
+
+def test_cancelled_caller_keeps_the_slot_until_its_worker_is_free():
+    async def scenario():
+        hasher = PasswordHasher(workers=1, max_pending=1, rounds=4)
+        try:
+            slow = asyncio.ensure_future(hasher._run(time.sleep, 1.0))
+            # Long enough for the pool to hand the call to its worker
+            await asyncio.sleep(0.3)
+            slow.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await slow
+            assert hasher.stats()["pending"] == 1
+            with pytest.raises(PasswordHasherBusy):
+                await hasher.hash("meanwhile")
+
+            await wait_until_idle(hasher)
+            assert await hasher.verify("pass", await hasher.hash("pass"))
+        finally:
+            hasher.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,125 @@
+"""
+The boot migration from JSON-in-TEXT rosters to players and team_players.
+
+A database in the pre-migration layout is written by hand, the server boots on
+it, and every legacy roster must come back entry for entry, with the original
+JSON kept for the rows that had nothing to migrate.
+"""
+
+import json
+import sqlite3
+
+import bcrypt
+
+LEGACY_SCHEMA = """
+    CREATE TABLE users (
+        id TEXT PRIMARY KEY,
+        username TEXT UNIQUE NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        role TEXT DEFAULT 'scorer',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE matches (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        date TEXT NOT NULL,
+        venue TEXT NOT NULL,
+        match_type TEXT NOT NULL,
+        team1 TEXT NOT NULL,
+        team2 TEXT NOT NULL,
+        toss_winner TEXT,
+        toss_decision TEXT,
+        batting_first TEXT,
+        team1_score TEXT DEFAULT '0/0',
+        team2_score TEXT DEFAULT 'Yet to bat',
+        status TEXT DEFAULT 'setup',
+        created_by TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE teams (
+        id TEXT PRIMARY KEY,
+        match_id TEXT NOT NULL,
+        name TEXT NOT NULL,
+        players TEXT NOT NULL
+    );
+    CREATE TABLE standalone_teams (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        players TEXT NOT NULL,
+        captain TEXT,
+        vice_captain TEXT,
+        total_matches INTEGER DEFAULT 0,
+        created_by TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+# team id -> (legacy players JSON, roster expected from it)
+STANDALONE_ROSTERS = {
+    "legacy-roles": (
+        json.dumps([{"name": f"Player {n}", "role": "Batsman" if n < 6 else "Bowler"} for n in range(11)]),
+        [{"name": f"Player {n}", "role": "Batsman" if n < 6 else "Bowler"} for n in range(11)],
+    ),
+    "legacy-names": (
+        json.dumps(["R Sharma", "V Kohli"]),
+        [{"name": "R Sharma", "role": None}, {"name": "V Kohli", "role": None}],
+    ),
+    "legacy-mixed": (
+        json.dumps([{"name": "Keeper", "role": "Wicket Keeper"}, {"role": "Bowler"}, {"name": "  "},
+                    "Opener", 7, {"name": "Finisher", "role": "All-rounder", "jersey": 9}]),
+        [{"name": "Keeper", "role": "Wicket Keeper"}, {"name": "Opener", "role": None},
+         {"name": "Finisher", "role": "All-rounder"}],
+    ),
+    "legacy-empty": ("[]", []),
+    "legacy-broken": ("not json", []),
+}
+MATCH_ROSTERS = {
+    "legacy-home": (json.dumps([{"name": "R Sharma", "role": "Batsman"}]),
+                    [{"name": "R Sharma", "role": "Batsman"}]),
+    "legacy-away": (json.dumps({"name": "Not a list"}), []),
+}
+
+
+def write_legacy_database(database):
+    with sqlite3.connect(database) as conn:
+        conn.executescript(LEGACY_SCHEMA)
+        conn.execute("INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, ?)",
+                     ("u1", "legacy", "legacy@example.com",
+                      bcrypt.hashpw(b"legacy-pass", bcrypt.gensalt(4)).decode()))
+        conn.executemany("""
+            INSERT INTO standalone_teams (id, name, players, created_by) VALUES (?, ?, ?, 'u1')
+        """, [(team_id, f"Team {team_id}", players) for team_id, (players, _) in STANDALONE_ROSTERS.items()])
+        conn.execute("""
+            INSERT INTO matches (id, name, date, venue, match_type, team1, team2, status, created_by)
+            VALUES ('m1', 'Legacy', '2024-05-01', 'Ground', 'T20', 'Home', 'Away', 'completed', 'u1')
+        """)
+        conn.executemany("INSERT INTO teams (id, match_id, name, players) VALUES (?, 'm1', ?, ?)",
+                         [("legacy-home", "Home", MATCH_ROSTERS["legacy-home"][0]),
+                          ("legacy-away", "Away", MATCH_ROSTERS["legacy-away"][0])])
+
+
+def test_every_legacy_roster_survives_the_migration(api_server, tmp_path):
+    database = tmp_path / "cricklytics.db"
+    write_legacy_database(database)
+    server = api_server()
+
+    server.login("legacy", "legacy-pass")
+    teams = {team["name"]: team["players"] for team in server.call("GET", "/api/teams")[1]}
+    for team_id, (_, roster) in STANDALONE_ROSTERS.items():
+        assert teams[f"Team {team_id}"] == roster, team_id
+    match_teams = {team["id"]: team["players"] for team in server.call("GET", "/api/matches/m1/teams")[1]}
+    assert match_teams == {team_id: roster for team_id, (_, roster) in MATCH_ROSTERS.items()}
+
+    with sqlite3.connect(database) as conn:
+        kept = dict(((table, team_id), players) for table, team_id, players in
+                    conn.execute("SELECT team_table, team_id, players FROM legacy_team_rosters"))
+        # A name is one player wherever it appears
+        sharma_ids = conn.execute("""
+            SELECT DISTINCT tp.player_id FROM team_players tp JOIN players p ON p.id = tp.player_id
+            WHERE p.name = 'R Sharma'
+        """).fetchall()
+    assert kept == {**{("standalone_teams", team_id): players
+                       for team_id, (players, _) in STANDALONE_ROSTERS.items()},
+                    **{("teams", team_id): players for team_id, (players, _) in MATCH_ROSTERS.items()}}
+    assert len(sharma_ids) == 1
@@ -0,0 +1,102 @@
+"""
+Pool exhaustion: a checkout timeout is a 503 for HTTP callers, and the
+background jobs that share the pool log it and carry on instead of dying.
+
+Each case runs in a child process with a one-connection pool, since the pool
+size and the database are read at import time.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from conftest import BACKEND_DIR
+
+POOL_SCRIPT = """
+import json, threading, time
+import server
+
+pool = server.get_pool()
+held = pool.acquire()
+%s
+print(json.dumps(result))
+"""
+
+RECONCILER_CASE = """
+from fastapi.testclient import TestClient
+
+response = TestClient(server.app).get("/api/stats/global")
+server.GLOBAL_STATS_RECONCILE_SECONDS = 0.01
+thread = threading.Thread(target=server.reconcile_global_stats_periodically, daemon=True)
+thread.start()
+time.sleep(0.3)
+alive_while_starved = thread.is_alive()
+pool.release(held)
+time.sleep(0.1)
+server.global_stats_reconciler_stop.set()
+thread.join(5)
+result = {"status": response.status_code, "retry_after": response.headers.get("retry-after"),
+          "alive_while_starved": alive_while_starved, "stopped": not thread.is_alive(),
+          "timeouts": pool.stats()["timeouts"]}
+"""
+
+TIERING_CASE = """
+server.ARCHIVE_INTERVAL_SECONDS = 0.01
+thread = threading.Thread(target=server.tier_matches_periodically, daemon=True)
+thread.start()
+time.sleep(0.3)
+alive_while_starved = thread.is_alive()
+pool.release(held)
+server.storage_tiering_stop.set()
+thread.join(5)
+result = {"alive_while_starved": alive_while_starved, "stopped": not thread.is_alive(),
+          "timeouts": pool.stats()["timeouts"]}
+"""
+
+BACKFILL_CASE = """
+server.register_backfill(held.cursor(), "legal_ball_number")
+held.commit()
+thread = threading.Thread(target=server.run_backfills, args=(threading.Event(), 0), daemon=True)
+thread.start()
+time.sleep(0.3)
+alive_while_starved = thread.is_alive()
+pool.release(held)
+thread.join(10)
+with server.get_db() as conn:
+    finished = conn.execute("SELECT finished_at IS NOT NULL FROM schema_backfills").fetchone()[0]
+result = {"alive_while_starved": alive_while_starved, "finished": bool(finished),
+          "stopped": not thread.is_alive(), "timeouts": pool.stats()["timeouts"]}
+"""
+
+
+def run_starved(tmp_path, case):
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, DB_POOL_SIZE="1", DB_POOL_TIMEOUT="0.02",
+               DATABASE_FILE=str(tmp_path / "cricklytics.db"), ARCHIVE_DIR=str(tmp_path / "archive"))
+    completed = subprocess.run([sys.executable, "-c", POOL_SCRIPT % case], capture_output=True,
+                               text=True, env=env, cwd=tmp_path, timeout=60)
+    assert completed.returncode == 0, completed.stderr
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def test_reconciler_outlives_pool_timeouts_and_http_gets_503(tmp_path):
+    result = run_starved(tmp_path, RECONCILER_CASE)
+    assert (result["status"], result["retry_after"]) == (503, "1")
+    assert result["alive_while_starved"]
+    assert result["stopped"]
+    assert result["timeouts"] > 2
+
+
+def test_storage_tiering_outlives_pool_timeouts(tmp_path):
+    result = run_starved(tmp_path, TIERING_CASE)
+    assert result["alive_while_starved"]
+    assert result["stopped"]
+    assert result["timeouts"] > 2
+
+
+def test_backfill_retries_through_pool_timeouts(tmp_path):
+    result = run_starved(tmp_path, BACKFILL_CASE)
+    assert result["alive_while_starved"]
+    assert result["stopped"]
+    assert result["finished"]
+    assert result["timeouts"] > 0
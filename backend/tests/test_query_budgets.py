@@ -0,0 +1,108 @@
+"""
+Query budgets and repeated-statement detection, as plain ASGI and against the API.
+"""
+
+import asyncio
+import urllib.request
+
+from metrics import statement_log
+from query_budget import QueryBudgetMiddleware, query_budget, statement_shape
+
+
+def route_running(*statements, budget=None):
+    def endpoint():
+        pass
+    if budget is not None:
+        endpoint = query_budget(budget)(endpoint)
+
+    async def app(scope, receive, send):
+        scope["endpoint"] = endpoint
+        statement_log.get().extend(statements)
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b"{}"})
+    return app
+
+
+def run(app):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    scope = {"type": "http", "method": "GET", "path": "/api/things", "query_string": b"", "headers": []}
+    asyncio.run(app(scope, receive, send))
+    headers = {name.decode(): value.decode() for name, value in sent[0]["headers"]}
+    return sent[0]["status"], headers, b"".join(message.get("body", b"") for message in sent[1:])
+
+
+def test_statement_shape_folds_literals_and_placeholder_lists():
+    assert statement_shape("SELECT * FROM t\n  WHERE id IN (?, ?, ?) AND name = 'x''y' LIMIT 10") == \
+        statement_shape("SELECT * FROM t WHERE id IN (?) AND name = 'z' LIMIT 5") == \
+        "SELECT * FROM t WHERE id IN (?) AND name = ? LIMIT ?"
+
+
+def test_repeats_are_flagged_and_pragmas_not_counted():
+    statements = ["PRAGMA cache_size=-2000"] + [f"SELECT name FROM players WHERE id = {n}" for n in range(5)]
+    status, headers, _ = run(QueryBudgetMiddleware(route_running(*statements, budget=5), mode="raise"))
+    assert status == 200
+    assert headers["x-query-count"] == "5"
+    assert headers["x-query-repeats"] == "1"
+
+
+def test_over_budget_raises_only_in_raise_mode():
+    statements = ["SELECT 1", "SELECT 2", "UPDATE t SET v = 1"]
+    status, headers, _ = run(QueryBudgetMiddleware(route_running(*statements, budget=2), mode="warn"))
+    assert (status, headers["x-query-count"]) == (200, "3")
+
+    status, _, body = run(QueryBudgetMiddleware(route_running(*statements, budget=2), mode="raise"))
+    assert status == 500
+    assert body.decode().splitlines() == [
+        "GET /api/things ran 3 SQL statements, over its budget of 2",
+        "  2 x SELECT ?",
+        "  1 x UPDATE t SET v = ?",
+    ]
+
+
+def test_budgeted_routes_stay_within_budget(api_server):
+    server = api_server(QUERY_BUDGET_MODE="raise", QUERY_REPEAT_THRESHOLD="3")
+    server.login()
+    match_id = server.create_live_match()
+    status, body = server.call("POST", f"/api/matches/{match_id}/score/batch", {"balls": [
+        {"match_id": match_id, "innings": 1 + n // 60, "over_number": n % 60 // 6,
+         "ball_number": n % 6 + 1, "batsman": f"Batter {n // 7 % 11}",
+         "bowler": f"Bowler {n // 6 % 5}", "runs": n % 5}
+        for n in range(120)
+    ]})
+    assert status == 200, body
+
+    for path in ("", "/teams", "/state", "/score", "/balls", "/balls?since=0", "/statistics",
+                 "/visualization", "/partnerships?innings=1"):
+        with urllib.request.urlopen(f"{server.base_url}/api/matches/{match_id}{path}") as response:
+            assert response.status == 200
+            assert int(response.headers["X-Query-Count"]) > 0, path
+            assert response.headers["X-Query-Repeats"] is None, path
+    for path in ("/api/matches", "/api/v2/matches", "/api/stats/global", "/api/leaderboards",
+                 "/api/players/Batter%201/stats"):
+        assert server.call("GET", path)[0] == 200, path
+    status, teams = server.call("GET", "/api/teams")
+    assert status == 200 and len(teams) == 4
+    assert all(len(team["players"]) == 11 for team in teams)
+
+    # With a viewer connected, scoring also reads back what the stream is sent
+    stream = urllib.request.urlopen(f"{server.base_url}/api/matches/{match_id}/stream")
+    try:
+        assert stream.readline().startswith(b"event: snapshot")
+        ball = {"id": "streamed-ball", "match_id": match_id, "innings": 2, "over_number": 10,
+                "ball_number": 1, "batsman": "Batter 1", "bowler": "Bowler 1", "runs": 4}
+        status, body = server.call("POST", f"/api/matches/{match_id}/score", ball)
+        assert status == 200, body
+        status, body = server.call("DELETE", f"/api/matches/{match_id}/balls/streamed-ball")
+        assert status == 200, body
+    finally:
+        stream.close()
+    assert server.call("PATCH", f"/api/matches/{match_id}/status?status=completed")[0] == 200
+    assert server.call("DELETE", f"/api/matches/{match_id}")[0] == 200
@@ -0,0 +1,61 @@
+"""
+render_json under both encoders: the same values either way, and the same
+refusal of NaN and infinity.
+
+server is imported in a child process per encoder, since JSON_ENCODER is read
+and the database is set up at import time.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import BACKEND_DIR
+
+RENDER_SCRIPT = """
+import json, sys
+import server
+
+results = []
+for case in json.loads(sys.stdin.read()):
+    value = eval(case)
+    try:
+        results.append(["ok", server.render_json(value).decode("utf-8")])
+    except ValueError as error:
+        results.append(["ValueError", str(error)])
+print(json.dumps([server.JSON_ENCODER, results]))
+"""
+
+CASES = [
+    "{'big': 1e16, 'small': 1e-7, 'name': 'Dhoni ✓', 'scores': {1: 120, 2: 121}}",
+    "[2 ** 70, -(2 ** 64)]",
+    "{'strike_rate': float('nan')}",
+    "[[1.5, float('inf')]]",
+]
+
+
+def render(tmp_path, encoder):
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, JSON_ENCODER=encoder,
+               DATABASE_FILE=str(tmp_path / f"{encoder}.db"))
+    completed = subprocess.run([sys.executable, "-c", RENDER_SCRIPT], input=json.dumps(CASES),
+                               capture_output=True, text=True, env=env, cwd=tmp_path, check=True)
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def test_encoders_agree_on_values_and_reject_nan(tmp_path):
+    pytest.importorskip("orjson")
+    used_stdlib, stdlib = render(tmp_path, "json")
+    used_orjson, fast = render(tmp_path, "orjson")
+    assert (used_stdlib, used_orjson) == ("json", "orjson")
+
+    for case, expected, actual in zip(CASES, stdlib, fast):
+        assert expected[0] == actual[0], case
+        if expected[0] == "ok":
+            assert json.loads(expected[1]) == json.loads(actual[1]), case
+        else:
+            assert expected[1] == actual[1], case
+    assert [outcome for outcome, _ in fast] == ["ok", "ok", "ValueError", "ValueError"]
+    assert json.loads(fast[1][1]) == [2 ** 70, -(2 ** 64)]
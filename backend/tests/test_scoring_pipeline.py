@@ -0,0 +1,418 @@
+"""
+Crash recovery of the write-ahead scoring pipeline.
+
+The unit tests drive ScoringPipeline with an in-memory flush callback; the
+server tests run the API in pipeline mode in a child process, SIGKILL it with
+deliveries still unflushed and check that a restart writes every acknowledged
+ball exactly once.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+import pytest
+
+from scoring_pipeline import DURABILITY_ENQUEUE, DURABILITY_FLUSH, ScoringPipeline
+
+
+def ball(index, **overrides):
+    delivery = {
+        "id": str(uuid.uuid4()), "innings": 1, "over_number": index // 6,
+        "ball_number": index % 6 + 1, "batsman": "Batter", "bowler": "Bowler",
+        "runs": index % 5, "extras": 0, "extras_type": None, "wicket": False,
+    }
+    delivery.update(overrides)
+    return delivery
+
+
+class RecordingStore:
+    """flush_group stand-in: commits into a dict keyed by ball id, like the real ingest"""
+
+    def __init__(self):
+        self.rows = {}
+        self.groups = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.failures = 0
+        # Ball ids whose insert fails outright, or that belong to another match
+        self.poison = set()
+        self.foreign = set()
+
+    def flush(self, entries):
+        self.gate.wait()
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        if any(entry.ball["id"] in self.poison for entry in entries):
+            raise sqlite3.IntegrityError("NOT NULL constraint failed: balls.bowler")
+        self.groups.append(len(entries))
+        outcomes = []
+        for entry in entries:
+            if entry.ball["id"] in self.foreign:
+                outcomes.append({"ball_id": entry.ball["id"], "status": "rejected",
+                                 "detail": "Ball id belongs to another match"})
+                continue
+            status = "duplicate" if entry.ball["id"] in self.rows else "created"
+            self.rows.setdefault(entry.ball["id"], (entry.match_id, entry.ball))
+            outcomes.append({"ball_id": entry.ball["id"], "status": status})
+        return outcomes
+
+
+def crash(pipeline):
+    """Abandon a pipeline the way a killed process would: no flush, no cleanup"""
+    pipeline._stopping = True
+    with pipeline._cond:
+        pipeline._cond.notify_all()
+    pipeline._journal.close()
+    pipeline._journal = None
+
+
+def test_flush_durability_acknowledges_after_commit(tmp_path):
+    store = RecordingStore()
+    pipeline = ScoringPipeline(str(tmp_path / "journal"), store.flush, DURABILITY_FLUSH, interval=0.001)
+    pipeline.start()
+    try:
+        futures = pipeline.submit("m1", [ball(i) for i in range(5)])
+        results = [future.result(5) for future in futures]
+        assert [result["status"] for result in results] == ["created"] * 5
+        assert len(store.rows) == 5
+    finally:
+        pipeline.stop()
+
+
+def test_concurrent_submits_share_group_commits(tmp_path):
+    store = RecordingStore()
+    store.gate.clear()
+    pipeline = ScoringPipeline(str(tmp_path / "journal"), store.flush, interval=0.001)
+    pipeline.start()
+    try:
+        futures = []
+        for index in range(50):
+            futures += pipeline.submit(f"m{index % 3}", [ball(index)])
+        store.gate.set()
+        for future in futures:
+            future.result(5)
+        assert sum(store.groups) == 50
+        assert len(store.groups) < 50
+    finally:
+        pipeline.stop()
+
+
+def test_unflushed_entries_are_replayed_after_crash(tmp_path):
+    journal = str(tmp_path / "journal")
+    store = RecordingStore()
+    store.gate.clear()
+    pipeline = ScoringPipeline(journal, store.flush, DURABILITY_ENQUEUE, interval=0.001)
+    pipeline.start()
+    deliveries = [ball(i) for i in range(8)]
+    pipeline.submit("m1", deliveries)
+    crash(pipeline)
+    assert store.rows == {}
+
+    recovered = RecordingStore()
+    restarted = ScoringPipeline(journal, recovered.flush, DURABILITY_ENQUEUE, interval=0.001)
+    restarted.start()
+    try:
+        assert restarted.wait_flushed(5)
+        assert [recovered.rows[d["id"]][1] for d in deliveries] == deliveries
+        assert restarted.stats()["replayed"] == 8
+    finally:
+        restarted.stop()
+
+
+def test_journal_is_truncated_once_everything_is_committed(tmp_path):
+    journal = tmp_path / "journal"
+    store = RecordingStore()
+    pipeline = ScoringPipeline(str(journal), store.flush, interval=0.001)
+    pipeline.start()
+    try:
+        for future in pipeline.submit("m1", [ball(i) for i in range(3)]):
+            future.result(5)
+        assert pipeline.wait_flushed(5)
+        assert journal.read_bytes() == b""
+    finally:
+        pipeline.stop()
+
+
+def test_replay_skips_a_torn_final_line(tmp_path):
+    journal = tmp_path / "journal"
+    complete = ball(0)
+    journal.write_bytes(
+        json.dumps({"match_id": "m1", "ball": complete}).encode() + b"\n"
+        + b'{"match_id": "m1", "ball": {"id": "tor'
+    )
+    store = RecordingStore()
+    pipeline = ScoringPipeline(str(journal), store.flush, interval=0.001)
+    pipeline.start()
+    try:
+        assert pipeline.wait_flushed(5)
+        assert list(store.rows) == [complete["id"]]
+    finally:
+        pipeline.stop()
+
+
+def test_failed_group_commit_is_retried_in_order(tmp_path):
+    store = RecordingStore()
+    store.failures = 2
+    pipeline = ScoringPipeline(str(tmp_path / "journal"), store.flush, interval=0.001)
+    pipeline.start()
+    try:
+        deliveries = [ball(i) for i in range(4)]
+        for future in pipeline.submit("m1", deliveries):
+            future.result(5)
+        assert list(store.rows) == [d["id"] for d in deliveries]
+        assert pipeline.stats()["failed_groups"] == 2
+    finally:
+        pipeline.stop()
+
+
+def test_poison_delivery_fails_alone_and_the_rest_commit(tmp_path):
+    store = RecordingStore()
+    store.gate.clear()
+    pipeline = ScoringPipeline(str(tmp_path / "journal"), store.flush, interval=0.001)
+    pipeline.start()
+    try:
+        deliveries = [ball(i) for i in range(5)]
+        store.poison.add(deliveries[2]["id"])
+        futures = pipeline.submit("m1", deliveries)
+        store.gate.set()
+        with pytest.raises(sqlite3.IntegrityError):
+            futures[2].result(5)
+        for future in futures[:2] + futures[3:]:
+            assert future.result(5)["status"] == "created"
+        more = pipeline.submit("m1", [ball(i) for i in range(5, 9)])
+        for future in more:
+            future.result(5)
+        # Only the group that failed is split up
+        assert store.groups[-1] == 4
+        assert list(store.rows) == [d["id"] for d in deliveries if d["id"] not in store.poison] \
+            + [future.result()["ball_id"] for future in more]
+        # The caller was still waiting, so the failure is theirs, not a dead letter
+        assert pipeline.stats()["dead_lettered"] == 0
+    finally:
+        pipeline.stop()
+
+
+def test_acknowledged_deliveries_that_fail_are_dead_lettered(tmp_path):
+    journal = tmp_path / "journal"
+    store = RecordingStore()
+    store.gate.clear()
+    pipeline = ScoringPipeline(str(journal), store.flush, DURABILITY_ENQUEUE, interval=0.001)
+    pipeline.start()
+    try:
+        deliveries = [ball(i) for i in range(4)]
+        store.poison.add(deliveries[1]["id"])
+        store.foreign.add(deliveries[3]["id"])
+        pipeline.submit("m1", deliveries)
+        store.gate.set()
+        assert pipeline.wait_flushed(5)
+        assert set(store.rows) == {deliveries[0]["id"], deliveries[2]["id"]}
+        assert journal.read_bytes() == b""
+
+        dead = [json.loads(line) for line in (tmp_path / "journal.dead").read_text().splitlines()]
+        assert [(entry["match_id"], entry["ball"]) for entry in dead] == \
+            [("m1", deliveries[1]), ("m1", deliveries[3])]
+        assert "NOT NULL" in dead[0]["error"]
+        assert dead[1]["error"] == "Ball id belongs to another match"
+        assert pipeline.stats()["dead_lettered"] == 2
+    finally:
+        pipeline.stop()
+
+
+def test_hooks_see_replayed_and_settled_entries(tmp_path):
+    journal = str(tmp_path / "journal")
+    store = RecordingStore()
+    store.gate.clear()
+    pipeline = ScoringPipeline(journal, store.flush, DURABILITY_ENQUEUE, interval=0.001)
+    pipeline.start()
+    deliveries = [ball(i) for i in range(3)]
+    pipeline.submit("m1", deliveries)
+    crash(pipeline)
+
+    replayed, settled = [], []
+    recovered = RecordingStore()
+    recovered.failures = 1
+    restarted = ScoringPipeline(journal, recovered.flush, DURABILITY_ENQUEUE, interval=0.001,
+                                on_replay=lambda entries: replayed.extend(e.ball["id"] for e in entries),
+                                on_done=lambda entries: settled.extend(e.ball["id"] for e in entries))
+    restarted.start()
+    try:
+        assert replayed == [d["id"] for d in deliveries]
+        assert restarted.wait_flushed(5)
+        # The retried group is reported once, after it committed
+        assert settled == replayed
+    finally:
+        restarted.stop()
+
+
+def test_second_process_cannot_open_the_same_journal(tmp_path):
+    journal = str(tmp_path / "journal")
+    first = ScoringPipeline(journal, RecordingStore().flush)
+    first.start()
+    try:
+        with pytest.raises(RuntimeError):
+            ScoringPipeline(journal, RecordingStore().flush).start()
+    finally:
+        first.stop()
+
+
+def read_balls(database, match_id):
+    conn = sqlite3.connect(database)
+    try:
+        return conn.execute("""
+            SELECT id, legal_ball_number FROM balls WHERE match_id = ?
+            ORDER BY innings, over_number, ball_number
+        """, (match_id,)).fetchall()
+    finally:
+        conn.close()
+
+
+def wait_for_balls(server, match_id, count, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status, balls = server.call("GET", f"/api/matches/{match_id}/balls")
+        if status == 200 and len(balls) >= count:
+            return balls
+        time.sleep(0.05)
+    raise AssertionError(f"expected {count} balls")
+
+
+def test_server_recovers_enqueue_acked_balls_after_kill(api_server, tmp_path):
+    database = str(tmp_path / "cricklytics.db")
+    # A flush interval far beyond the test keeps every ball in the queue
+    server = api_server(SCORING_MODE="pipeline", SCORING_DURABILITY="enqueue",
+                        SCORING_FLUSH_INTERVAL_MS="600000")
+    server.login()
+    match_id = server.create_live_match()
+
+    deliveries = [ball(i, match_id=match_id) for i in range(6)]
+    deliveries.insert(3, ball(2, match_id=match_id, ball_number=99, extras=1, extras_type="wide"))
+    for delivery in deliveries:
+        status, body = server.call("POST", f"/api/matches/{match_id}/score", delivery)
+        assert status == 200, body
+        assert body["ball_id"] == delivery["id"]
+    assert read_balls(database, match_id) == []
+    server.kill()
+
+    restarted = api_server(SCORING_MODE="pipeline", SCORING_DURABILITY="enqueue")
+    restarted.login()
+    balls = wait_for_balls(restarted, match_id, len(deliveries))
+    assert sorted(b["id"] for b in balls) == sorted(d["id"] for d in deliveries)
+
+    status, score = restarted.call("GET", f"/api/matches/{match_id}/score")
+    assert score["innings_scores"]["1"]["runs"] == sum(d["runs"] + d["extras"] for d in deliveries)
+    assert score["innings_scores"]["1"]["balls"] == 6
+    restarted.stop()
+
+    # Nothing left to replay: a third boot must not write the balls again
+    third = api_server(SCORING_MODE="pipeline", SCORING_DURABILITY="enqueue")
+    third.login()
+    assert len(read_balls(database, match_id)) == len(deliveries)
+
+
+def test_enqueue_acked_balls_are_read_back_before_they_commit(api_server, tmp_path):
+    database = str(tmp_path / "cricklytics.db")
+    server = api_server(SCORING_MODE="pipeline", SCORING_DURABILITY="enqueue",
+                        SCORING_FLUSH_INTERVAL_MS="600000")
+    server.login()
+    match_id = server.create_live_match()
+    status, before = server.call("GET", f"/api/matches/{match_id}/balls?since=0")
+    assert status == 200
+
+    first = ball(0, match_id=match_id, runs=4)
+    status, body = server.call("POST", f"/api/matches/{match_id}/score", first)
+    assert status == 200, body
+    status, score = server.call("GET", f"/api/matches/{match_id}/score")
+    assert [b["id"] for b in score["balls"]] == [first["id"]]
+    assert score["innings_scores"]["1"]["runs"] == 4
+    assert score["current_over"] == {"innings": 1, "over": 0, "ball": 1}
+
+    wide = ball(1, match_id=match_id, ball_number=2, extras=1, extras_type="wide", runs=0)
+    second = ball(1, match_id=match_id, ball_number=3, runs=1)
+    status, body = server.call("POST", f"/api/matches/{match_id}/score/batch",
+                               {"balls": [wide, second, first]})
+    assert status == 200, body
+    assert [(r["status"], r["legal_ball_number"]) for r in body["results"]] == \
+        [("accepted", 1), ("accepted", 2), ("duplicate", 1)]
+    assert read_balls(database, match_id) == []
+
+    status, balls = server.call("GET", f"/api/matches/{match_id}/balls")
+    assert [(b["id"], b["legal_ball_number"], b["seq"]) for b in balls] == \
+        [(first["id"], 1, None), (wide["id"], 1, None), (second["id"], 2, None)]
+    status, delta = server.call("GET", f"/api/matches/{match_id}/balls?since={before['seq']}")
+    assert [b["id"] for b in delta["balls"]] == [first["id"], wide["id"], second["id"]]
+    assert delta["seq"] == before["seq"]
+    status, score = server.call("GET", f"/api/matches/{match_id}/score")
+    assert score["innings_scores"]["1"] == {"runs": 6, "wickets": 0, "overs": 0, "balls": 2,
+                                            "extras": 1, "balls_in_current_over": 2}
+
+    # A drain commits the queue; the same balls are then read from SQLite with their seq
+    server.stop()
+    restarted = api_server(SCORING_MODE="pipeline", SCORING_DURABILITY="enqueue")
+    restarted.login()
+    balls = wait_for_balls(restarted, match_id, 3)
+    assert [(b["id"], b["legal_ball_number"]) for b in balls] == \
+        [(first["id"], 1), (wide["id"], 1), (second["id"], 2)]
+    assert read_balls(database, match_id) == [(b["id"], b["legal_ball_number"]) for b in balls]
+
+
+def test_server_replay_of_committed_entries_is_idempotent(api_server, tmp_path):
+    database = str(tmp_path / "cricklytics.db")
+    server = api_server(SCORING_MODE="pipeline", SCORING_DURABILITY="flush")
+    server.login()
+    match_id = server.create_live_match()
+
+    committed = [ball(i, match_id=match_id) for i in range(3)]
+    status, body = server.call("POST", f"/api/matches/{match_id}/score/batch", {"balls": committed})
+    assert status == 200, body
+    # Flush durability answers only after the commit
+    assert len(read_balls(database, match_id)) == 3
+    server.kill()
+
+    # A crash between commit and journal truncation leaves committed entries behind
+    fresh = ball(3, match_id=match_id)
+    with open(database + ".journal", "wb") as journal:
+        for delivery in committed + [fresh]:
+            journal.write(json.dumps({"match_id": match_id, "ball": delivery}).encode() + b"\n")
+
+    restarted = api_server(SCORING_MODE="pipeline", SCORING_DURABILITY="flush")
+    restarted.login()
+    balls = wait_for_balls(restarted, match_id, 4)
+    assert len(balls) == 4
+    assert [number for _, number in read_balls(database, match_id)] == [1, 2, 3, 4]
+
+
+def test_deleted_balls_stay_deleted_when_resent_or_replayed(api_server, tmp_path):
+    database = str(tmp_path / "cricklytics.db")
+    server = api_server()
+    server.login()
+    match_id = server.create_live_match()
+
+    deliveries = [ball(i, match_id=match_id) for i in range(3)]
+    status, body = server.call("POST", f"/api/matches/{match_id}/score/batch", {"balls": deliveries})
+    assert status == 200, body
+    status, body = server.call("DELETE", f"/api/matches/{match_id}/balls/{deliveries[1]['id']}")
+    assert status == 200, body
+
+    # A client resending the batch after a dropped connection
+    status, body = server.call("POST", f"/api/matches/{match_id}/score/batch", {"balls": deliveries})
+    assert status == 200, body
+    assert [result["status"] for result in body["results"]] == ["duplicate", "deleted", "duplicate"]
+    assert body["seq"] is None
+    server.kill()
+
+    # A journal still holding the deleted ball when the process died
+    with open(database + ".journal", "wb") as journal:
+        for delivery in deliveries:
+            journal.write(json.dumps({"match_id": match_id, "ball": delivery}).encode() + b"\n")
+    restarted = api_server(SCORING_MODE="pipeline", SCORING_DURABILITY="flush")
+    restarted.login(admin=True)
+    deadline = time.monotonic() + 10
+    while restarted.call("GET", "/api/scoring/pipeline")[1]["flushed"] < len(deliveries):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert [ball_id for ball_id, _ in read_balls(database, match_id)] == \
+        [deliveries[0]["id"], deliveries[2]["id"]]
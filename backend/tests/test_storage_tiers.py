@@ -0,0 +1,154 @@
+"""
+Completed matches moving from the live database to the season archives.
+
+The server runs with the tiering job on a short interval; reads of a match
+must not change once it has moved, scoring writes to it are refused, and its
+owner can still delete it.
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+from conftest import BACKEND_DIR
+
+
+def score_and_complete(server, match_id, count=30):
+    status, body = server.call("POST", f"/api/matches/{match_id}/score/batch", {"balls": [
+        {"match_id": match_id, "innings": 1 + index // 18, "over_number": index % 18 // 6,
+         "ball_number": index % 6 + 1, "batsman": f"Batter {index % 3}",
+         "bowler": f"Bowler {index // 6 % 2}", "runs": index % 5, "wicket": index % 11 == 0}
+        for index in range(count)
+    ]})
+    assert status == 200, body
+    assert server.call("PATCH", f"/api/matches/{match_id}/status?status=completed")[0] == 200
+
+
+def wait_until_archived(server, match_id, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status, match = server.call("GET", f"/api/matches/{match_id}")
+        assert status == 200, match
+        if match["archived_season"] is not None:
+            return match
+        time.sleep(0.1)
+    raise AssertionError("match was never archived")
+
+
+READS = ("/score", "/statistics", "/balls", "/teams", "/state", "/visualization")
+
+
+def test_archived_match_reads_are_unchanged_and_writes_conflict(api_server, tmp_path):
+    server = api_server(ARCHIVE_INTERVAL_SECONDS="0.2", ARCHIVE_AFTER_DAYS="0")
+    server.login()
+    old_match = server.create_live_match()
+    score_and_complete(server, old_match)
+    # Just as old, but still being scored
+    live_match = server.create_live_match()
+    before = {path: server.call("GET", f"/api/matches/{old_match}{path}")[1] for path in READS}
+    player_stats = server.call("GET", "/api/players/Batter%200/stats")[1]
+
+    match = wait_until_archived(server, old_match)
+    assert match["archived_season"] == "2025"
+    assert (tmp_path / "archive" / "cricklytics-2025.db").exists()
+    for path in READS:
+        assert server.call("GET", f"/api/matches/{old_match}{path}")[1] == before[path], path
+    assert server.call("GET", "/api/players/Batter%200/stats")[1] == player_stats
+
+    for method, path in (("PATCH", "/status?status=live"), ("PATCH", "/start")):
+        status, body = server.call(method, f"/api/matches/{old_match}{path}")
+        assert status == 409, (path, body)
+
+    assert server.call("GET", "/api/db/tiers")[0] == 403
+    scorer_token = server.token
+    server.login("ops", "ops-pass", admin=True)
+    status, tiers = server.call("GET", "/api/db/tiers")
+    server.token = scorer_token
+    assert status == 200, tiers
+    assert tiers["archives"]["2025"] == {"matches": 1, "bytes": tiers["archives"]["2025"]["bytes"]}
+    assert tiers["archives"]["2025"]["matches"] == 1
+    assert tiers["live"]["matches"] == 1
+    assert server.call("GET", f"/api/matches/{live_match}")[1]["archived_season"] is None
+
+    assert server.call("DELETE", f"/api/matches/{old_match}")[0] == 200
+    assert server.call("GET", f"/api/matches/{old_match}")[0] == 404
+    assert server.call("GET", "/api/players/Batter%200/stats")[1]["batting"]["runs"] == 0
+    with sqlite3.connect(tmp_path / "archive" / "cricklytics-2025.db") as archive:
+        for table in ("matches", "innings_totals", "teams", "balls", "match_state"):
+            column = "id" if table == "matches" else "match_id"
+            assert archive.execute(f"SELECT COUNT(*) FROM {table} WHERE {column} = ?",
+                                   (old_match,)).fetchone() == (0,), table
+
+
+def test_backdated_matches_stay_live_until_they_are_old_themselves(api_server):
+    server = api_server(ARCHIVE_INTERVAL_SECONDS="0.1", ARCHIVE_AFTER_DAYS="30")
+    server.login()
+    match_id = server.create_live_match()
+    score_and_complete(server, match_id)
+    time.sleep(1)
+    assert server.call("GET", f"/api/matches/{match_id}")[1]["archived_season"] is None
+    assert server.call("DELETE", f"/api/matches/{match_id}")[0] == 200
+
+
+def test_archived_matches_survive_a_restart(api_server):
+    server = api_server(ARCHIVE_INTERVAL_SECONDS="0.2", ARCHIVE_AFTER_DAYS="0")
+    server.login()
+    match_id = server.create_live_match()
+    score_and_complete(server, match_id)
+    score = server.call("GET", f"/api/matches/{match_id}/score")[1]
+    wait_until_archived(server, match_id)
+    server.stop()
+
+    server = api_server(ARCHIVE_INTERVAL_SECONDS="0")
+    assert server.call("GET", f"/api/matches/{match_id}/score")[1] == score
+
+
+def team_filtered_stats(server):
+    return (server.call("GET", "/api/leaderboards?stat=runs&team=India")[1]["leaders"],
+            server.call("GET", "/api/players/Rohit%20Sharma/stats?team=India")[1])
+
+
+def archive_matches(server):
+    subprocess.run([sys.executable, os.path.join(BACKEND_DIR, "server.py"), "archive-matches",
+                    "--older-than", "0"],
+                   cwd=server.workdir, env=dict(os.environ, PYTHONPATH=BACKEND_DIR, **server.env),
+                   check=True, stdout=subprocess.DEVNULL)
+
+
+def test_team_filtered_career_stats_keep_archived_matches(api_server, tmp_path):
+    server = api_server(ARCHIVE_INTERVAL_SECONDS="0")
+    server.login()
+    match_id = server.create_live_match()
+    # Rohit Sharma is on the India roster the match copies from its standalone team
+    status, body = server.call("POST", f"/api/matches/{match_id}/score/batch", {"balls": [
+        {"match_id": match_id, "innings": 1, "over_number": index // 6, "ball_number": index % 6 + 1,
+         "batsman": "Rohit Sharma", "bowler": "Shaheen Shah Afridi", "runs": 4}
+        for index in range(12)
+    ]})
+    assert status == 200, body
+    assert server.call("PATCH", f"/api/matches/{match_id}/status?status=completed")[0] == 200
+    leaders, career = team_filtered_stats(server)
+    assert [leader["player"] for leader in leaders] == ["Rohit Sharma"]
+    assert career["batting"]["runs"] == 48
+    server.stop()
+
+    time.sleep(1)
+    archive_matches(server)
+    server = api_server(ARCHIVE_INTERVAL_SECONDS="0")
+    server.login()
+    assert server.call("GET", f"/api/matches/{match_id}")[1]["archived_season"] is not None
+    assert team_filtered_stats(server) == (leaders, career)
+    server.stop()
+
+    # An archive written while rosters still left the live database
+    with sqlite3.connect(tmp_path / "cricklytics.db") as conn:
+        conn.execute("""
+            DELETE FROM team_players WHERE team_id IN (SELECT id FROM teams WHERE match_id = ?)
+        """, (match_id,))
+        conn.execute("DELETE FROM teams WHERE match_id = ?", (match_id,))
+        conn.execute("UPDATE schema_version SET version = 9 WHERE name = 'schema'")
+    server = api_server(ARCHIVE_INTERVAL_SECONDS="0")
+    server.login()
+    assert team_filtered_stats(server) == (leaders, career)
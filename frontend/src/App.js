@@ -395,8 +395,8 @@ function HomePage() {
 
   const fetchLiveMatches = async () => {
     try {
-      const response = await axios.get('/api/matches?status=live');
-      setLiveMatches(response.data.slice(0, 3)); // Show top 3 live matches
+      const response = await axios.get('/api/v2/matches?status=live&limit=3');
+      setLiveMatches(response.data.matches); // Show top 3 live matches
     } catch (error) {
       console.error('Error fetching live matches:', error);
     }
@@ -404,8 +404,8 @@ function HomePage() {
 
   const fetchRecentMatches = async () => {
     try {
-      const response = await axios.get('/api/matches?status=completed&limit=6');
-      setRecentMatches(response.data);
+      const response = await axios.get('/api/v2/matches?status=completed&limit=6');
+      setRecentMatches(response.data.matches);
     } catch (error) {
       console.error('Error fetching recent matches:', error);
     }
@@ -918,6 +918,8 @@ function RegisterPage() {
 // Enhanced Matches Page with Public Viewing Portal
 function MatchesPage() {
   const [matches, setMatches] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [filter, setFilter] = useState('all');
   const [searchTerm, setSearchTerm] = useState('');
@@ -925,31 +927,51 @@ function MatchesPage() {
   const [viewMode, setViewMode] = useState('grid'); // grid or list
   const { user } = React.useContext(AuthContext);
 
+  // The status filter runs on the server, so every page holds only matching matches
+  const statusParam = filter === 'all' ? undefined : filter;
+
   useEffect(() => {
+    let current = true;
+    const fetchMatches = async () => {
+      try {
+        const response = await axios.get('/api/v2/matches', { params: { status: statusParam } });
+        // A quicker switch to another filter has already replaced this list
+        if (current) {
+          setMatches(response.data.matches);
+          setNextCursor(response.data.next_cursor);
+        }
+      } catch (error) {
+        console.error('Error fetching matches:', error);
+      } finally {
+        setLoading(false);
+      }
+    };
     fetchMatches();
-  }, []);
+    return () => { current = false; };
+  }, [statusParam]);
 
-  const fetchMatches = async () => {
+  const loadMoreMatches = async () => {
+    setLoadingMore(true);
     try {
-      const response = await axios.get('/api/matches');
-      setMatches(response.data);
+      const response = await axios.get('/api/v2/matches', { params: { status: statusParam, cursor: nextCursor } });
+      setMatches(prev => [...prev, ...response.data.matches]);
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
-      console.error('Error fetching matches:', error);
+      console.error('Error fetching more matches:', error);
     } finally {
-      setLoading(false);
+      setLoadingMore(false);
     }
   };
 
   const filteredAndSortedMatches = matches
     .filter(match => {
-      const matchesFilter = filter === 'all' || match.status === filter;
       const matchesSearch = searchTerm === '' || 
         match.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
         match.team1.toLowerCase().includes(searchTerm.toLowerCase()) ||
         match.team2.toLowerCase().includes(searchTerm.toLowerCase()) ||
         match.venue.toLowerCase().includes(searchTerm.toLowerCase());
       
-      return matchesFilter && matchesSearch;
+      return matchesSearch;
     })
     .sort((a, b) => {
       switch (sortBy) {
@@ -1103,7 +1125,8 @@ function MatchesPage() {
         {/* Filter Buttons */}
         <div className="flex flex-wrap gap-2 mb-6">
           {['all', 'live', 'completed', 'setup', 'paused'].map(status => {
-            const count = status === 'all' ? matches.length : matches.filter(m => m.status === status).length;
+            // Only the selected filter's matches are loaded, and maybe not all of them yet
+            const count = filter === status ? `${matches.length}${nextCursor ? '+' : ''}` : null;
             return (
               <button
                 key={status}
@@ -1124,9 +1147,11 @@ function MatchesPage() {
                 <span className="ml-2">
                   {status.charAt(0).toUpperCase() + status.slice(1)}
                 </span>
-                <span className="ml-2 bg-black bg-opacity-20 px-2 py-1 rounded-full text-xs">
-                  {count}
-                </span>
+                {count !== null && (
+                  <span className="ml-2 bg-black bg-opacity-20 px-2 py-1 rounded-full text-xs">
+                    {count}
+                  </span>
+                )}
               </button>
             );
           })}
@@ -1169,6 +1194,18 @@ function MatchesPage() {
           ))}
         </div>
       )}
+
+      {nextCursor && (
+        <div className="text-center mt-8">
+          <button
+            onClick={loadMoreMatches}
+            disabled={loadingMore}
+            className="btn-secondary"
+          >
+            {loadingMore ? 'Loading...' : 'Load more matches'}
+          </button>
+        </div>
+      )}
     </div>
   );
 }
@@ -2536,44 +2573,6 @@ function MatchDetailPage() {
         axios.get(`/api/matches/${id}/statistics`).catch(() => ({ data: null })) // Don't fail if stats aren't available
       ]);
 
-      // Detect new ball events for celebrations
-      const newBalls = matchResponse.data?.balls || [];
-      if (newBalls.length > 0) {
-        const latest = newBalls[newBalls.length - 1];
-        const latestId = `${latest.over_number}-${latest.ball_number}`;
-        if (latestId !== lastBallIdRef.current) {
-          lastBallIdRef.current = latestId;
-          if (latest.wicket) {
-            setCelebration({ type: 'wicket', text: 'WICKET!', sub: `${latest.batsman} is OUT` });
-            setTimeout(() => setCelebration(null), 3500);
-          } else if (latest.runs === 6) {
-            setCelebration({ type: 'six', text: 'SIX!', sub: `${latest.batsman} hits a maximum` });
-            setTimeout(() => setCelebration(null), 3000);
-          } else if (latest.runs === 4) {
-            setCelebration({ type: 'four', text: 'FOUR!', sub: `${latest.batsman} finds the boundary` });
-            setTimeout(() => setCelebration(null), 3000);
-          } else if (latest.extras_type !== 'wide') {
-            // Check for batting milestones
-            const allBalls = newBalls;
-            const batRunTotals = {};
-            allBalls.forEach(b => {
-              if (b.extras_type === 'wide') return;
-              const k = `${b.innings}-${b.batsman}`;
-              batRunTotals[k] = (batRunTotals[k] || 0) + b.runs;
-            });
-            const bKey = `${latest.innings}-${latest.batsman}`;
-            const total = batRunTotals[bKey] || 0;
-            const prev = total - latest.runs;
-            const crossed = [50, 100, 150].find(ms => prev < ms && total >= ms);
-            if (crossed) {
-              const label = crossed === 100 ? 'CENTURY!' : crossed === 50 ? 'FIFTY!' : '150 UP!';
-              setCelebration({ type: 'milestone', text: label, sub: `${latest.batsman} reaches ${crossed}` });
-              setTimeout(() => setCelebration(null), 3500);
-            }
-          }
-        }
-      }
-
       setMatch(matchResponse.data);
       setStats(statsResponse.data);
       setError('');
@@ -2593,17 +2592,107 @@ function MatchDetailPage() {
     fetchMatchDetails();
   }, [fetchMatchDetails]);
 
+  // Detect new ball events for celebrations
   useEffect(() => {
-    const refreshInterval = match?.match?.status === 'live' ? 3000 : 10000;
-
-    const intervalId = setInterval(() => {
-      if (document.visibilityState === 'visible') {
-        fetchMatchDetails({ silent: true });
+    const newBalls = match?.balls || [];
+    if (newBalls.length > 0) {
+      const latest = newBalls[newBalls.length - 1];
+      const latestId = `${latest.over_number}-${latest.ball_number}`;
+      if (latestId !== lastBallIdRef.current) {
+        lastBallIdRef.current = latestId;
+        if (latest.wicket) {
+          setCelebration({ type: 'wicket', text: 'WICKET!', sub: `${latest.batsman} is OUT` });
+          setTimeout(() => setCelebration(null), 3500);
+        } else if (latest.runs === 6) {
+          setCelebration({ type: 'six', text: 'SIX!', sub: `${latest.batsman} hits a maximum` });
+          setTimeout(() => setCelebration(null), 3000);
+        } else if (latest.runs === 4) {
+          setCelebration({ type: 'four', text: 'FOUR!', sub: `${latest.batsman} finds the boundary` });
+          setTimeout(() => setCelebration(null), 3000);
+        } else if (latest.extras_type !== 'wide') {
+          // Check for batting milestones
+          const allBalls = newBalls;
+          const batRunTotals = {};
+          allBalls.forEach(b => {
+            if (b.extras_type === 'wide') return;
+            const k = `${b.innings}-${b.batsman}`;
+            batRunTotals[k] = (batRunTotals[k] || 0) + b.runs;
+          });
+          const bKey = `${latest.innings}-${latest.batsman}`;
+          const total = batRunTotals[bKey] || 0;
+          const prev = total - latest.runs;
+          const crossed = [50, 100, 150].find(ms => prev < ms && total >= ms);
+          if (crossed) {
+            const label = crossed === 100 ? 'CENTURY!' : crossed === 50 ? 'FIFTY!' : '150 UP!';
+            setCelebration({ type: 'milestone', text: label, sub: `${latest.batsman} reaches ${crossed}` });
+            setTimeout(() => setCelebration(null), 3500);
+          }
+        }
       }
-    }, refreshInterval);
+    }
+  }, [match?.balls]);
+
+  const isLive = match?.match?.status === 'live';
+
+  useEffect(() => {
+    // Live matches are pushed over server-sent events; everything else is polled
+    if (!isLive || typeof window.EventSource === 'undefined') {
+      const refreshInterval = isLive ? 3000 : 10000;
+
+      const intervalId = setInterval(() => {
+        if (document.visibilityState === 'visible') {
+          fetchMatchDetails({ silent: true });
+        }
+      }, refreshInterval);
+
+      return () => clearInterval(intervalId);
+    }
+
+    const compareBalls = (a, b) =>
+      a.innings - b.innings || a.over_number - b.over_number || a.ball_number - b.ball_number;
+
+    const source = new EventSource(`${axios.defaults.baseURL}/api/matches/${id}/stream`);
+
+    source.addEventListener('snapshot', (event) => {
+      setMatch(JSON.parse(event.data));
+    });
+
+    source.addEventListener('ball', (event) => {
+      const { ball, innings_scores, current_over } = JSON.parse(event.data);
+      setMatch(prev => prev && {
+        ...prev,
+        innings_scores,
+        current_over,
+        balls: [...prev.balls.filter(b => b.id !== ball.id), ball].sort(compareBalls)
+      });
+    });
+
+    source.addEventListener('ball_deleted', (event) => {
+      const { ball_id, innings_scores, current_over } = JSON.parse(event.data);
+      setMatch(prev => prev && {
+        ...prev,
+        innings_scores,
+        current_over,
+        balls: prev.balls.filter(b => b.id !== ball_id)
+      });
+    });
+
+    source.addEventListener('state', (event) => {
+      const matchState = JSON.parse(event.data);
+      setMatch(prev => prev && { ...prev, match_state: { ...prev.match_state, ...matchState } });
+    });
+
+    source.addEventListener('status', (event) => {
+      const { status } = JSON.parse(event.data);
+      setMatch(prev => prev && { ...prev, match: { ...prev.match, status } });
+    });
+
+    source.addEventListener('statistics', (event) => {
+      setStats(JSON.parse(event.data));
+    });
 
-    return () => clearInterval(intervalId);
-  }, [fetchMatchDetails, match?.match?.status]);
+    return () => source.close();
+  }, [id, isLive, fetchMatchDetails]);
 
   const startMatch = async () => {
     try {